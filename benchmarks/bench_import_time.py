@@ -0,0 +1,122 @@
+# 启动导入耗时测试
+"""
+用 python -X importtime 测量各入口模块的导入耗时，并检查导入没有副作用
+（不创建 data/ 目录、不读写配置文件、不启动线程）。超出预算时返回非零退出码，可放进 CI；
+tests/test_import_time.py 在单元测试中调用 run() 做同样的检查。
+
+用法:
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --runs 10 --scale 2.0
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# 入口模块 -> 导入耗时预算（毫秒，累计耗时）
+IMPORT_BUDGETS_MS = {
+    'main': 10,
+    'config.config_manager': 40,
+    'ui.main_window': 80,
+    'core.monitor': 150,
+    'core.scheduler': 200,
+}
+
+
+# 导入完成后输出除主线程以外的线程名（导入不应启动任何线程）
+_THREADS_PROBE = "import threading; print('\\n'.join(t.name for t in threading.enumerate() if t is not threading.main_thread()))"
+
+
+class ImportResult(NamedTuple):
+    """一个入口模块的导入检查结果"""
+    module: str
+    ms: Optional[float]             # 累计导入耗时（毫秒，多次取最小值），导入失败时为 None
+    budget_ms: Optional[float]      # 按 scale 调整后的预算，None 表示不限
+    files: List[str]                # 导入时在工作目录中创建的文件
+    threads: List[str]              # 导入后存活的线程（主线程除外）
+    error: Optional[str] = None
+
+    @property
+    def within_budget(self) -> bool:
+        return self.ms is not None and (self.budget_ms is None or self.ms <= self.budget_ms)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.within_budget and not self.files and not self.threads
+
+
+def measure(module: str, cwd: str):
+    """导入一次 module，返回 (累计导入耗时（毫秒）, 导入后存活的线程名)"""
+    env = dict(os.environ, PYTHONPATH=str(PROJECT_ROOT), PYTHONDONTWRITEBYTECODE='1')
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}\n{_THREADS_PROBE}'],
+                          cwd=cwd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{proc.stderr.strip().splitlines()[-1]}")
+    threads = [name for name in proc.stdout.splitlines() if name]
+
+    # 格式: "import time: self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000, threads
+    raise RuntimeError(f"-X importtime 输出中没有找到 {module}")
+
+
+def check(module: str, runs: int = 5, scale: float = 1.0) -> ImportResult:
+    """在空的临时工作目录中导入 module runs 次，检查耗时预算和副作用"""
+    budget = IMPORT_BUDGETS_MS.get(module)
+    budget = budget * scale if budget is not None else None
+    cwd = tempfile.mkdtemp(prefix='memwatch-import-')
+    try:
+        # 预热一次（生成 .pyc、填充文件系统缓存），取其余几次的最小值
+        _, threads = measure(module, cwd)
+        best = min(measure(module, cwd)[0] for _ in range(runs))
+        files = sorted(os.listdir(cwd))
+    except RuntimeError as e:
+        return ImportResult(module, None, budget, [], [], str(e))
+    finally:
+        shutil.rmtree(cwd, ignore_errors=True)
+    return ImportResult(module, best, budget, files, threads)
+
+
+def run(modules, runs: int, scale: float) -> List[ImportResult]:
+    """逐个检查入口模块并输出结果"""
+    results = []
+    for module in modules:
+        result = check(module, runs, scale)
+        results.append(result)
+        if result.error is not None:
+            print(f"❌ {result.error}")
+            continue
+
+        budget_text = f"{result.budget_ms:6.0f} ms" if result.budget_ms is not None else "   不限"
+        print(f"{'✅' if result.ok else '❌'} {module:<24} {result.ms:8.1f} ms  (预算 {budget_text})")
+        if result.files:
+            print(f"   导入时创建了文件: {', '.join(result.files)}")
+        if result.threads:
+            print(f"   导入时启动了线程: {', '.join(result.threads)}")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="入口模块导入耗时与副作用检查")
+    parser.add_argument('modules', nargs='*', default=list(IMPORT_BUDGETS_MS))
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--scale', type=float, default=1.0, help="预算倍数（较慢的机器上可以放宽）")
+    args = parser.parse_args()
+
+    print("📊 入口模块导入耗时（累计，取最小值）")
+    return 0 if all(result.ok for result in run(args.modules, args.runs, args.scale)) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
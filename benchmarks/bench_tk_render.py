@@ -0,0 +1,116 @@
+# 监控面板绘制开销测试
+"""
+对比原先每次 delete("all") 后重画的进度条与保留模式 ProgressBar 的单次更新 CPU 时间
+
+用法（需要图形环境，Linux 无桌面时可用 xvfb-run）:
+    python -m benchmarks.bench_tk_render
+    python -m benchmarks.bench_tk_render --updates 5000 --step 0.3
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import tkinter as tk
+
+from ui.progress_bar import ProgressBar, get_highlight_color
+
+
+def legacy_draw_progress_bar(canvas, percentage, color):
+    """原 ui/main_window.draw_progress_bar 的实现，作为对照"""
+    canvas.delete("all")
+    legacy_draw_rounded_rect(canvas, 4, 4, 216, 20, 10, '#f5f5f5', '#e8e8e8')
+    if percentage > 0:
+        bar_width = max(20, int((percentage / 100) * 208))
+        legacy_draw_rounded_rect(canvas, 6, 6, 6 + bar_width, 18, 8, color, '')
+        legacy_draw_rounded_rect(canvas, 6, 6, 6 + bar_width, 11, 8, get_highlight_color(color), '')
+        if bar_width > 40:
+            gloss_width = min(30, bar_width // 3)
+            canvas.create_oval(15, 7, 15 + gloss_width, 10, fill='white', stipple='gray25', outline='')
+
+
+def legacy_draw_rounded_rect(canvas, x1, y1, x2, y2, radius, fill_color, outline_color):
+    canvas.create_oval(x1, y1, x1 + radius*2, y1 + radius*2, fill=fill_color, outline=outline_color, width=0)
+    canvas.create_oval(x2 - radius*2, y1, x2, y1 + radius*2, fill=fill_color, outline=outline_color, width=0)
+    canvas.create_oval(x1, y2 - radius*2, x1 + radius*2, y2, fill=fill_color, outline=outline_color, width=0)
+    canvas.create_oval(x2 - radius*2, y2 - radius*2, x2, y2, fill=fill_color, outline=outline_color, width=0)
+    canvas.create_rectangle(x1 + radius, y1, x2 - radius, y2, fill=fill_color, outline='', width=0)
+    canvas.create_rectangle(x1, y1 + radius, x2, y2 - radius, fill=fill_color, outline='', width=0)
+
+
+def color_for(percentage):
+    if percentage > 85:
+        return '#ff3b30'
+    elif percentage > 70:
+        return '#ff9500'
+    elif percentage > 50:
+        return '#ffcc00'
+    return '#34c759'
+
+
+def random_walk(count: int, step: float, seed: int = 0):
+    """模拟每秒一次的内存占用采样：大部分时间只有小幅波动"""
+    rng = random.Random(seed)
+    value = 60.0
+    values = []
+    for _ in range(count):
+        value = min(100.0, max(0.0, value + rng.uniform(-step, step)))
+        values.append(round(value, 1))
+    return values
+
+
+def time_updates(root, update, values) -> float:
+    """返回单次更新（含 Tk 重绘）的平均 CPU 时间（微秒）"""
+    start = time.process_time()
+    for value in values:
+        update(value)
+        root.update_idletasks()
+    return (time.process_time() - start) / len(values) * 1e6
+
+
+def run(updates: int, step: float):
+    root = tk.Tk()
+    try:
+        values = random_walk(updates, step)
+
+        legacy_canvas = tk.Canvas(root, width=220, height=24, bg='white', highlightthickness=0)
+        legacy_canvas.pack()
+        legacy_us = time_updates(root, lambda v: legacy_draw_progress_bar(legacy_canvas, v, color_for(v)), values)
+
+        bar = ProgressBar(root)
+        bar.pack()
+        changed = 0
+
+        def retained_update(v):
+            nonlocal changed
+            changed += bar.set(v, color_for(v))
+
+        retained_us = time_updates(root, retained_update, values)
+    finally:
+        root.destroy()
+
+    print(f"{updates} 次更新（每次变化 ±{step}%）")
+    print(f"  重画模式: {legacy_us:8.1f} µs/次")
+    print(f"  保留模式: {retained_us:8.1f} µs/次（实际修改画布 {changed} 次）")
+    return legacy_us, retained_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="监控面板进度条单次更新开销对比")
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--step', type=float, default=0.5, help="相邻两次采样的最大变化（百分点）")
+    args = parser.parse_args()
+
+    try:
+        run(args.updates, args.step)
+    except tk.TclError as e:
+        print(f"❌ 无法创建 Tk 窗口（没有图形环境？）: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
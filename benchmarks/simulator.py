@@ -0,0 +1,202 @@
+# 模拟进程表
+"""
+可重复的合成进程表，用于在普通 Linux 机器上测量热点路径随进程数的扩展性
+
+- SimulatedProcessTable 实现了采集后端接口（collect / memory / close），
+  可以直接交给 SnapshotEngine(collector=...) 使用
+- process() / wait_procs() 可以替换 TerminationPipeline 中的 psutil.Process / psutil.wait_procs，
+  "终止"只是把进程从模拟表中移除，不会向任何真实进程发送信号
+- footprint() 可以替换 FootprintSampler 的读取函数，按 RSS 的固定比例给出 PSS / USS
+"""
+import random
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+from config.default_config import GAME_WHITELIST, OFFICE_WHITELIST, SYSTEM_CRITICAL
+from core.cpu_accounting import CpuUsage
+from core.footprint import MemoryFootprint
+from core.snapshot import ProcessRecord, SystemMemory
+
+MB = 1024 * 1024
+
+
+class SimulatedProcess:
+    """模拟进程的可变状态"""
+    __slots__ = ('pid', 'ppid', 'name', 'rss', 'cpu_percent', 'create_time',
+                 'responsive', 'terminating')
+
+    def __init__(self, pid: int, ppid: int, name: str, rss: int, cpu_percent: float,
+                 create_time: float, responsive: bool):
+        self.pid = pid
+        self.ppid = ppid
+        self.name = name
+        self.rss = rss
+        self.cpu_percent = cpu_percent
+        self.create_time = create_time
+        self.responsive = responsive
+        self.terminating = False
+
+    def record(self) -> ProcessRecord:
+        return ProcessRecord(self.pid, self.ppid, self.name, self.rss, self.rss * 4,
+                             self.cpu_percent, self.create_time, 'sleeping')
+
+
+class SimulatedProcessTable:
+    """
+    合成进程表
+    process_count: 进程数量（100 ~ 50000）
+    rss_median_mb / rss_sigma: RSS 服从对数正态分布
+    cpu_active_fraction: 有 CPU 占用的进程比例，其 CPU 占用服从指数分布（均值 cpu_mean）
+    churn_per_tick: 每次采样有多少比例的进程退出并被新进程替换
+    rss_jitter: 每次采样 RSS 发生变化的进程比例
+    unresponsive_fraction: 收到 TERM 后不退出的进程比例
+    protected_fraction: 名字命中白名单 / 系统关键进程的比例
+    memory_percent: 模拟的整机内存占用率（终止进程后按其 RSS 下降）
+    """
+
+    def __init__(self, process_count: int = 1000, rss_median_mb: float = 30.0, rss_sigma: float = 1.5,
+                 cpu_active_fraction: float = 0.05, cpu_mean: float = 5.0,
+                 churn_per_tick: float = 0.01, rss_jitter: float = 0.2,
+                 unresponsive_fraction: float = 0.1, protected_fraction: float = 0.2,
+                 memory_percent: float = 90.0, total_memory_gb: float = 16.0, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.rss_median_mb = rss_median_mb
+        self.rss_sigma = rss_sigma
+        self.cpu_active_fraction = cpu_active_fraction
+        self.cpu_mean = cpu_mean
+        self.churn_per_tick = churn_per_tick
+        self.rss_jitter = rss_jitter
+        self.unresponsive_fraction = unresponsive_fraction
+        self.protected_fraction = protected_fraction
+
+        self.total = int(total_memory_gb * 1024 * MB)
+        self.used = int(self.total * memory_percent / 100)
+        self.cpu_percent = 20.0
+
+        self._protected_names = list(SYSTEM_CRITICAL) + list(OFFICE_WHITELIST) + list(GAME_WHITELIST)
+        self._next_pid = 100
+        self._clock = 1_700_000_000.0
+        self._lock = threading.Lock()
+        self.processes: Dict[int, SimulatedProcess] = {}
+        for _ in range(process_count):
+            self._spawn()
+
+        self.terminated = 0
+
+    # ---------- 模拟 ----------
+
+    def _spawn(self):
+        rng = self.rng
+        pid = self._next_pid
+        self._next_pid += 1
+        self._clock += 0.01
+
+        if rng.random() < self.protected_fraction:
+            name = rng.choice(self._protected_names)
+        else:
+            name = f"app{rng.randrange(2000)}.exe"
+
+        rss = int(rng.lognormvariate(0, self.rss_sigma) * self.rss_median_mb * MB)
+        cpu = round(rng.expovariate(1 / self.cpu_mean), 1) if rng.random() < self.cpu_active_fraction else 0.0
+        ppid = rng.randrange(100, pid) if pid > 100 and rng.random() < 0.7 else 1
+        self.processes[pid] = SimulatedProcess(pid, ppid, name, rss, cpu, self._clock,
+                                               rng.random() >= self.unresponsive_fraction)
+
+    def tick(self):
+        """推进一次采样：部分进程退出 / 新建，部分进程 RSS 和 CPU 变化"""
+        rng = self.rng
+        with self._lock:
+            pids = list(self.processes)
+            churn = int(len(pids) * self.churn_per_tick)
+            for pid in rng.sample(pids, min(churn, len(pids))):
+                del self.processes[pid]
+            for _ in range(churn):
+                self._spawn()
+
+            pids = list(self.processes)
+            for pid in rng.sample(pids, int(len(pids) * self.rss_jitter)):
+                proc = self.processes[pid]
+                proc.rss = max(MB, int(proc.rss * rng.uniform(0.9, 1.1)))
+                if proc.cpu_percent or rng.random() < self.cpu_active_fraction:
+                    proc.cpu_percent = round(rng.expovariate(1 / self.cpu_mean), 1)
+
+    # ---------- 采集后端接口 ----------
+
+    def memory(self) -> SystemMemory:
+        available = max(0, self.total - self.used)
+        return SystemMemory(self.total, available, self.used, available,
+                            round(self.used / self.total * 100, 1))
+
+    def collect(self) -> Tuple[SystemMemory, CpuUsage, List[ProcessRecord]]:
+        self.tick()
+        with self._lock:
+            processes = [p.record() for p in self.processes.values()]
+        return self.memory(), CpuUsage(self.cpu_percent, (self.cpu_percent,), True), processes
+
+    def close(self):
+        pass
+
+    # ---------- 终止流水线接口 ----------
+
+    def process(self, pid: int) -> 'SimulatedHandle':
+        """代替 psutil.Process"""
+        with self._lock:
+            proc = self.processes.get(pid)
+        if proc is None:
+            raise psutil.NoSuchProcess(pid)
+        return SimulatedHandle(self, proc)
+
+    def wait_procs(self, procs, timeout: Optional[float] = None, callback=None):
+        """代替 psutil.wait_procs：响应 TERM 的进程立即退出，其余进程等到超时"""
+        gone, alive = [], []
+        for handle in procs:
+            if handle.exit():
+                gone.append(handle)
+                if callback is not None:
+                    callback(handle)
+            else:
+                alive.append(handle)
+        if alive and timeout:
+            time.sleep(timeout)
+        return gone, alive
+
+    def footprint(self, pid: int, create_time: Optional[float] = None) -> Optional[MemoryFootprint]:
+        """代替 read_footprint：独占内存占 RSS 的 30% ~ 90%（按 PID 固定），其余为共享页面"""
+        with self._lock:
+            proc = self.processes.get(pid)
+        if proc is None or (create_time and proc.create_time != create_time):
+            return None
+        uss = int(proc.rss * (0.3 + (pid % 7) / 10))
+        return MemoryFootprint(rss=proc.rss, pss=(proc.rss + uss) // 2, uss=uss, swap_pss=0)
+
+    def _remove(self, proc: SimulatedProcess):
+        with self._lock:
+            if self.processes.pop(proc.pid, None) is not None:
+                self.used = max(0, self.used - proc.rss)
+                self.terminated += 1
+
+
+class SimulatedHandle:
+    """代替 psutil.Process 的模拟进程句柄"""
+
+    def __init__(self, table: SimulatedProcessTable, proc: SimulatedProcess):
+        self._table = table
+        self._proc = proc
+        self.pid = proc.pid
+
+    def create_time(self) -> float:
+        return self._proc.create_time
+
+    def terminate(self):
+        self._proc.terminating = True
+
+    def exit(self) -> bool:
+        """处理已发送的 TERM，返回进程是否已退出"""
+        proc = self._proc
+        if proc.terminating and proc.responsive:
+            self._table._remove(proc)
+            return True
+        return False
@@ -0,0 +1,206 @@
+# 热点路径性能测试套件
+"""
+在模拟进程表上测量各热点路径随进程数的扩展性，结果可输出为 JSON 供回归对比
+
+不会终止任何真实进程：快照来自 SimulatedProcessTable，终止流水线使用模拟进程句柄。
+测试在临时工作目录中运行，使用默认配置，不读写 data/user_config.json。
+
+用法:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --counts 100 1000 10000 50000 --rounds 10 --json results.json
+    python -m benchmarks.suite --compare baseline.json --tolerance 0.25
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.simulator import SimulatedProcessTable
+
+# simulate 只推进模拟进程表，用于从其他场景中扣除模拟本身的开销
+SCENARIOS = ('simulate', 'snapshot_refresh', 'get_memory_hogs', 'is_process_safe_to_clean',
+             'gentle_cleanup', 'get_current_stats')
+
+
+def bench(func: Callable, rounds: int, warmup: int = 1,
+          setup: Optional[Callable] = None) -> Dict[str, float]:
+    """
+    运行 func 若干轮，返回耗时统计（毫秒）
+    setup 在每轮之前调用，不计入耗时
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        func()
+
+    times = []
+    for _ in range(rounds):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'rounds': rounds,
+        'min': min(times),
+        'max': max(times),
+        'mean': statistics.fmean(times),
+        'median': statistics.median(times),
+        'stddev': statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def run_scenarios(count: int, scenarios, rounds: int, args) -> List[Dict]:
+    from core.cleaner_safe import SafeMemoryCleaner
+    from core.footprint import FootprintSampler
+    from core.ladder import TIER_TERMINATE
+    from core.monitor_realtime import SystemMonitor
+    from core.snapshot import SnapshotEngine
+    from core.terminator import TerminationPipeline
+
+    table = SimulatedProcessTable(count, churn_per_tick=args.churn,
+                                  unresponsive_fraction=args.unresponsive, seed=args.seed)
+    engine = SnapshotEngine(max_staleness=0.0, collector=table)
+    terminator = TerminationPipeline(deadline=args.deadline, process_factory=table.process,
+                                     wait_procs=table.wait_procs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        # 只走终止级别：降级 / 暂停 / cgroup 回收会作用到真实进程和 cgroup
+        cleaner = SafeMemoryCleaner(engine, terminator=terminator,
+                                    footprint=FootprintSampler(reader=table.footprint),
+                                    tiers=[TIER_TERMINATE])
+        monitor = SystemMonitor(max_data_points=60, snapshot_engine=engine)
+    engine.refresh()
+    engine.refresh()
+    initial_used = table.used
+
+    def refresh():
+        engine.refresh()
+
+    def memory_hogs():
+        cleaner.get_memory_hogs(100, engine.get_snapshot(max_staleness=float('inf')), limit=6)
+
+    def safe_checks():
+        for record in engine.get_snapshot(max_staleness=float('inf')).processes:
+            cleaner.is_process_safe_to_clean(record.name, 'office')
+
+    def reset_memory():
+        table.used = initial_used
+        engine.refresh()
+
+    def cleanup():
+        with contextlib.redirect_stdout(io.StringIO()):
+            cleaner.gentle_cleanup('office')
+
+    def current_stats():
+        monitor.get_current_stats()
+
+    cases = {
+        'simulate': (table.tick, None),
+        'snapshot_refresh': (refresh, None),
+        'get_memory_hogs': (memory_hogs, None),
+        'is_process_safe_to_clean': (safe_checks, None),
+        'gentle_cleanup': (cleanup, reset_memory),
+        'get_current_stats': (current_stats, None),
+    }
+
+    results = []
+    for name in scenarios:
+        func, setup = cases[name]
+        stats = bench(func, rounds, setup=setup)
+        results.append(dict(scenario=name, processes=count, **stats))
+        print(f"  {name:<26} {stats['median']:10.3f} ms  (min {stats['min']:.3f}, σ {stats['stddev']:.3f})")
+
+    return results
+
+
+def compare(results: List[Dict], baseline_path: str, tolerance: float) -> bool:
+    """与基线结果对比中位数，慢于 (1 + tolerance) 倍视为回归"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {(r['scenario'], r['processes']): r for r in json.load(f)['results']}
+
+    ok = True
+    print(f"\n📈 与基线对比（容差 {tolerance:.0%}）")
+    for result in results:
+        base = baseline.get((result['scenario'], result['processes']))
+        if base is None:
+            continue
+        ratio = result['median'] / base['median'] if base['median'] else 1.0
+        status = '✅'
+        if ratio > 1 + tolerance:
+            status = '❌'
+            ok = False
+        print(f"{status} {result['scenario']:<26} {result['processes']:>6} 进程  {ratio:5.2f}x")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="模拟进程表上的热点路径性能测试")
+    parser.add_argument('--counts', type=int, nargs='+', default=[100, 1000, 10000, 50000])
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--churn', type=float, default=0.01, help="每次采样进程替换比例")
+    parser.add_argument('--unresponsive', type=float, default=0.1, help="不响应 TERM 的进程比例")
+    parser.add_argument('--deadline', type=float, default=0.01, help="模拟清理的终止等待期限（秒）")
+    parser.add_argument('--json', help="结果输出路径")
+    parser.add_argument('--compare', help="基线结果（--json 的输出）")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    # 在临时目录中运行：使用默认配置，不产生 data/ 下的文件
+    workdir = tempfile.mkdtemp(prefix='memwatch-bench-')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        results = []
+        for count in args.counts:
+            print(f"📊 {count} 个进程")
+            results.extend(run_scenarios(count, args.scenarios, args.rounds, args))
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'version': 1,
+        'created': time.time(),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'params': {
+            'rounds': args.rounds,
+            'seed': args.seed,
+            'churn': args.churn,
+            'unresponsive': args.unresponsive,
+            'deadline': args.deadline,
+        },
+        'results': results,
+    }
+    if json_path:
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 结果已保存: {json_path}")
+
+    if baseline_path and not compare(results, baseline_path, args.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,58 @@
+import atexit
 import json
 import os
-from typing import Dict, Any, Optional
+import threading
+from typing import Callable, Dict, Any, List, Optional
+from .config_watcher import ConfigWatcher, _stat_key
 from .default_config import (
     SYSTEM_CRITICAL, OFFICE_WHITELIST, GAME_WHITELIST,
-    MEMORY_THRESHOLD, SAFE_CLEANUP_CONFIG
+    MEMORY_THRESHOLD, SAFE_CLEANUP_CONFIG, SNAPSHOT_CONFIG,
+    JOURNAL_CONFIG, INSTRUMENTATION_CONFIG, EXPORTER_CONFIG,
+    DAEMON_CONFIG, MONITOR_CONFIG, CGROUP_CONFIG, LADDER_CONFIG, SELECTION_CONFIG
 )
 
+_MISSING = object()
+
+
+class ConfigAccessor:
+    """
+    预先编译的配置项访问器
+    键路径只拆分一次，值缓存到配置版本变化为止，调用开销是一次整数比较
+    """
+    __slots__ = ('manager', 'key', 'keys', 'default', '_version', '_value')
+
+    def __init__(self, manager: 'ConfigManager', key: str, default: Any = None):
+        self.manager = manager
+        self.key = key
+        self.keys = tuple(key.split('.'))
+        self.default = default
+        self._version = None
+        self._value = None
+
+    def __call__(self) -> Any:
+        manager = self.manager
+        if self._version != manager.version:
+            self._value = manager._resolve(self.keys, self.default)
+            self._version = manager.version
+        return self._value
+
+
 class ConfigManager:
-    def __init__(self, config_file: str = "data/user_config.json"):
+    def __init__(self, config_file: str = "data/user_config.json", save_delay: float = 0.5):
+        """
+        save_delay: set() 之后延迟多少秒写盘，期间的多次修改合并为一次保存
+        """
         self.config_file = config_file
+        self.save_delay = save_delay
+        self.version = 0    # 每次配置变更递增，供依赖配置的缓存判断是否失效
+
+        self._lock = threading.RLock()
+        self._cache: Dict[str, Any] = {}
+        self._listeners: List[Callable[['ConfigManager'], None]] = []
+        self._save_timer: Optional[threading.Timer] = None
+        self._file_stat = None      # 最近一次读 / 写后的文件状态，用于忽略自己写入引起的变更
+        self.watcher = None
+
         self.config = self._load_config()
     
     def _get_default_config(self) -> Dict[str, Any]:
@@ -22,7 +66,11 @@ class ConfigManager:
             "scheduler": {
                 "interval_minutes": 5,
                 "enabled": False,
-                "smart_mode": True
+                "smart_mode": True,
+                "trigger": "auto",          # auto / psi / poll
+                "psi_stall_ms": 150,        # 时间窗口内内存停顿超过该值即唤醒
+                "psi_window_ms": 1000,
+                "forecast_lead_seconds": 60   # 预计在该时间内超过阈值时提前清理
             },
             "whitelist": {
                 "office": OFFICE_WHITELIST.copy(),
@@ -31,10 +79,30 @@ class ConfigManager:
             },
             "cleanup": {
                 "max_processes_per_batch": SAFE_CLEANUP_CONFIG.get('max_processes_per_batch', 3),
-                "cleanup_interval": SAFE_CLEANUP_CONFIG.get('cleanup_interval', 2.0),
+                "terminate_deadline": SAFE_CLEANUP_CONFIG.get('terminate_deadline', 3.0),
+                "max_terms_per_second": SAFE_CLEANUP_CONFIG.get('max_terms_per_second', 0.0),
                 "memory_limit_mb": SAFE_CLEANUP_CONFIG.get('memory_limit_mb', 100),
+                "group_by": SAFE_CLEANUP_CONFIG.get('group_by', 'process'),
+                "footprint_ttl": SAFE_CLEANUP_CONFIG.get('footprint_ttl', 30.0),
+                "footprint_workers": SAFE_CLEANUP_CONFIG.get('footprint_workers', 4),
                 "cpu_limit_percent": SAFE_CLEANUP_CONFIG.get('cpu_limit_percent', 50.0)
             },
+            "snapshot": {
+                "max_staleness": SNAPSHOT_CONFIG.get('max_staleness', 1.0),
+                "backend": SNAPSHOT_CONFIG.get('backend', 'auto')
+            },
+            "journal": JOURNAL_CONFIG.copy(),
+            "instrumentation": {
+                "enabled": INSTRUMENTATION_CONFIG.get('enabled', False),
+                "budgets_ms": dict(INSTRUMENTATION_CONFIG.get('budgets_ms', {}))
+            },
+            "exporter": EXPORTER_CONFIG.copy(),
+            "daemon": DAEMON_CONFIG.copy(),
+            "monitor": MONITOR_CONFIG.copy(),
+            "cgroup": dict(CGROUP_CONFIG, budgets_mb=dict(CGROUP_CONFIG.get('budgets_mb', {}))),
+            "ladder": dict(LADDER_CONFIG, tiers=list(LADDER_CONFIG.get('tiers', []))),
+            "selection": dict(SELECTION_CONFIG, weights=dict(SELECTION_CONFIG.get('weights', {})),
+                              priorities=dict(SELECTION_CONFIG.get('priorities', {}))),
             "ui": {
                 "notification_duration": 5,
                 "minimize_to_tray": True,
@@ -46,11 +114,10 @@ class ConfigManager:
         """加载配置文件，如果不存在则创建默认配置"""
         try:
             if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    # 合并默认配置，确保所有字段都存在
-                    default_config = self._get_default_config()
-                    return self._merge_configs(default_config, config)
+                config = self._read_file()
+                # 合并默认配置，确保所有字段都存在
+                default_config = self._get_default_config()
+                return self._merge_configs(default_config, config)
             else:
                 # 创建配置文件目录
                 os.makedirs(os.path.dirname(self.config_file), exist_ok=True)
@@ -75,52 +142,147 @@ class ConfigManager:
         merge_dict(result, user)
         return result
     
+    def _read_file(self) -> Dict[str, Any]:
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            self._file_stat = _stat_key(f.fileno())
+            return json.load(f)
+
     def _save_config(self, config: Dict[str, Any]) -> bool:
-        """保存配置到文件"""
+        """保存配置到文件（先写临时文件再原子替换，不会留下写了一半的配置）"""
+        tmp_file = f"{self.config_file}.tmp"
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=2, ensure_ascii=False)
+            with self._lock:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(config, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_file, self.config_file)
+                self._file_stat = _stat_key(self.config_file)
             return True
         except Exception as e:
             print(f"❌ 保存配置文件失败: {e}")
             return False
-    
-    def get(self, key: str, default: Any = None) -> Any:
-        """获取配置值"""
-        keys = key.split('.')
+
+    def _resolve(self, keys, default: Any) -> Any:
         value = self.config
-        
         for k in keys:
             if isinstance(value, dict) and k in value:
                 value = value[k]
             else:
                 return default
-        
         return value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """获取配置值（按键缓存，配置变更时清空）"""
+        cache = self._cache
+        value = cache.get(key, _MISSING)
+        if value is _MISSING and key not in cache:
+            value = self._resolve(key.split('.'), _MISSING)
+            cache[key] = value
+        return default if value is _MISSING else value
+
+    def accessor(self, key: str, default: Any = None) -> ConfigAccessor:
+        """编译一个配置项访问器，适合在循环中反复读取的配置"""
+        return ConfigAccessor(self, key, default)
     
     def set(self, key: str, value: Any) -> bool:
-        """设置配置值"""
+        """设置配置值（延迟 save_delay 秒后合并写盘）"""
         keys = key.split('.')
-        config = self.config
-        
-        # 导航到父级字典
-        for k in keys[:-1]:
-            if k not in config:
-                config[k] = {}
-            config = config[k]
-        
-        # 设置值
-        config[keys[-1]] = value
-        return self._save_config(self.config)
+        with self._lock:
+            config = self.config
+
+            # 导航到父级字典
+            for k in keys[:-1]:
+                if k not in config:
+                    config[k] = {}
+                config = config[k]
+
+            # 设置值
+            config[keys[-1]] = value
+            self._schedule_save()
+        self._changed()
+        return True
     
     def save(self) -> bool:
-        """保存当前配置"""
-        return self._save_config(self.config)
+        """立即保存当前配置"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            return self._save_config(self.config)
+
+    def flush(self):
+        """有尚未写盘的修改时立即保存"""
+        if self._save_timer is not None:
+            self.save()
+
+    def _schedule_save(self):
+        if self._save_timer is not None:
+            return
+        self._save_timer = threading.Timer(self.save_delay, self.save)
+        self._save_timer.daemon = True
+        self._save_timer.start()
     
     def reset_to_default(self) -> bool:
         """重置为默认配置"""
-        self.config = self._get_default_config()
-        return self._save_config(self.config)
+        with self._lock:
+            self.config = self._get_default_config()
+            saved = self.save()
+        self._changed()
+        return saved
+
+    def reload(self) -> bool:
+        """
+        从文件重新加载配置，返回配置是否变化
+        文件就是自己刚写入的版本时直接忽略
+        """
+        with self._lock:
+            try:
+                if _stat_key(self.config_file) == self._file_stat:
+                    return False
+                config = self._merge_configs(self._get_default_config(), self._read_file())
+            except (OSError, ValueError) as e:
+                # 文件正在被编辑或内容不完整，保留当前配置
+                print(f"⚠️ 重新加载配置文件失败: {e}")
+                return False
+            if config == self.config:
+                return False
+            self.config = config
+        print("🔄 配置文件已变更，重新加载")
+        self._changed()
+        return True
+
+    def add_change_listener(self, callback: Callable[['ConfigManager'], None]):
+        """注册配置变更回调（set / reset_to_default / 文件重新加载后各调用一次）"""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def remove_change_listener(self, callback: Callable[['ConfigManager'], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _changed(self):
+        """配置变更：递增版本、清空缓存、通知依赖方"""
+        with self._lock:
+            self.version += 1
+            self._cache = {}
+        for callback in list(self._listeners):
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"⚠️ 配置变更回调失败: {e}")
+
+    def start_watching(self, poll_interval: float = 1.0):
+        """监视配置文件，被外部修改时自动重新加载（重复调用无副作用）"""
+        if self.watcher is not None:
+            return
+        self.watcher = ConfigWatcher(self.config_file, self.reload, poll_interval=poll_interval)
+        self.watcher.start()
+
+    def stop_watching(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
     
     def get_threshold(self, mode: str) -> float:
         """获取指定模式的内存阈值"""
@@ -138,5 +300,31 @@ class ConfigManager:
         """获取托管模式间隔（分钟）"""
         return self.get("scheduler.interval_minutes", 5)
 
-# 全局配置管理器实例
-config_manager = ConfigManager()
+_config_manager: Optional[ConfigManager] = None
+_config_lock = threading.Lock()
+
+
+def get_config_manager() -> ConfigManager:
+    """获取全局配置管理器（首次调用时才读取 / 创建配置文件）"""
+    global _config_manager
+    if _config_manager is None:
+        with _config_lock:
+            if _config_manager is None:
+                _config_manager = ConfigManager()
+                # 退出前写入尚未保存的修改
+                atexit.register(_config_manager.flush)
+    return _config_manager
+
+
+class _LazyConfigManager:
+    """
+    延迟创建的配置管理器代理
+    导入本模块不会读写配置文件，第一次访问属性时才加载
+    """
+
+    def __getattr__(self, name):
+        return getattr(get_config_manager(), name)
+
+
+# 全局配置管理器实例（延迟加载）
+config_manager = _LazyConfigManager()
@@ -0,0 +1,151 @@
+# 配置文件变更监视
+import os
+import select
+import struct
+import sys
+import threading
+from typing import Callable, Optional
+
+# <linux/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT_HEADER = struct.Struct('iIII')    # wd, mask, cookie, len
+
+
+def _load_inotify():
+    """通过 ctypes 取得 libc 中的 inotify 函数，不可用时返回 None"""
+    if not sys.platform.startswith('linux'):
+        return None
+    # ctypes 只在启动监视时导入，config_manager 导入本模块（_stat_key）不增加启动耗时
+    import ctypes
+    import ctypes.util
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class ConfigWatcher:
+    """
+    监视配置文件的变化
+    - Linux 下用 inotify 监视所在目录（原子替换会换掉文件的 inode，所以监视目录而不是文件）
+    - 其他平台或 inotify 不可用时，按 poll_interval 轮询文件的 mtime / 大小
+    短时间内的多次变化合并为一次回调
+    """
+
+    def __init__(self, path: str, on_change: Callable[[], None], poll_interval: float = 1.0,
+                 debounce: float = 0.1, use_inotify: bool = True):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._inotify_fd: Optional[int] = None
+        self._wake_r = self._wake_w = None
+        if use_inotify:
+            self._open_inotify()
+
+    @property
+    def mode(self) -> str:
+        return 'inotify' if self._inotify_fd is not None else 'poll'
+
+    def _open_inotify(self):
+        libc = _load_inotify()
+        if libc is None:
+            return
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return
+        directory = os.path.dirname(self.path).encode()
+        if libc.inotify_add_watch(fd, directory, IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_MODIFY) < 0:
+            os.close(fd)
+            return
+        self._inotify_fd = fd
+        self._wake_r, self._wake_w = os.pipe()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        target = self._run_inotify if self._inotify_fd is not None else self._run_poll
+        self._thread = threading.Thread(target=target, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b'x')
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        for fd in (self._inotify_fd, self._wake_r, self._wake_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._inotify_fd = self._wake_r = self._wake_w = None
+
+    def _run_inotify(self):
+        name = os.path.basename(self.path).encode()
+        fds = [self._inotify_fd, self._wake_r]
+        while not self._stop.is_set():
+            readable, _, _ = select.select(fds, [], [])
+            if self._stop.is_set():
+                break
+            if self._inotify_fd in readable and self._read_events(name):
+                # 编辑器保存时往往连续产生多个事件，等一小段时间后合并处理
+                self._stop.wait(self.debounce)
+                self._read_events(name)
+                self._fire()
+
+    def _read_events(self, name: bytes) -> bool:
+        """读出所有待处理事件，返回其中是否有目标文件"""
+        matched = False
+        while True:
+            try:
+                data = os.read(self._inotify_fd, 64 * 1024)
+            except BlockingIOError:
+                return matched
+            offset = 0
+            while offset + _EVENT_HEADER.size <= len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                if data[offset:offset + length].rstrip(b'\0') == name:
+                    matched = True
+                offset += length
+
+    def _run_poll(self):
+        last = _stat_key(self.path)
+        while not self._stop.wait(self.poll_interval):
+            current = _stat_key(self.path)
+            if current != last:
+                last = current
+                self._fire()
+
+    def _fire(self):
+        try:
+            self.on_change()
+        except Exception as e:
+            print(f"⚠️ 配置变更处理失败: {e}")
+
+
+def _stat_key(path_or_fd):
+    """文件的 (mtime, 大小, inode)，用于判断配置文件是否被修改；文件不存在时为 None"""
+    try:
+        st = os.stat(path_or_fd)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
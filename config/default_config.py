@@ -37,7 +37,102 @@ MEMORY_THRESHOLD = {
 # 安全清理配置
 SAFE_CLEANUP_CONFIG = {
     'max_processes_per_batch': 3,    # 每批最多清理3个进程
-    'cleanup_interval': 2.0,         # 清理间隔2秒
-    'memory_limit_mb': 100,          # 只清理占用超过100MB的进程
+    'terminate_deadline': 3.0,       # 整批进程共用3秒等待期限
+    'max_terms_per_second': 0.0,     # TERM信号发送速率上限，0表示不限速
+    'memory_limit_mb': 100,          # 只清理占用超过100MB的进程（按应用组时为组内合计）
+    'group_by': 'process',           # process：按单个进程；app：按应用（整棵进程树）排序和清理
+    'footprint_ttl': 30.0,           # 候选进程 PSS / USS 的缓存时间（秒）
+    'footprint_workers': 4,          # 并行读取 smaps_rollup 的线程数
     'cpu_limit_percent': 50.0        # 只清理CPU占用超过50%的进程
 }
+
+# 进程快照配置
+SNAPSHOT_CONFIG = {
+    'max_staleness': 1.0,            # 快照最长复用1秒，超过则重新遍历进程表
+    'backend': 'auto'                # 采集后端：auto / procfs / psutil
+}
+
+# 监控数据日志配置
+JOURNAL_CONFIG = {
+    'enabled': True,
+    'directory': 'data/journal',     # 原始数据在 raw/，1分钟聚合在 1m/
+    'file_size_mb': 4,               # 单个文件4MB（约15万条1秒记录），写满后滚动
+    'compact_after_hours': 24        # 超过24小时的1秒数据降采样为1分钟聚合
+}
+
+# 性能统计配置（关闭时几乎没有开销）
+INSTRUMENTATION_CONFIG = {
+    'enabled': False,
+    'budgets_ms': {                  # 各阶段 p95 耗时预算（毫秒），超出时在报告中标记
+        'monitor.tick': 5.0,
+        'snapshot.scan': 50.0,
+        'cleaner.match': 0.05
+    }
+}
+
+# 指标导出配置（Prometheus 文本格式，只监听本机）
+EXPORTER_CONFIG = {
+    'enabled': False,
+    'host': '127.0.0.1',
+    'port': 9464,
+    'unix_socket': '',               # 设置后改为监听该 Unix 套接字
+    'top_k': 10                      # 导出内存 / CPU 占用最高的前10个进程
+}
+
+# 守护进程配置
+DAEMON_CONFIG = {
+    'socket_path': 'data/memwatch.sock'  # 控制套接字，GUI 启动时发现守护进程在运行则直接订阅其采样
+}
+
+# 实时监控配置
+MONITOR_CONFIG = {
+    'loop': 'asyncio',               # asyncio：采样 / 调度 / 日志 / 导出作为协程运行；thread：各自独立线程
+    'async_workers': 4,              # 阻塞调用（进程表遍历、清理、压力等待）的线程池大小
+    'subscriber_queue_size': 16,     # 每个订阅者最多积压的采样数，超出时丢弃最旧的
+    'adaptive': True,                # 按内存距阈值的远近和变化速度调整采样间隔
+    'base_interval': 1.0,            # 常规采样间隔（秒）
+    'min_interval': 0.2,             # 接近阈值 / 快速上升时的采样间隔
+    'max_interval': 10.0,            # 平稳且远低于阈值时的最长间隔
+    'near_margin': 5.0,              # 距阈值小于5个百分点时加快
+    'far_margin': 20.0               # 距阈值大于20个百分点且平稳时放慢
+}
+
+# cgroup v2 内存预算与主动回收（Linux）
+CGROUP_CONFIG = {
+    'enabled': False,
+    'root': '/sys/fs/cgroup',
+    'budgets_mb': {},                # 相对路径 -> 预算MB，例如 {'user.slice': 8192}；0 表示使用 memory.high / memory.max
+    'reclaim_step_mb': 256,          # 每次写入 memory.reclaim 的最大数量
+    'reclaim_timeout': 2.0,          # 一次回收请求的总耗时上限（秒）
+    'retry_interval': 30.0,          # 回收不足后多少秒内不再对同一个 cgroup 重试
+    'margin_mb': 64                  # 超预算时额外回收的余量
+}
+
+# 分级回收配置：按顺序执行，内存降到阈值以下后跳过其余级别
+LADDER_CONFIG = {
+    'tiers': ['reclaim', 'demote', 'pause', 'terminate'],  # 去掉 pause 即不暂停进程
+    'settle_seconds': 0.5,           # 降级 / 暂停后等待内核回收再测量的时间
+    'demote_nice': 10,               # 后台进程降级后的 nice 值
+    'demote_oom_score_adj': 500,     # 降级后的 oom_score_adj（内存耗尽时内核优先结束）
+    'pause_method': 'auto',          # auto：进程独占 cgroup 时用 freezer，否则 SIGSTOP；freezer / signal
+    'max_pause_seconds': 300.0,      # 暂停超过该时间自动恢复
+    'resume_margin': 5.0             # 内存降到阈值以下该百分点后恢复暂停 / 降级的进程
+}
+
+# 清理对象的选择：按需要释放的内存量求代价最小的一组进程 / 应用
+SELECTION_CONFIG = {
+    'hysteresis_percent': 5.0,       # 目标是降到阈值以下该百分点，避免清理后很快又超过阈值
+    'pool_size': 20,                 # 过滤白名单后最多评估多少个候选（需要读取 PSS / USS）
+    'weights': {                     # 代价 = base + 各项 × 权重
+        'base': 1.0,                 # 每结束一个应用 / 进程的固定代价（倾向于少结束几个）
+        'activity': 2.0,             # 最近活跃（刚刚占用过 CPU 为 1，按空闲时间衰减）
+        'restart': 1.0,              # 重启代价（运行时间越长、进程越多，丢失的状态越多）
+        'priority': 1.0              # 用户指定的优先级（priorities）
+    },
+    'idle_halflife': 300.0,          # 活跃度的半衰期（秒）：空闲 5 分钟活跃度减半
+    'restart_horizon': 3600.0,       # 运行超过该时间（秒）的重启代价记满
+    'priorities': {},                # 进程名 -> 优先级（越大越不愿意结束），例如 {'code.exe': 2.0}
+    'active_cpu_percent': 1.0,       # CPU 占用达到该值视为活跃
+    'solver_time_ms': 50.0,          # 精确求解（动态规划）的时间上限，超时改用贪心
+    'resolution': 256                # 动态规划把需要释放的内存量划分为多少份
+}
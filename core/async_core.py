@@ -0,0 +1,186 @@
+# asyncio 监控核心
+"""
+一个事件循环线程承载采样、调度决策、日志写入和指标导出等协程，代替各自 sleep 的线程
+
+- AsyncCore: 在后台线程中运行事件循环；阻塞调用（psutil、/proc 遍历、清理、PSI 等待）
+  通过 run_blocking() 交给有界线程池，不会卡住事件循环
+- Broadcaster: 发布 / 订阅。每个订阅者一个有界队列，满时丢弃最旧的数据，
+  慢订阅者只会丢掉自己的数据，不会拖慢采样和其他订阅者
+- 同步回调（Tk 界面、add_update_callback 注册的函数）通过 add_callback() 桥接：
+  在线程池中调用，线程安全由回调自己保证（界面使用 LatestValueMailbox）
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, List, Optional
+
+DEFAULT_QUEUE_SIZE = 16
+
+
+def create_core(config) -> Optional['AsyncCore']:
+    """按配置（ConfigManager）创建监控核心，monitor.loop 不是 asyncio 时返回 None"""
+    if config.get('monitor.loop', 'asyncio') != 'asyncio':
+        return None
+    return AsyncCore(max_workers=config.get('monitor.async_workers', 4),
+                     queue_size=config.get('monitor.subscriber_queue_size', DEFAULT_QUEUE_SIZE))
+
+
+class AsyncCore:
+    """
+    事件循环线程 + 有界线程池
+    max_workers: 阻塞调用的并发上限（托管模式的压力等待会长期占用一个）
+    queue_size: 订阅者队列的默认长度
+    """
+
+    def __init__(self, max_workers: int = 4, queue_size: int = DEFAULT_QUEUE_SIZE, name: str = "MemwatchLoop"):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self.name = name
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> 'AsyncCore':
+        if self.running:
+            return self
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{self.name}-io")
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.set_default_executor(self.executor)
+        self.loop = loop
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            # 取消残留任务并让它们处理 CancelledError
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.close()
+
+    def stop(self, timeout: float = 5.0):
+        if not self.running:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self._thread = None
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def in_loop(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    # ---------- 在事件循环中执行 ----------
+
+    def run_blocking(self, func: Callable, *args) -> Awaitable:
+        """在有界线程池中执行阻塞调用（只能在事件循环中 await）"""
+        return self.loop.run_in_executor(self.executor, func, *args)
+
+    def spawn(self, coro):
+        """从任意线程提交协程，返回 concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, func: Callable, *args, timeout: Optional[float] = 5.0) -> Any:
+        """在事件循环线程中执行普通函数并等待结果（用于操作 asyncio 对象）"""
+        if self.in_loop():
+            return func(*args)
+
+        async def invoke():
+            return func(*args)
+        return self.spawn(invoke()).result(timeout)
+
+
+class Subscription:
+    """订阅者的有界队列（只能在事件循环线程中使用）"""
+
+    def __init__(self, broadcaster: 'Broadcaster', maxsize: int, name: str):
+        self.broadcaster = broadcaster
+        self.name = name
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0        # 因队列满被丢弃的数量
+        self.task: Optional[asyncio.Task] = None
+
+    def offer(self, item):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(item)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broadcaster._remove(self)
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+
+class Broadcaster:
+    """把每个数据点分发给所有订阅者（publish / subscribe 都在事件循环线程中调用）"""
+
+    def __init__(self, core: AsyncCore, queue_size: Optional[int] = None):
+        self.core = core
+        self.queue_size = queue_size or core.queue_size
+        self._subscriptions: List[Subscription] = []
+
+    def publish(self, item):
+        for subscription in self._subscriptions:
+            subscription.offer(item)
+
+    def subscribe(self, name: str = '', maxsize: Optional[int] = None) -> Subscription:
+        """返回订阅队列，可以 async for 逐个取出"""
+        subscription = Subscription(self, maxsize or self.queue_size, name)
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def add_subscriber(self, handler: Callable[[Any], Awaitable], name: str = '',
+                       maxsize: Optional[int] = None) -> Subscription:
+        """注册异步订阅者：独立任务从自己的队列中取数据并 await handler(item)"""
+        subscription = self.subscribe(name, maxsize)
+
+        async def consume():
+            async for item in subscription:
+                try:
+                    await handler(item)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"⚠️ 订阅者 {name or handler} 处理失败: {e}")
+
+        subscription.task = self.core.loop.create_task(consume())
+        return subscription
+
+    def add_callback(self, callback: Callable[[Any], None], name: str = '',
+                     maxsize: Optional[int] = None) -> Subscription:
+        """注册同步回调：在线程池中调用，不阻塞事件循环"""
+        async def handler(item):
+            await self.core.run_blocking(callback, item)
+        return self.add_subscriber(handler, name or getattr(callback, '__name__', ''), maxsize)
+
+    def _remove(self, subscription: Subscription):
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    def stats(self) -> List[dict]:
+        return [{'name': s.name, 'pending': s.queue.qsize(), 'dropped': s.dropped}
+                for s in self._subscriptions]
@@ -0,0 +1,363 @@
+# cgroup v2 内存监控与主动回收
+"""
+读取一组 cgroup（systemd slice、容器）的 memory.current / memory.stat / memory.pressure，
+按各自的预算判断是否超出，并通过 memory.reclaim 让内核主动回收冷的匿名页和页缓存
+
+- 回收不终止任何进程：清理器在终止进程前先回收，调度器在每次检查时把超预算的 cgroup 压回预算以下
+- 预算为 0 时使用 cgroup 自己的 memory.high（未设置则用 memory.max），都未设置时只监控不回收
+- 大的回收请求按 reclaim_step 分段写入，总耗时不超过 reclaim_timeout；
+  内核回收不到请求的数量（EAGAIN）时停止；实际释放不足请求的一半时，
+  retry_interval 内不再对该 cgroup 重试
+- root 可以指向一个伪造的 cgroupfs 目录树（只需包含对应的文件），便于在非 Linux 环境调试
+
+用法:
+    python -m core.cgroup status
+    python -m core.cgroup --root /tmp/fake-cgroup reclaim user.slice 512
+"""
+import errno
+import os
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+MB = 1024 * 1024
+
+
+class CgroupMemory(NamedTuple):
+    """一个 cgroup 某一时刻的内存状态（字节）"""
+    path: str                   # 相对 cgroup 根目录的路径，'' 为根
+    current: int                # memory.current
+    high: Optional[int]         # memory.high，未设置（max）为 None
+    max: Optional[int]          # memory.max，未设置（max）为 None
+    budget: Optional[int]       # 生效的预算，None 表示只监控
+    anon: int
+    file: int
+    inactive_anon: int
+    inactive_file: int
+    pressure_some: float        # memory.pressure 的 some avg10（%）
+    pressure_full: float        # memory.pressure 的 full avg10（%）
+
+    @property
+    def excess(self) -> int:
+        """超出预算的字节数"""
+        if self.budget is None:
+            return 0
+        return max(0, self.current - self.budget)
+
+    @property
+    def reclaimable(self) -> int:
+        """估算可回收的冷内存：不活跃的页缓存和匿名页"""
+        return self.inactive_file + self.inactive_anon
+
+    def to_dict(self) -> Dict:
+        return {
+            'path': self.path or '/',
+            'current_mb': round(self.current / MB, 1),
+            'budget_mb': round(self.budget / MB, 1) if self.budget is not None else None,
+            'excess_mb': round(self.excess / MB, 1),
+            'reclaimable_mb': round(self.reclaimable / MB, 1),
+            'pressure_some': self.pressure_some,
+            'pressure_full': self.pressure_full,
+        }
+
+
+def _read_text(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _parse_limit(text: Optional[str]) -> Optional[int]:
+    """memory.high / memory.max：'max' 或不存在为 None"""
+    if text is None:
+        return None
+    text = text.strip()
+    if not text or text == 'max':
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        return None
+
+
+def parse_stat(text: Optional[str]) -> Dict[str, int]:
+    """memory.stat：每行 '键 值'"""
+    result = {}
+    for line in (text or '').splitlines():
+        parts = line.split()
+        if len(parts) == 2:
+            try:
+                result[parts[0]] = int(parts[1])
+            except ValueError:
+                pass
+    return result
+
+
+def parse_pressure(text: Optional[str]) -> Dict[str, Dict[str, float]]:
+    """memory.pressure：'some avg10=0.00 avg60=0.00 avg300=0.00 total=0'"""
+    result = {}
+    for line in (text or '').splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        values = {}
+        for item in parts[1:]:
+            key, _, value = item.partition('=')
+            try:
+                values[key] = float(value)
+            except ValueError:
+                pass
+        result[parts[0]] = values
+    return result
+
+
+class CgroupReclaimer:
+    """
+    cgroup 内存监控与回收
+    root: cgroup v2 挂载点（可以是伪造的目录树）
+    budgets: 相对路径 -> 预算（字节），0 / None 表示使用 cgroup 自己的 memory.high / memory.max
+    reclaim_step: 每次写入 memory.reclaim 的最大字节数
+    reclaim_timeout: 一次回收请求的总耗时上限（秒）
+    retry_interval: 回收失败或回收不足后，多少秒内不再对同一个 cgroup 重试
+    margin: 超预算时额外回收的字节数，回收后留出余量，避免刚回收完又超出
+    """
+
+    def __init__(self, root: str = CGROUP_ROOT, budgets: Optional[Dict[str, Optional[int]]] = None,
+                 reclaim_step: int = 256 * MB, reclaim_timeout: float = 2.0,
+                 retry_interval: float = 30.0, margin: int = 64 * MB):
+        self.root = root
+        self.budgets = dict(budgets or {})
+        self.reclaim_step = reclaim_step
+        self.reclaim_timeout = reclaim_timeout
+        self.retry_interval = retry_interval
+        self.margin = margin
+
+        self.reclaimed_total = 0        # 累计回收的字节数
+        self.reclaim_count = 0
+        self._backoff: Dict[str, float] = {}    # 路径 -> 在此时间（monotonic）之前不重试
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """root 是否为 cgroup v2 层级（根目录有 cgroup.controllers）"""
+        return os.path.exists(os.path.join(self.root, 'cgroup.controllers'))
+
+    def _file(self, path: str, name: str) -> str:
+        return os.path.join(self.root, path.strip('/'), name)
+
+    # ---------- 读取 ----------
+
+    def read(self, path: str) -> Optional[CgroupMemory]:
+        """读取一个 cgroup 的内存状态，cgroup 不存在或没有开启 memory 控制器时返回 None"""
+        current = _read_text(self._file(path, 'memory.current'))
+        if current is None:
+            return None
+        try:
+            current = int(current)
+        except ValueError:
+            return None
+
+        high = _parse_limit(_read_text(self._file(path, 'memory.high')))
+        limit = _parse_limit(_read_text(self._file(path, 'memory.max')))
+        stat = parse_stat(_read_text(self._file(path, 'memory.stat')))
+        pressure = parse_pressure(_read_text(self._file(path, 'memory.pressure')))
+
+        budget = self.budgets.get(path) or None
+        if budget is None:
+            budget = high if high is not None else limit
+
+        return CgroupMemory(
+            path=path,
+            current=current,
+            high=high,
+            max=limit,
+            budget=budget,
+            anon=stat.get('anon', 0),
+            file=stat.get('file', 0),
+            inactive_anon=stat.get('inactive_anon', 0),
+            inactive_file=stat.get('inactive_file', 0),
+            pressure_some=pressure.get('some', {}).get('avg10', 0.0),
+            pressure_full=pressure.get('full', {}).get('avg10', 0.0),
+        )
+
+    def read_all(self) -> List[CgroupMemory]:
+        """读取全部配置的 cgroup（跳过不存在的）"""
+        result = []
+        for path in self.budgets:
+            memory = self.read(path)
+            if memory is not None:
+                result.append(memory)
+        return result
+
+    def over_budget(self) -> List[CgroupMemory]:
+        """超出预算且不在重试冷却期内的 cgroup"""
+        now = time.monotonic()
+        return [memory for memory in self.read_all()
+                if memory.excess > 0 and self._backoff.get(memory.path, 0) <= now]
+
+    # ---------- 回收 ----------
+
+    def reclaim(self, path: str, nbytes: int) -> Dict:
+        """
+        请求内核从该 cgroup 回收 nbytes 字节，返回实际效果
+        freed 按回收前后 memory.current 的差计算（其间新分配的内存会使它偏小）
+        """
+        result = {'path': path or '/', 'requested_mb': round(nbytes / MB, 1), 'freed_mb': 0.0,
+                  'elapsed_ms': 0.0, 'complete': False, 'error': None}
+        before = self.read(path)
+        if before is None:
+            result['error'] = 'cgroup 不存在或未开启 memory 控制器'
+            return result
+
+        target = self._file(path, 'memory.reclaim')
+        start = time.perf_counter()
+        remaining = nbytes
+        with self._lock:
+            try:
+                while remaining > 0:
+                    step = min(remaining, self.reclaim_step)
+                    # 不带 O_CREAT：内核不支持时文件不存在，报 ENOENT 而不是创建普通文件
+                    fd = os.open(target, os.O_WRONLY)
+                    try:
+                        os.write(fd, str(step).encode())
+                    finally:
+                        os.close(fd)
+                    remaining -= step
+                    if time.perf_counter() - start >= self.reclaim_timeout:
+                        break
+                result['complete'] = remaining <= 0
+            except OSError as e:
+                if e.errno == errno.EAGAIN:
+                    # 内核回收不到请求的数量，已回收的部分仍然有效
+                    pass
+                elif e.errno == errno.ENOENT:
+                    result['error'] = '内核不支持 memory.reclaim（需要 5.19 以上）'
+                else:
+                    result['error'] = str(e)
+
+        elapsed = time.perf_counter() - start
+        after = self.read(path)
+        freed = max(0, before.current - after.current) if after is not None else 0
+        result['freed_mb'] = round(freed / MB, 1)
+        result['elapsed_ms'] = round(elapsed * 1000, 2)
+
+        self.reclaimed_total += freed
+        self.reclaim_count += 1
+        if not result['complete'] or freed * 2 < nbytes:
+            # 回收不足（内核回收不到或内存很快又被占用），暂时不再重试
+            self._backoff[path] = time.monotonic() + self.retry_interval
+        return result
+
+    def enforce_budgets(self) -> List[Dict]:
+        """把超预算的 cgroup 回收到预算以下（额外留出 margin）"""
+        return [self.reclaim(memory.path, memory.excess + self.margin) for memory in self.over_budget()]
+
+    def reclaim_for(self, nbytes: int) -> List[Dict]:
+        """
+        为整机腾出 nbytes 字节：按各 cgroup 可回收的冷内存比例分摊
+        没有 memory.stat 数据时平均分摊
+        """
+        now = time.monotonic()
+        groups = [memory for memory in self.read_all() if self._backoff.get(memory.path, 0) <= now]
+        if nbytes <= 0 or not groups:
+            return []
+
+        total = sum(memory.reclaimable for memory in groups)
+        results = []
+        for memory in groups:
+            share = memory.reclaimable / total if total else 1 / len(groups)
+            request = int(nbytes * share)
+            if request > 0:
+                results.append(self.reclaim(memory.path, request))
+        return results
+
+    def info(self) -> Dict:
+        """当前状态，供 get_status / 界面显示"""
+        return {
+            'root': self.root,
+            'available': self.available,
+            'cgroups': [memory.to_dict() for memory in self.read_all()],
+            'reclaimed_mb_total': round(self.reclaimed_total / MB, 1),
+            'reclaim_count': self.reclaim_count,
+        }
+
+
+def create_reclaimer(config) -> Optional[CgroupReclaimer]:
+    """按配置（ConfigManager）创建 cgroup 回收器，未开启或当前系统不是 cgroup v2 时返回 None"""
+    if not config.get('cgroup.enabled', False):
+        return None
+    reclaimer = CgroupReclaimer(
+        root=config.get('cgroup.root', CGROUP_ROOT),
+        budgets={path: int(mb * MB) if mb else None
+                 for path, mb in config.get('cgroup.budgets_mb', {}).items()},
+        reclaim_step=int(config.get('cgroup.reclaim_step_mb', 256) * MB),
+        reclaim_timeout=config.get('cgroup.reclaim_timeout', 2.0),
+        retry_interval=config.get('cgroup.retry_interval', 30.0),
+        margin=int(config.get('cgroup.margin_mb', 64) * MB)
+    )
+    if not reclaimer.available:
+        print(f"⚠️ {reclaimer.root} 不是 cgroup v2 层级，cgroup 回收未启用")
+        return None
+    return reclaimer
+
+
+_reclaimer: Optional[CgroupReclaimer] = None
+_reclaimer_created = False
+
+
+def get_reclaimer() -> Optional[CgroupReclaimer]:
+    """获取全局 cgroup 回收器（首次调用时按用户配置创建，未开启时为 None）"""
+    global _reclaimer, _reclaimer_created
+    if not _reclaimer_created:
+        from config.config_manager import config_manager
+        _reclaimer = create_reclaimer(config_manager)
+        _reclaimer_created = True
+    return _reclaimer
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="cgroup v2 内存状态与主动回收")
+    parser.add_argument('--root', default=CGROUP_ROOT, help="cgroup v2 挂载点（可以是伪造的目录树）")
+    sub = parser.add_subparsers(dest='command', required=True)
+    status = sub.add_parser('status', help="显示 cgroup 内存状态")
+    status.add_argument('paths', nargs='*', help="相对路径，默认列出根目录下的全部子 cgroup")
+    reclaim = sub.add_parser('reclaim', help="从 cgroup 回收内存")
+    reclaim.add_argument('path')
+    reclaim.add_argument('mb', type=float)
+    args = parser.parse_args(argv)
+
+    paths = getattr(args, 'paths', None) or []
+    if args.command == 'status' and not paths:
+        try:
+            paths = sorted(name for name in os.listdir(args.root)
+                           if os.path.isdir(os.path.join(args.root, name)))
+        except OSError as e:
+            print(f"❌ 无法读取 {args.root}: {e}")
+            return 1
+    reclaimer = CgroupReclaimer(args.root, {path: None for path in paths})
+
+    if args.command == 'status':
+        print(f"{'cgroup':<32}{'当前MB':>10}{'预算MB':>10}{'超出MB':>10}{'可回收MB':>10}{'压力%':>8}")
+        for memory in reclaimer.read_all():
+            d = memory.to_dict()
+            budget = f"{d['budget_mb']:.0f}" if d['budget_mb'] is not None else '-'
+            print(f"{d['path']:<32}{d['current_mb']:>10.0f}{budget:>10}{d['excess_mb']:>10.0f}"
+                  f"{d['reclaimable_mb']:>10.0f}{d['pressure_some']:>8.2f}")
+        return 0
+
+    result = reclaimer.reclaim(args.path, int(args.mb * MB))
+    if result['error']:
+        print(f"❌ 回收失败: {result['error']}")
+        return 1
+    print(f"♻️ {result['path']}: 请求 {result['requested_mb']:.0f} MB，实际释放 {result['freed_mb']:.1f} MB，"
+          f"耗时 {result['elapsed_ms']:.1f} ms{'' if result['complete'] else '（未全部回收）'}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
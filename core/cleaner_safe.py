@@ -1,177 +1,499 @@
-import psutil
-import time
 import gc
-import subprocess
-from typing import List, Dict, Tuple
-from config.default_config import (
-    SYSTEM_CRITICAL, OFFICE_WHITELIST, GAME_WHITELIST, 
-    MEMORY_THRESHOLD, SAFE_CLEANUP_CONFIG
-)
+import os
+import threading
+from typing import Callable, List, Dict, Set, Tuple, Optional
+
+import psutil
+
+from config.default_config import MEMORY_THRESHOLD, SAFE_CLEANUP_CONFIG
+from config.config_manager import config_manager
+from core import instrumentation
+from core.cgroup import CgroupReclaimer, get_reclaimer
+from core.footprint import FootprintSampler, get_footprint_sampler
+from core.ladder import (ProcessThrottle, ReclamationLadder, get_throttle, TIERS, TIER_NAMES,
+                         TIER_RECLAIM, TIER_DEMOTE, TIER_PAUSE, TIER_TERMINATE)
+from core.matcher import get_whitelist_matcher
+from core.snapshot import ProcessSnapshot, get_snapshot_engine
+from core.topk import KEY_MEMORY
+from core.terminator import TerminationPipeline, OUTCOME_EXITED, OUTCOME_TIMEOUT
+from core.victims import VictimSelector, create_selector
+
+# gentle_cleanup 额外发出的进度事件（其余事件与终止流水线一致）
+EVENT_CANDIDATE = 'candidate'    # 找到可清理的候选进程
+EVENT_FREED = 'freed'            # 进程退出，累计释放的内存
+EVENT_TIER = 'tier'              # 分级回收的一级执行完毕（释放的内存和耗时）
+EVENT_PLAN = 'plan'              # 清理对象的选择计划（发送任何信号之前）
+
+# 清理结束后的结果回调（指标导出等），在执行清理的线程中调用
+_cleanup_listeners: List[Callable[[Dict], None]] = []
+
+def add_cleanup_listener(callback: Callable[[Dict], None]):
+    """注册清理结果回调，参数为 gentle_cleanup 返回的结果字典"""
+    if callback not in _cleanup_listeners:
+        _cleanup_listeners.append(callback)
+
+def remove_cleanup_listener(callback: Callable[[Dict], None]):
+    if callback in _cleanup_listeners:
+        _cleanup_listeners.remove(callback)
+
+def _notify_cleanup(result: Dict):
+    for callback in _cleanup_listeners.copy():
+        try:
+            callback(result)
+        except Exception as e:
+            print(f"⚠️ 清理结果回调执行失败: {e}")
+
+def _has_name(record) -> bool:
+    return bool(record.name)
+
+def _own_tree() -> Set[int]:
+    """memwatch 自身、它的祖先（启动它的终端 / IDE）和子进程，任何情况下都不作为清理对象"""
+    pids = {os.getpid()}
+    try:
+        me = psutil.Process()
+        pids.update(parent.pid for parent in me.parents())
+        pids.update(child.pid for child in me.children(recursive=True))
+    except psutil.Error:
+        pass
+    return pids
+
+def _throttled(outcomes: List[Dict]) -> Dict:
+    """降级 / 暂停级别的细节：成功处理的进程数"""
+    return {'processes': sum(1 for outcome in outcomes if outcome['ok'])}
 
 class SafeMemoryCleaner:
-    def __init__(self):
+    def __init__(self, snapshot_engine=None, terminator: Optional[TerminationPipeline] = None,
+                 reclaimer: Optional[CgroupReclaimer] = None, throttle: Optional[ProcessThrottle] = None,
+                 footprint: Optional[FootprintSampler] = None, tiers: Optional[List[str]] = None,
+                 selector: Optional[VictimSelector] = None):
+        """
+        snapshot_engine: 共享的进程快照引擎（默认使用全局引擎）
+        terminator: 自定义终止流水线，为空时按配置创建（并在每次清理前同步配置）
+        reclaimer: cgroup 回收器，默认按配置创建（未开启时为 None，不做 cgroup 回收）
+        throttle: 降级 / 暂停控制器，默认使用全局控制器（暂停的进程由调度器在内存恢复后恢复）
+        footprint: 候选进程的 PSS / USS 采样器，默认使用全局采样器（共享缓存）
+        tiers: 分级回收的级别，为空时按配置 ladder.tiers
+        selector: 清理对象选择器，为空时每次清理按配置 selection.* 创建
+        """
         self.cleaned_processes = []
         self.skip_count = 0
+        self.snapshot_engine = snapshot_engine or get_snapshot_engine()
+
+        # 清理参数从用户配置读取（编译为访问器，配置文件热更新后下次清理即生效）
+        self._thresholds = {mode: config_manager.accessor(f'thresholds.{mode}', value)
+                            for mode, value in MEMORY_THRESHOLD.items()}
+        self._cleanup_config = {key: config_manager.accessor(f'cleanup.{key}', value)
+                                for key, value in SAFE_CLEANUP_CONFIG.items()}
+
+        self.reclaimer = reclaimer if reclaimer is not None else get_reclaimer()
+        self.throttle = throttle or get_throttle()
+        self.footprint = footprint or get_footprint_sampler()
+        self.selector = selector
+        self._pool_size = config_manager.accessor('selection.pool_size', 20)
+        self._tiers = (lambda: tiers) if tiers is not None else config_manager.accessor('ladder.tiers', list(TIERS))
+        self._settle = config_manager.accessor('ladder.settle_seconds', 0.5)
+
+        self._configure_terminator = terminator is None
+        self.terminator = terminator or TerminationPipeline(
+            deadline=self._cleanup_config['terminate_deadline'](),
+            max_terms_per_second=self._cleanup_config['max_terms_per_second']()
+        )
         
+    @instrumentation.timed('cleaner.match')
     def is_process_safe_to_clean(self, process_name: str, mode: str) -> bool:
         """
         判断进程是否可以安全清理
+        系统关键进程和当前模式白名单中的进程不清理，规则由编译后的匹配器统一判定
         """
-        process_name_lower = process_name.lower()
-        
-        # 1. 系统关键进程绝不清理
-        if any(critical.lower() in process_name_lower for critical in SYSTEM_CRITICAL):
-            return False
-            
-        # 2. 根据模式检查白名单
-        whitelist = OFFICE_WHITELIST if mode == 'office' else GAME_WHITELIST
-        if any(white.lower() in process_name_lower for white in whitelist):
-            return False
-            
-        return True
+        whitelist_mode = 'office' if mode == 'office' else 'game'
+        return get_whitelist_matcher().is_safe_to_clean(process_name, whitelist_mode)
     
-    def get_memory_hogs(self, min_memory_mb: float = 100) -> List[Dict]:
+    @instrumentation.timed('cleaner.memory_hogs')
+    def get_memory_hogs(self, min_memory_mb: float = 100,
+                        snapshot: Optional[ProcessSnapshot] = None,
+                        limit: Optional[int] = None) -> List[Dict]:
         """
         获取内存占用大户（但不包括关键进程）
+        snapshot: 复用已有的进程快照，为空时从共享引擎获取
+        limit: 最多返回多少个，按内存从大到小
         """
-        memory_hogs = []
-        
-        for proc in psutil.process_iter(['pid', 'name', 'memory_info', 'cpu_percent']):
-            try:
-                pinfo = proc.info
-                if not pinfo['name']:
-                    continue
-                    
-                # 计算内存使用（MB）
-                memory_mb = pinfo['memory_info'].rss / 1024 / 1024
-                
-                if memory_mb > min_memory_mb:
-                    memory_hogs.append({
-                        'pid': pinfo['pid'],
-                        'name': pinfo['name'],
-                        'memory_mb': memory_mb,
-                        'cpu_percent': pinfo['cpu_percent'] or 0
-                    })
-                    
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                continue
-                
-        # 按内存使用排序
-        return sorted(memory_hogs, key=lambda x: x['memory_mb'], reverse=True)
+        if snapshot is None:
+            snapshot = self.snapshot_engine.get_snapshot()
+
+        min_rss = min_memory_mb * 1024 * 1024
+        tracker = self.snapshot_engine.top_k
+
+        if tracker.generation >= snapshot.generation:
+            # 增量索引已是最新，直接按内存从大到小取
+            records = tracker.top(limit, KEY_MEMORY, minimum=min_rss, predicate=_has_name)
+        else:
+            records = sorted((p for p in snapshot.processes if p.name and p.rss > min_rss),
+                             key=lambda p: p.rss, reverse=True)[:limit]
+
+        return [{
+            'pid': record.pid,
+            'name': record.name,
+            'memory_mb': record.rss / 1024 / 1024,    # 计算内存使用（MB）
+            'cpu_percent': record.cpu_percent,
+            'create_time': record.create_time
+        } for record in records]
     
-    def gentle_cleanup(self, mode: str = 'office') -> Dict:
+    @instrumentation.timed('cleaner.memory_hog_groups')
+    def get_memory_hog_groups(self, min_memory_mb: float = 100, limit: Optional[int] = None) -> List[Dict]:
+        """
+        按应用组（进程树）获取内存占用大户：组内全部进程的 RSS 之和超过 min_memory_mb
+        每个组附带成员列表（与 get_memory_hogs 的字典格式相同，根进程在前）
+        """
+        self.snapshot_engine.get_snapshot()
+        index = self.snapshot_engine.groups
+        groups = []
+        for summary in index.top(limit, minimum=min_memory_mb * 1024 * 1024):
+            members = [{
+                'pid': record.pid,
+                'name': record.name,
+                'memory_mb': record.rss / 1024 / 1024,
+                'cpu_percent': record.cpu_percent,
+                'create_time': record.create_time
+            } for record in index.members(summary.root)]
+            groups.append({
+                'pid': summary.root,
+                'name': summary.name,
+                'memory_mb': summary.rss / 1024 / 1024,
+                'cpu_percent': summary.cpu_percent,
+                'create_time': summary.create_time,
+                'process_count': summary.process_count,
+                'names': sorted(summary.names),
+                'members': members
+            })
+        return groups
+
+    def is_group_safe_to_clean(self, group: Dict, mode: str) -> bool:
+        """整棵应用树的白名单判定：任何一个成员受保护，整个应用都不清理"""
+        return self._group_protected_by(group, mode) is None
+
+    def _group_protected_by(self, group: Dict, mode: str) -> Optional[str]:
+        whitelist_mode = 'office' if mode == 'office' else 'game'
+        return get_whitelist_matcher().tree_protected_by(group['names'], whitelist_mode)
+
+    def _candidate_processes(self, mode: str, pool_size: int, result: Dict, excluded: List[Dict]) -> List[Dict]:
+        """按单个进程收集候选：过滤白名单后取 RSS 最大的 pool_size 个，读取 PSS / USS，按 USS 估算释放量"""
+        memory_hogs = self.get_memory_hogs(self._cleanup_config['memory_limit_mb']())
+        own = _own_tree()
+        safe = []
+
+        for proc_info in memory_hogs:
+            if proc_info['pid'] in own:
+                excluded.append({'pid': proc_info['pid'], 'name': proc_info['name'],
+                                 'memory_mb': round(proc_info['memory_mb'], 1), 'reason': "memwatch 自身所在的进程树"})
+                continue
+            if not self.is_process_safe_to_clean(proc_info['name'], mode):
+                self._count_skip(result)
+                excluded.append({'pid': proc_info['pid'], 'name': proc_info['name'],
+                                 'memory_mb': round(proc_info['memory_mb'], 1), 'reason': "白名单"})
+                continue
+
+            safe.append(proc_info)
+            if len(safe) >= pool_size:
+                break
+
+        # 只对排名靠前的候选进程读取 PSS / USS（开销较大）
+        with instrumentation.timer('cleaner.footprint'):
+            candidates = self.footprint.annotate(safe)
+        for proc_info in candidates:
+            proc_info['estimate_mb'] = proc_info['uss_mb']
+        return candidates
+
+    def _candidate_groups(self, mode: str, pool_size: int, result: Dict, excluded: List[Dict]) -> List[Dict]:
+        """
+        按应用组收集候选：整棵树过滤白名单，读取成员的 PSS，按 PSS 之和估算释放量
+        结束整个应用时组内共享的页面也一起回收，成员的释放量按 PSS 估算
+        """
+        groups = self.get_memory_hog_groups(self._cleanup_config['memory_limit_mb']())
+        own = _own_tree()
+        safe = []
+
+        for group in groups:
+            if any(member['pid'] in own for member in group['members']):
+                excluded.append({'pid': group['pid'], 'name': group['name'],
+                                 'memory_mb': round(group['memory_mb'], 1), 'reason': "memwatch 自身所在的应用"})
+                continue
+            protected = self._group_protected_by(group, mode)
+            if protected is not None:
+                self._count_skip(result)
+                excluded.append({'pid': group['pid'], 'name': group['name'],
+                                 'memory_mb': round(group['memory_mb'], 1), 'reason': f"白名单成员 {protected}"})
+                continue
+
+            safe.append(group)
+            if len(safe) >= pool_size:
+                break
+
+        with instrumentation.timer('cleaner.footprint'):
+            self.footprint.annotate([member for group in safe for member in group['members']])
+        for group in safe:
+            for member in group['members']:
+                member['estimate_mb'] = member['pss_mb']
+            group['pss_mb'] = group['estimate_mb'] = sum(member['pss_mb'] for member in group['members'])
+            group['uss_mb'] = sum(member['uss_mb'] for member in group['members'])
+        safe.sort(key=lambda group: group['estimate_mb'], reverse=True)
+        return safe
+
+    def _count_skip(self, result: Dict):
+        self.skip_count += 1
+        result['skipped'] += 1
+        instrumentation.count('cleaner.skipped')
+
+    @instrumentation.timed('cleaner.cleanup')
+    def gentle_cleanup(self, mode: str = 'office', cancel: Optional[threading.Event] = None,
+                       on_event: Optional[Callable[[str, Dict], None]] = None,
+                       threshold: Optional[float] = None) -> Dict:
         """
         温和地清理内存，使用多种安全策略
+        cancel: 取消标志，置位后尽快结束（已发送 TERM 的进程不再等待）
+        on_event: 进度回调 (事件名, 数据)，用于在界面上实时显示清理进度
+        threshold: 覆盖当前模式的阈值（%），趋势预测提前清理时传入更低的目标
         """
+        initial = self.snapshot_engine.memory()
         result = {
-            'initial_memory': psutil.virtual_memory().percent,
+            'initial_memory': initial.percent,
             'cleaned_processes': [],
-            'memory_freed_mb': 0,
+            'memory_freed_mb': 0,           # 按 USS 估算（结束进程后确定能回收的内存），按应用组清理时按 PSS
+            'memory_freed_rss_mb': 0,       # 按 RSS 估算（含共享页面，偏高），用于对比
             'final_memory': 0,
-            'method_used': []
+            'method_used': [],
+            'skipped': 0,
+            'reclaimed_mb': 0,
+            'cancelled': False
         }
+
+        def emit(event: str, data: Dict):
+            if on_event is not None:
+                on_event(event, data)
+
+        def cancelled() -> bool:
+            if cancel is not None and cancel.is_set():
+                result['cancelled'] = True
+                return True
+            return False
+
+        estimates: Dict[int, Dict] = {}
+
+        def on_termination(event: str, outcome: Dict):
+            self._report_termination(event, outcome)
+            emit(event, outcome)
+            if event == OUTCOME_EXITED:
+                freed = estimates.get(outcome['pid'], {}).get('estimate_mb', outcome['memory_mb'])
+                result['memory_freed_mb'] += freed
+                result['memory_freed_rss_mb'] += outcome['memory_mb']
+                emit(EVENT_FREED, {'name': outcome['name'],
+                                   'memory_mb': freed,
+                                   'total_mb': result['memory_freed_mb']})
         
+        instrumentation.count('cleaner.runs')
         print(f"🧹 开始安全内存清理 - {mode.upper()} 模式")
         print(f"📊 初始内存使用: {result['initial_memory']:.1f}%")
         
         # 1. 首先执行Python垃圾回收
         print("🔄 执行垃圾回收...")
-        collected = gc.collect()
+        with instrumentation.timer('cleaner.gc'):
+            collected = gc.collect()
         if collected > 0:
             result['method_used'].append(f'垃圾回收清理了{collected}个对象')
         
-        # 2. 检查是否需要进程清理
-        threshold = MEMORY_THRESHOLD.get(mode, 75.0)
-        current_memory = psutil.virtual_memory().percent
+        if threshold is None:
+            accessor = self._thresholds.get(mode)
+            threshold = accessor() if accessor is not None else 75.0
+
+        # 2. 超出预算的 cgroup 不论整机内存如何都先压回预算以下（只回收冷内存）
+        if self.reclaimer is not None and not cancelled():
+            self._record_reclaim(result, self.reclaimer.enforce_budgets())
+
+        # 3. 检查是否需要进一步回收
+        current_memory = self.snapshot_engine.memory().percent
         
         if current_memory < threshold:
             print(f"✅ 内存使用率 {current_memory:.1f}% 低于阈值 {threshold}%，无需清理")
             result['final_memory'] = current_memory
+            self._compare_available(result, initial)
+            _notify_cleanup(result)
             return result
         
-        # 3. 获取内存占用大户
-        memory_hogs = self.get_memory_hogs(SAFE_CLEANUP_CONFIG['memory_limit_mb'])
-        
-        cleaned_count = 0
-        max_clean = SAFE_CLEANUP_CONFIG['max_processes_per_batch']
-        
-        for proc_info in memory_hogs[:max_clean * 2]:  # 检查更多，但只清理限定数量
-            if cleaned_count >= max_clean:
-                break
-                
-            if not self.is_process_safe_to_clean(proc_info['name'], mode):
-                self.skip_count += 1
-                continue
-            
-            # 4. 尝试温和地请求进程退出
-            success = self._gentle_terminate_process(proc_info)
-            if success:
-                result['cleaned_processes'].append({
-                    'name': proc_info['name'],
-                    'memory_mb': proc_info['memory_mb']
-                })
-                result['memory_freed_mb'] += proc_info['memory_mb']
-                cleaned_count += 1
-                
-                # 清理间隔
-                time.sleep(SAFE_CLEANUP_CONFIG['cleanup_interval'])
-        
-        # 5. 执行系统内存优化命令（安全）
-        self._optimize_system_memory()
-        result['method_used'].append('系统内存优化')
-        
-        result['final_memory'] = psutil.virtual_memory().percent
+        # 4. 收集内存占用大户（按应用组或单个进程），按需要释放的内存量选出代价最小的一组
+        max_clean = self._cleanup_config['max_processes_per_batch']()
+        excluded: List[Dict] = []
+        group_by_app = self._cleanup_config['group_by']() == 'app'
+        if group_by_app:
+            pool = self._candidate_groups(mode, self._pool_size(), result, excluded)
+        else:
+            pool = self._candidate_processes(mode, self._pool_size(), result, excluded)
+
+        selector = self.selector or create_selector(config_manager, activity=self.snapshot_engine.activity)
+        plan = selector.plan(pool, self.snapshot_engine.memory(), threshold, max_clean, excluded)
+        result['plan'] = plan.to_dict()
+        for line in plan.explain():
+            print(f"🧮 {line}")
+        emit(EVENT_PLAN, result['plan'])
+
+        chosen = {entry['pid'] for entry in plan.selected}
+        candidates = [unit for unit in pool if unit['pid'] in chosen]
+        if group_by_app:
+            # 降级、暂停、终止都作用于组内全部进程
+            targets = [member for group in candidates for member in group['members']]
+            result['groups'] = [{key: group[key] for key in ('name', 'process_count', 'memory_mb', 'pss_mb')}
+                                for group in candidates]
+        else:
+            targets = candidates
+        for proc_info in targets:
+            estimates[proc_info['pid']] = proc_info
+        for proc_info in candidates:
+            emit(EVENT_CANDIDATE, proc_info)
+
+        # 5. 分级回收：回收缓存 -> 降低优先级 -> 暂停 -> 终止，达到阈值以下即停止
+        def terminate() -> Dict:
+            # 整批温和地请求进程退出，共享同一个等待期限
+            if self._configure_terminator:
+                self.terminator.deadline = self._cleanup_config['terminate_deadline']()
+                self.terminator.max_terms_per_second = self._cleanup_config['max_terms_per_second']()
+            if not targets:
+                return {'processes': 0}
+            # 被暂停的进程先恢复，才能处理 TERM 信号
+            self.throttle.resume([proc_info['pid'] for proc_info in targets])
+            with instrumentation.timer('cleaner.terminate'):
+                outcomes = self.terminator.run(targets, on_event=on_termination, cancel=cancel)
+            result['termination'] = outcomes
+
+            for outcome in outcomes:
+                if outcome['outcome'] == OUTCOME_EXITED:
+                    estimate = estimates.get(outcome['pid'], {})
+                    result['cleaned_processes'].append({
+                        'name': outcome['name'],
+                        'memory_mb': estimate.get('estimate_mb', outcome['memory_mb']),
+                        'rss_mb': outcome['memory_mb'],
+                        'pss_mb': estimate.get('pss_mb', outcome['memory_mb'])
+                    })
+            instrumentation.count('cleaner.terminated', len(result['cleaned_processes']))
+            return {'processes': len(result['cleaned_processes'])}
+
+        actions = {
+            TIER_RECLAIM: lambda: self._reclaim_tier(result, threshold),
+            TIER_DEMOTE: lambda: _throttled(self.throttle.demote(targets)),
+            TIER_PAUSE: lambda: _throttled(self.throttle.pause(targets)),
+            TIER_TERMINATE: terminate,
+        }
+        tiers = [(name, actions[name]) for name in self._tiers() if name in actions]
+
+        def on_tier(entry: Dict):
+            self._report_tier(entry)
+            emit(EVENT_TIER, entry)
+
+        ladder = ReclamationLadder(self.snapshot_engine.memory, settle=self._settle())
+        try:
+            result['tiers'] = ladder.run(tiers, threshold, cancel=cancel, on_tier=on_tier)
+        except BaseException:
+            self._hand_off_throttled(targets, interrupted=True)
+            raise
+        self._hand_off_throttled(targets, interrupted=cancel is not None and cancel.is_set())
+        for entry in result['tiers']:
+            if not entry['skipped']:
+                result['method_used'].append(f"{TIER_NAMES[entry['tier']]}（释放{entry['freed_mb']:.0f}MB，"
+                                             f"{entry['elapsed_ms']:.0f}ms）")
+        cancelled()
         
-        print(f"✅ 清理完成!")
+        result['final_memory'] = self.snapshot_engine.memory().percent
+        self._compare_available(result, initial)
+
+        if result['cancelled']:
+            print("🛑 清理已取消")
+        else:
+            print(f"✅ 清理完成!")
         print(f"📊 最终内存使用: {result['final_memory']:.1f}%")
         print(f"🗑️ 清理了 {len(result['cleaned_processes'])} 个进程")
-        print(f"💾 释放了约 {result['memory_freed_mb']:.1f} MB 内存")
-        
+        print(f"💾 释放了约 {result['memory_freed_mb']:.1f} MB 内存（按 PSS / USS 估算，按 RSS 为 "
+              f"{result['memory_freed_rss_mb']:.1f} MB），可用内存实际增加 {result['available_freed_mb']:.1f} MB")
+        if result['reclaimed_mb']:
+            print(f"♻️ cgroup 回收了 {result['reclaimed_mb']:.1f} MB 内存")
+
+        _notify_cleanup(result)
         return result
     
-    def _gentle_terminate_process(self, proc_info: Dict) -> bool:
+    def _hand_off_throttled(self, targets: List[Dict], interrupted: bool):
         """
-        温和地终止进程：先尝试优雅关闭，再尝试终止
+        没有调度器负责恢复时（界面 / 命令行单次清理），不能让暂停的进程一直停着：
+        取消或出错时立即恢复本次暂停 / 降级的进程，否则交给定时器在 max_pause_seconds 后恢复
         """
-        try:
-            proc = psutil.Process(proc_info['pid'])
-            
-            # 先尝试发送关闭信号（类似Alt+F4）
-            try:
-                proc.terminate()  # 发送TERM信号
-                print(f"📤 已请求关闭: {proc_info['name']} (PID: {proc_info['pid']})")
-                
-                # 等待进程自然退出
-                proc.wait(timeout=3)
-                return True
-                
-            except psutil.TimeoutExpired:
-                # 如果3秒内没有退出，强制杀死（但这里我们选择放弃）
-                print(f"⏰ {proc_info['name']} 未在3秒内响应，跳过强制终止")
-                return False
-                
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            return False
-        except Exception as e:
-            print(f"❌ 清理 {proc_info['name']} 时出错: {e}")
-            return False
-    
-    def _optimize_system_memory(self):
+        if self.throttle.managed:
+            return
+        if not interrupted:
+            self.throttle.expire_later()
+            return
+        pids = [proc_info['pid'] for proc_info in targets]
+        resumed = self.throttle.resume(pids)
+        self.throttle.restore_priority(pids)
+        if resumed:
+            print(f"▶️ 清理已取消，恢复 {resumed} 个暂停的进程")
+
+    def _compare_available(self, result: Dict, initial):
+        """清理前后的可用内存（与 virtual_memory().available 一致）对比，用于检验估算"""
+        final = self.snapshot_engine.memory()
+        result['available_before_mb'] = round(initial.available / 1024 / 1024, 1)
+        result['available_after_mb'] = round(final.available / 1024 / 1024, 1)
+        result['available_freed_mb'] = round((final.available - initial.available) / 1024 / 1024, 1)
+
+    def _reclaim_tier(self, result: Dict, threshold: float) -> Dict:
+        """回收级别：整机超过阈值时，按超出的内存量向各 cgroup 分摊回收冷内存"""
+        if self.reclaimer is None:
+            return {'cgroups': 0}
+        memory = self.snapshot_engine.memory()
+        needed = (memory.percent - threshold) / 100 * memory.total + self.reclaimer.margin
+        reclaims = self.reclaimer.reclaim_for(int(needed))
+        self._record_reclaim(result, reclaims)
+        return {'cgroups': len(reclaims)}
+
+    @instrumentation.timed('cleaner.reclaim')
+    def _record_reclaim(self, result: Dict, reclaims: List[Dict]):
+        """记录并打印 cgroup 回收结果"""
+        if not reclaims:
+            return
+        freed = sum(r['freed_mb'] for r in reclaims)
+        result.setdefault('cgroup_reclaim', []).extend(reclaims)
+        result['reclaimed_mb'] += freed
+        for r in reclaims:
+            if r['error']:
+                print(f"⚠️ cgroup {r['path']} 回收失败: {r['error']}")
+            else:
+                print(f"♻️ cgroup {r['path']} 回收 {r['freed_mb']:.1f} MB（请求 {r['requested_mb']:.0f} MB，"
+                      f"耗时 {r['elapsed_ms']:.1f} ms）")
+
+    def _report_tier(self, entry: Dict):
+        """打印分级回收每一级的效果"""
+        if 'error' in entry:
+            return
+        print(f"🪜 {TIER_NAMES[entry['tier']]}: 释放 {entry['freed_mb']:.1f} MB，耗时 {entry['elapsed_ms']:.0f} ms，"
+              f"内存使用 {entry['memory_percent']:.1f}%")
+
+    @instrumentation.timed('cleaner.terminate_one')
+    def _gentle_terminate_process(self, proc_info: Dict) -> bool:
         """
-        执行安全的系统内存优化命令
+        温和地终止单个进程：发送关闭请求并等待其自然退出，超时不强制终止
         """
-        try:
-            # Windows内存整理命令（安全）
-            subprocess.run(['sfc', '/scannow'], capture_output=True, timeout=10)
-        except:
-            pass  # 忽略错误，不影响主流程
+        outcome = self.terminator.run([proc_info], on_event=self._report_termination)[0]
+        return outcome['outcome'] == OUTCOME_EXITED
+
+    def _report_termination(self, event: str, outcome: Dict):
+        """打印终止流水线的进度"""
+        if event == 'term_sent':
+            print(f"📤 已请求关闭: {outcome['name']} (PID: {outcome['pid']})")
+        elif event == OUTCOME_TIMEOUT:
+            print(f"⏰ {outcome['name']} 未在{self.terminator.deadline:g}秒内响应，跳过强制终止")
+    
 
-def clean_memory(mode='office') -> Dict:
+def clean_memory(mode='office', cancel=None, on_event=None) -> Dict:
     """
     主要的清理接口，保持向后兼容
+    cancel / on_event 见 SafeMemoryCleaner.gentle_cleanup
     """
     cleaner = SafeMemoryCleaner()
-    return cleaner.gentle_cleanup(mode)
+    return cleaner.gentle_cleanup(mode, cancel=cancel, on_event=on_event)
 
 if __name__ == '__main__':
     # 测试代码
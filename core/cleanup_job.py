@@ -0,0 +1,82 @@
+# 后台清理任务
+import queue
+import threading
+from typing import Dict, Optional, Tuple
+
+from core.cleaner_safe import clean_memory
+
+# 任务本身的事件（其余为 gentle_cleanup 的进度事件）
+EVENT_DONE = 'done'        # 清理结束（包括被取消），数据为 gentle_cleanup 的结果
+EVENT_FAILED = 'failed'    # 清理过程抛出异常，数据为 {'error': 错误信息}
+
+
+class CleanupJob:
+    """
+    在后台线程中执行一次清理，界面线程不会被阻塞
+    - 进度事件写入有界队列，队列满时丢弃最旧的事件（最终结果另存于 result）
+    - cancel() 后清理流程在 0.1 秒内结束
+    """
+
+    def __init__(self, mode: str = 'office', queue_size: int = 256):
+        self.mode = mode
+        self.events: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.dropped = 0
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> 'CleanupJob':
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """请求取消（不等待线程结束）"""
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """等待任务结束，返回是否已结束"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        return not self.running
+
+    def poll(self, max_events: int = 100):
+        """取出最多 max_events 个已产生的事件（非阻塞），返回 [(事件名, 数据)]"""
+        events = []
+        while len(events) < max_events:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def _run(self):
+        try:
+            self.result = clean_memory(self.mode, cancel=self._cancel, on_event=self._put)
+            self._put(EVENT_DONE, self.result)
+        except Exception as e:
+            self.error = str(e)
+            print(f"❌ 后台清理失败: {e}")
+            self._put(EVENT_FAILED, {'error': self.error})
+
+    def _put(self, event: str, data: Dict):
+        item: Tuple[str, Dict] = (event, dict(data))
+        while True:
+            try:
+                self.events.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
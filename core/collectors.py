@@ -0,0 +1,365 @@
+# 快照采集后端
+import errno
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import psutil
+
+from core.cpu_accounting import CpuAccountant, CpuUsage
+from core.snapshot import ProcessRecord, SystemMemory
+
+try:
+    import resource
+except ImportError:     # Windows 没有 resource 模块（也不会使用 /proc 后端）
+    resource = None
+
+
+# /proc/[pid]/stat 中的状态字符 -> psutil 状态名
+_PROC_STATUS = {
+    'R': 'running',
+    'S': 'sleeping',
+    'D': 'disk-sleep',
+    'Z': 'zombie',
+    'T': 'stopped',
+    't': 'tracing-stop',
+    'X': 'dead',
+    'x': 'dead',
+    'K': 'wake-kill',
+    'W': 'waking',
+    'P': 'parked',
+    'I': 'idle',
+}
+
+# 进程名被内核截断的长度（TASK_COMM_LEN - 1）
+_COMM_LEN = 15
+
+# 进程描述符缓存最多占用打开文件数软限制的比例，其余留给日志、配置保存、套接字等
+_FD_CACHE_SHARE = 4
+_FD_CACHE_MAX = 1024
+
+
+def default_fd_cache_size() -> int:
+    """进程 stat 描述符缓存的默认上限：不超过 RLIMIT_NOFILE 软限制的 1/4"""
+    if resource is None:
+        return 0
+    try:
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (OSError, ValueError):
+        return 0
+    if soft == resource.RLIM_INFINITY:
+        return _FD_CACHE_MAX
+    return max(0, min(_FD_CACHE_MAX, soft // _FD_CACHE_SHARE))
+
+
+class PsutilCollector:
+    """
+    基于 psutil 的通用采集后端，所有平台可用
+    """
+    name = 'psutil'
+
+    # 一次遍历中采集的全部属性，覆盖监控器、清理器、Top-N 视图的所有需求
+    # CPU 占用由 CpuAccountant 根据 cpu_times 的差值计算
+    PROCESS_ATTRS = ['pid', 'ppid', 'name', 'memory_info', 'cpu_times', 'create_time', 'status']
+
+    def __init__(self):
+        self.cpu = CpuAccountant()
+
+    def memory(self) -> SystemMemory:
+        """只读取系统内存（不遍历进程表）"""
+        vm = psutil.virtual_memory()
+        return SystemMemory(vm.total, vm.available, vm.used, vm.free, vm.percent)
+
+    def collect(self) -> Tuple[SystemMemory, CpuUsage, List[ProcessRecord]]:
+        """遍历一次进程表，返回 (系统内存, 整机 CPU 占用, 进程列表)"""
+        memory = self.memory()
+
+        percpu = [_cpu_times_pair(t) for t in psutil.cpu_times(percpu=True)]
+        total = (sum(t[0] for t in percpu), sum(t[1] for t in percpu))
+        cpu = self.cpu.system([total] + percpu)
+
+        now = time.monotonic()
+        accountant = self.cpu
+        accountant.begin()
+        processes = []
+        for proc in psutil.process_iter(self.PROCESS_ATTRS):
+            try:
+                pinfo = proc.info
+                mem_info = pinfo['memory_info']
+                cpu_times = pinfo['cpu_times']
+                create_time = pinfo['create_time'] or 0.0
+                cpu_percent = None
+                if cpu_times is not None:
+                    cpu_percent = accountant.process(pinfo['pid'], create_time,
+                                                     cpu_times.user + cpu_times.system, now)
+                processes.append(ProcessRecord(
+                    pid=pinfo['pid'],
+                    ppid=pinfo['ppid'] or 0,
+                    name=pinfo['name'] or '',
+                    rss=mem_info.rss if mem_info else 0,
+                    vms=mem_info.vms if mem_info else 0,
+                    cpu_percent=cpu_percent or 0.0,
+                    create_time=create_time,
+                    status=pinfo['status'] or ''
+                ))
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+        accountant.commit()
+
+        return memory, cpu, processes
+
+    def close(self):
+        pass
+
+
+def _cpu_times_pair(times) -> Tuple[float, float]:
+    """psutil 的 scputimes -> (总时间, 空闲时间)；guest 已计入 user，不重复累加"""
+    total = sum(times) - getattr(times, 'guest', 0.0) - getattr(times, 'guest_nice', 0.0)
+    idle = times.idle + getattr(times, 'iowait', 0.0)
+    return total, idle
+
+
+class ProcfsCollector:
+    """
+    Linux 下直接读取 /proc 的采集后端
+    - /proc/meminfo、/proc/stat 的文件描述符常驻，每次用 pread 读入预分配缓冲区
+    - 每个进程只读一次 /proc/[pid]/stat（其中已包含 ppid、CPU 时间、vsize、rss）
+    - 进程的 stat 描述符按 PID 缓存复用，上限为 max_cached_fds
+      （默认不超过打开文件数软限制的 1/4；打开文件时遇到 EMFILE 先关闭缓存的描述符再重试，并缩小上限）
+    - memory() 可以在任意线程调用，/proc/meminfo 的读取和解析由 _meminfo_lock 保护
+    """
+    name = 'procfs'
+
+    def __init__(self, proc_root: str = '/proc', max_cached_fds: Optional[int] = None):
+        self.proc_root = proc_root
+        self.max_cached_fds = default_fd_cache_size() if max_cached_fds is None else max_cached_fds
+
+        self._page_size = os.sysconf('SC_PAGE_SIZE')
+        self._clk_tck = os.sysconf('SC_CLK_TCK')
+
+        self._meminfo_fd = os.open(os.path.join(proc_root, 'meminfo'), os.O_RDONLY)
+        self._stat_fd = os.open(os.path.join(proc_root, 'stat'), os.O_RDONLY)
+        self._sys_buf = bytearray(16 * 1024)
+        self._meminfo_lock = threading.Lock()
+        # 只读 /proc/stat 开头的 cpu / cpuN 行，每行不超过 160 字节
+        self._cpu_buf = bytearray(max(1024, ((os.cpu_count() or 1) + 1) * 160))
+        self._pid_buf = bytearray(4096)
+
+        self._pid_fds: Dict[int, int] = {}
+        self._boot_time = self._read_boot_time()
+        self.cpu = CpuAccountant()
+
+    @staticmethod
+    def is_supported(proc_root: str = '/proc') -> bool:
+        """当前系统是否可以使用 /proc 后端"""
+        return (sys.platform.startswith('linux')
+                and os.access(os.path.join(proc_root, 'meminfo'), os.R_OK)
+                and os.access(os.path.join(proc_root, 'stat'), os.R_OK))
+
+    def memory(self) -> SystemMemory:
+        """只读取系统内存（不遍历进程表）"""
+        return self._read_meminfo()
+
+    def collect(self) -> Tuple[SystemMemory, CpuUsage, List[ProcessRecord]]:
+        """遍历一次 /proc，返回 (系统内存, 整机 CPU 占用, 进程列表)"""
+        memory = self._read_meminfo()
+        cpu = self.cpu.system(self._read_cpu_times())
+
+        now = time.monotonic()
+        self.cpu.begin()
+        processes = []
+
+        for pid in self._list_pids():
+            data = self._read_pid_stat(pid)
+            if data is None:
+                continue
+            record = self._parse_pid_stat(pid, data, now)
+            if record is not None:
+                processes.append(record)
+        self.cpu.commit()
+
+        # 关闭已退出进程的描述符
+        if len(self._pid_fds) > len(processes):
+            alive = {p.pid for p in processes}
+            for pid in [p for p in self._pid_fds if p not in alive]:
+                os.close(self._pid_fds.pop(pid))
+
+        return memory, cpu, processes
+
+    def close(self):
+        """释放所有常驻的文件描述符"""
+        for fd in self._pid_fds.values():
+            os.close(fd)
+        self._pid_fds.clear()
+        for fd in (self._meminfo_fd, self._stat_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _pread(self, fd: int, buf: bytearray) -> bytes:
+        n = os.preadv(fd, [buf], 0)
+        return bytes(buf[:n])
+
+    def _read_meminfo(self) -> SystemMemory:
+        # preadv 会释放 GIL：清理器、分级回收的测量和监控线程可能同时读取，共用缓冲区需要加锁
+        with self._meminfo_lock:
+            data = self._pread(self._meminfo_fd, self._sys_buf)
+        values = {}
+        for line in data.split(b'\n'):
+            key, _, rest = line.partition(b':')
+            if rest:
+                values[key] = int(rest.split()[0]) * 1024
+
+        total = values.get(b'MemTotal', 0)
+        free = values.get(b'MemFree', 0)
+        cached = values.get(b'Cached', 0) + values.get(b'SReclaimable', 0)
+        buffers = values.get(b'Buffers', 0)
+        available = values.get(b'MemAvailable', free + cached + buffers)
+
+        # 与 psutil.virtual_memory() 的计算方式保持一致
+        used = total - available
+        percent = round((total - available) / total * 100, 1) if total else 0.0
+
+        return SystemMemory(total, available, used, free, percent)
+
+    def _read_boot_time(self) -> float:
+        with open(os.path.join(self.proc_root, 'stat'), 'rb') as f:
+            for line in f:
+                if line.startswith(b'btime '):
+                    return float(line.split()[1])
+        return 0.0
+
+    def _read_cpu_times(self) -> List[Tuple[int, int]]:
+        """
+        读取 /proc/stat 开头的 cpu（汇总）和 cpuN（每核）行
+        返回 [(总节拍, 空闲节拍)]，第 0 项为汇总
+        """
+        data = self._pread(self._stat_fd, self._cpu_buf)
+        times = []
+        for line in data.split(b'\n'):
+            if not line.startswith(b'cpu'):
+                break
+            fields = [int(x) for x in line.split()[1:]]
+            if len(fields) < 4:
+                break    # 缓冲区末尾被截断的行
+            # user nice system idle iowait irq softirq steal（guest 已计入 user）
+            times.append((sum(fields[:8]), fields[3] + (fields[4] if len(fields) > 4 else 0)))
+        return times
+
+    def _release_cached_fds(self):
+        """打开文件数达到上限（EMFILE）：关闭全部缓存的描述符，之后的缓存上限减半"""
+        self.max_cached_fds = len(self._pid_fds) // 2
+        for fd in self._pid_fds.values():
+            os.close(fd)
+        self._pid_fds.clear()
+
+    def _retry_emfile(self, func, *args):
+        """执行打开文件的操作，遇到 EMFILE 时释放缓存的描述符后重试一次"""
+        try:
+            return func(*args)
+        except OSError as e:
+            if e.errno != errno.EMFILE or not self._pid_fds:
+                raise
+        self._release_cached_fds()
+        return func(*args)
+
+    def _list_pids(self) -> List[int]:
+        return [int(name) for name in self._retry_emfile(os.listdir, self.proc_root) if name.isdigit()]
+
+    def _read_pid_stat(self, pid: int) -> Optional[bytes]:
+        """读取 /proc/[pid]/stat，优先复用已缓存的描述符"""
+        fd = self._pid_fds.get(pid)
+        if fd is not None:
+            try:
+                data = self._pread(fd, self._pid_buf)
+                if data:
+                    return data
+            except OSError:
+                pass
+            # 进程已退出（或 PID 被复用），关闭后重新打开
+            os.close(self._pid_fds.pop(pid))
+
+        path = os.path.join(self.proc_root, str(pid), 'stat')
+        try:
+            fd = self._retry_emfile(os.open, path, os.O_RDONLY)
+        except OSError:
+            return None
+
+        try:
+            data = self._pread(fd, self._pid_buf)
+        except OSError:
+            os.close(fd)
+            return None
+
+        if len(self._pid_fds) < self.max_cached_fds:
+            self._pid_fds[pid] = fd
+        else:
+            os.close(fd)
+        return data
+
+    def _parse_pid_stat(self, pid: int, data: bytes, now: float) -> Optional[ProcessRecord]:
+        # 进程名可能包含空格和括号，以最后一个 ')' 为界
+        lparen = data.find(b'(')
+        rparen = data.rfind(b')')
+        if lparen < 0 or rparen < 0:
+            return None
+
+        name = data[lparen + 1:rparen].decode('utf-8', 'replace')
+        fields = data[rparen + 2:].split()
+        # fields[0] 对应 stat 的第 3 个字段（state）
+        try:
+            state = fields[0].decode()
+            ppid = int(fields[1])
+            ticks = int(fields[11]) + int(fields[12])
+            starttime = int(fields[19])
+            vms = int(fields[20])
+            rss = int(fields[21]) * self._page_size
+        except (IndexError, ValueError):
+            return None
+
+        if len(name) >= _COMM_LEN:
+            name = self._read_full_name(pid, name)
+
+        create_time = self._boot_time + starttime / self._clk_tck
+        cpu_percent = self.cpu.process(pid, create_time, ticks / self._clk_tck, now)
+
+        return ProcessRecord(
+            pid=pid,
+            ppid=ppid,
+            name=name,
+            rss=rss,
+            vms=vms,
+            cpu_percent=cpu_percent or 0.0,
+            create_time=create_time,
+            status=_PROC_STATUS.get(state, state)
+        )
+
+    def _read_full_name(self, pid: int, comm: str) -> str:
+        """comm 被截断时，尝试从 cmdline 还原完整进程名（与 psutil 行为一致）"""
+        try:
+            with open(os.path.join(self.proc_root, str(pid), 'cmdline'), 'rb') as f:
+                exe = f.read().split(b'\0', 1)[0]
+        except OSError:
+            return comm
+        full = os.path.basename(exe.decode('utf-8', 'replace'))
+        return full if full.startswith(comm) else comm
+
+
+def create_collector(backend: str = 'auto', proc_root: str = '/proc'):
+    """
+    按名称创建采集后端
+    backend: 'auto'（Linux 下优先 procfs）、'procfs' 或 'psutil'
+    procfs 不可用时自动回退到 psutil
+    """
+    if backend in ('auto', 'procfs') and ProcfsCollector.is_supported(proc_root):
+        try:
+            return ProcfsCollector(proc_root)
+        except OSError as e:
+            print(f"⚠️ /proc 采集后端初始化失败，回退到 psutil: {e}")
+    elif backend not in ('auto', 'procfs', 'psutil'):
+        print(f"⚠️ 未知的采集后端: {backend}，使用 psutil")
+
+    return PsutilCollector()
@@ -0,0 +1,76 @@
+# 基于时间差值的 CPU 占用计算
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class CpuUsage(NamedTuple):
+    """一次采样得到的整机 CPU 占用"""
+    percent: float                 # 整机 CPU 占用（无基线时为 0.0）
+    percpu: Tuple[float, ...]      # 每个核心的 CPU 占用
+    ready: bool                    # 是否已有上一次采样作为基线
+
+
+class CpuAccountant:
+    """
+    保存上一次采样的整机 / 每核 CPU 时间和每个进程的 CPU 时间，
+    下一次采样时直接用差值算出占用率，不需要 sleep 等待采样间隔。
+    第一次采样（以及新出现的进程）没有基线，会明确标记出来而不是返回一个假的 0。
+    """
+
+    def __init__(self):
+        # 每项为 (总时间, 空闲时间)，第 0 项为整机汇总，其余为每个核心
+        self._prev_system: Optional[List[Tuple[float, float]]] = None
+        self._last_usage = CpuUsage(0.0, (), False)
+        # pid -> (创建时间, CPU 时间（秒）, 采样时刻)
+        self._prev_processes: Dict[int, Tuple[float, float, float]] = {}
+        self._next_processes: Dict[int, Tuple[float, float, float]] = {}
+
+    @property
+    def has_baseline(self) -> bool:
+        return self._prev_system is not None
+
+    def system(self, times: Sequence[Tuple[float, float]]) -> CpuUsage:
+        """
+        输入当前的 (总时间, 空闲时间) 列表，第 0 项为整机汇总
+        两次采样间隔太短（时间没有推进）时沿用上一次的结果，基线不变
+        """
+        prev = self._prev_system
+        if prev is None or len(prev) != len(times):
+            self._prev_system = list(times)
+            self._last_usage = CpuUsage(0.0, (0.0,) * (len(times) - 1), False)
+            return self._last_usage
+
+        if times[0][0] - prev[0][0] <= 0:
+            return self._last_usage
+
+        percents = [_busy_percent(old, new) for old, new in zip(prev, times)]
+        self._prev_system = list(times)
+        self._last_usage = CpuUsage(percents[0], tuple(percents[1:]), True)
+        return self._last_usage
+
+    def begin(self):
+        """开始一轮进程采样"""
+        self._next_processes = {}
+
+    def process(self, pid: int, create_time: float, cpu_seconds: float, now: float) -> Optional[float]:
+        """
+        计算单个进程自上次采样以来的 CPU 占用
+        没有基线（新进程或 PID 被复用）时返回 None
+        """
+        self._next_processes[pid] = (create_time, cpu_seconds, now)
+        prev = self._prev_processes.get(pid)
+        if prev is None or prev[0] != create_time or now <= prev[2]:
+            return None
+        return round(max(0.0, (cpu_seconds - prev[1]) / (now - prev[2]) * 100), 1)
+
+    def commit(self):
+        """结束一轮进程采样，本轮数据成为下一轮的基线（已退出的进程随之丢弃）"""
+        self._prev_processes = self._next_processes
+        self._next_processes = {}
+
+
+def _busy_percent(old: Tuple[float, float], new: Tuple[float, float]) -> float:
+    total_delta = new[0] - old[0]
+    if total_delta <= 0:
+        return 0.0
+    busy_delta = total_delta - (new[1] - old[1])
+    return round(max(0.0, min(100.0, busy_delta / total_delta * 100)), 1)
@@ -0,0 +1,509 @@
+# 后台守护进程与控制套接字
+"""
+无界面的常驻进程：共享一个快照引擎、一个实时监控器和托管调度器，
+命令行、GUI 和脚本通过 Unix 套接字与其通信，不再各自启动监控线程和遍历进程表
+
+协议：每行一个 JSON 对象（UTF-8，以 \\n 结尾）
+    请求  {"id": 1, "cmd": "status"}
+    响应  {"id": 1, "ok": true, "result": {...}}
+          {"id": 1, "ok": false, "error": "..."}
+
+命令:
+    ping                        检查守护进程是否在运行
+    status                      调度器状态（含性能统计）
+    stats                       最近一次监控采样
+    start   {"mode": "office"}  启动托管模式
+    stop                        停止托管模式
+    mode    {"mode": "game"}    切换托管模式
+    subscribe {"interval": 1.0} 订阅实时采样：响应后每个采样点推送一行
+                                {"event": "stats", "data": {...}}，直到客户端断开；
+                                interval 为可选的最长采样间隔（正数秒，订阅期间生效；无效时返回错误）
+    shutdown                    退出守护进程
+
+用法:
+    python -m core.daemon serve [--mode office]
+    python -m core.daemon status | stats | start office | stop | mode game | watch | shutdown
+"""
+import json
+import math
+import os
+import queue
+import signal
+import socket
+import socketserver
+import threading
+from typing import Callable, Dict, Iterator, Optional
+
+DEFAULT_SOCKET_PATH = 'data/memwatch.sock'
+MAX_REQUEST_BYTES = 64 * 1024
+SUBSCRIBER_QUEUE_SIZE = 16      # 订阅者读得慢时丢弃最旧的采样
+
+
+class DaemonError(Exception):
+    """守护进程返回错误或无法连接"""
+
+
+def _encode(message: Dict) -> bytes:
+    return (json.dumps(message, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+class MemwatchDaemon:
+    """
+    守护进程
+    socket_path: 控制套接字路径（权限 0600，只有当前用户可以连接）
+    journal / exporter: 按配置创建监控数据日志和指标导出器
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, config=None):
+        from config.config_manager import get_config_manager
+        from core.monitor_realtime import SystemMonitor
+        from core.scheduler import MemoryScheduler
+        from core import instrumentation
+
+        self.socket_path = os.path.abspath(socket_path)
+        self.config = config or get_config_manager()
+        instrumentation.configure(self.config)
+
+        journal = None
+        if self.config.get('journal.enabled', True):
+            from core.journal import MetricsJournal
+            journal = MetricsJournal(
+                directory=self.config.get('journal.directory', 'data/journal'),
+                file_size_mb=self.config.get('journal.file_size_mb', 4),
+                compact_after_hours=self.config.get('journal.compact_after_hours', 24)
+            )
+
+        # 监控器和调度器都使用全局快照引擎，所有客户端共享同一次进程表遍历；
+        # monitor.loop 为 asyncio 时采样、调度、日志和导出共用一个事件循环线程
+        from core.async_core import create_core
+        self.core = create_core(self.config)
+        from core.sampling import create_sampler
+        self.monitor = SystemMonitor(journal=journal, core=self.core, sampler=create_sampler(self.config))
+        self.scheduler = MemoryScheduler(monitor=self.monitor, core=self.core)
+
+        from core.exporter import create_exporter
+        self.exporter = create_exporter(self.config, self.monitor)
+
+        self.last_stats: Optional[Dict] = None
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._server: Optional[socketserver.UnixStreamServer] = None
+
+        self.commands: Dict[str, Callable[[Dict], object]] = {
+            'ping': lambda args: 'pong',
+            'status': lambda args: self.scheduler.get_status(),
+            'stats': lambda args: self.last_stats,
+            'start': lambda args: self.scheduler.start(args.get('mode', 'office')),
+            'stop': lambda args: self.scheduler.stop() if self.scheduler.is_running else False,
+            'mode': self._set_mode,
+            'shutdown': self._request_shutdown,
+        }
+
+    # ---------- 生命周期 ----------
+
+    def start(self, mode: Optional[str] = None) -> 'MemwatchDaemon':
+        self._prepare_socket()
+        self._server = _ControlServer(self.socket_path, _ControlHandler)
+        self._server.daemon_ref = self
+        os.chmod(self.socket_path, 0o600)
+
+        self.monitor.add_update_callback(self._on_sample)
+        self.monitor.start_monitoring()
+        if self.exporter is not None:
+            self.exporter.start()
+        if mode:
+            self.scheduler.start(mode)
+
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="DaemonControl").start()
+        print(f"🛰️ 守护进程已启动，控制套接字: {self.socket_path}")
+        return self
+
+    def _prepare_socket(self):
+        """清理上次异常退出留下的套接字文件；已有守护进程在运行时报错"""
+        directory = os.path.dirname(self.socket_path)
+        os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(self.socket_path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.socket_path)
+        except OSError:
+            os.unlink(self.socket_path)
+            return
+        finally:
+            probe.close()
+        raise DaemonError(f"守护进程已在运行: {self.socket_path}")
+
+    def wait(self):
+        """阻塞直到收到 shutdown 命令或 SIGTERM / SIGINT"""
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                signal.signal(sig, lambda *_: self._stopped.set())
+        while not self._stopped.wait(1):
+            pass
+
+    def stop(self):
+        self._stopped.set()
+        if self.scheduler.is_running:
+            self.scheduler.stop()
+        self.monitor.remove_updata_callback(self._on_sample)
+        self.monitor.stop_monitoring()
+        if self.exporter is not None:
+            self.exporter.stop()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        with self._subscribers_lock:
+            for subscriber in self._subscribers:
+                _offer(subscriber, None)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        if self.core is not None:
+            self.core.stop()
+        print("✅ 守护进程已退出")
+
+    # ---------- 命令 ----------
+
+    def handle(self, request: Dict) -> Dict:
+        response = {'id': request.get('id')}
+        command = self.commands.get(request.get('cmd'))
+        if command is None:
+            response.update(ok=False, error=f"未知命令: {request.get('cmd')}")
+            return response
+        try:
+            response.update(ok=True, result=command(request))
+        except Exception as e:
+            response.update(ok=False, error=str(e))
+        return response
+
+    def _set_mode(self, args: Dict) -> bool:
+        mode = args.get('mode')
+        if not self.scheduler.is_running:
+            raise DaemonError("托管模式未在运行")
+        if not self.scheduler.set_mode(mode):
+            raise DaemonError(f"无效的模式: {mode}")
+        return True
+
+    def _request_shutdown(self, args: Dict) -> bool:
+        self._stopped.set()
+        return True
+
+    # ---------- 订阅 ----------
+
+    def _on_sample(self, stats: Dict):
+        """监控线程回调：采样只序列化一次，放进每个订阅者的队列"""
+        self.last_stats = stats
+        with self._subscribers_lock:
+            if not self._subscribers:
+                return
+            line = _encode({'event': 'stats', 'data': stats})
+            for subscriber in self._subscribers:
+                _offer(subscriber, line)
+
+    def subscribe(self) -> queue.Queue:
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._subscribers_lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: queue.Queue):
+        with self._subscribers_lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    @property
+    def stopped(self) -> bool:
+        return self._stopped.is_set()
+
+
+def _offer(subscriber: queue.Queue, item):
+    """放入队列，满时丢弃最旧的一项"""
+    while True:
+        try:
+            subscriber.put_nowait(item)
+            return
+        except queue.Full:
+            try:
+                subscriber.get_nowait()
+            except queue.Empty:
+                pass
+
+
+class _ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+    daemon_ref: MemwatchDaemon = None
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    """一个连接上可以连续发送多条请求；subscribe 之后连接只用于推送"""
+
+    def handle(self):
+        daemon = self.server.daemon_ref
+        while not daemon.stopped:
+            line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+            if not line:
+                return
+            try:
+                if len(line) > MAX_REQUEST_BYTES:
+                    raise ValueError("请求过长")
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("请求必须是 JSON 对象")
+            except ValueError as e:
+                self._send({'id': None, 'ok': False, 'error': f"无效请求: {e}"})
+                return
+
+            if request.get('cmd') == 'subscribe':
+                self._stream(daemon, request)
+                return
+            if not self._send(daemon.handle(request)):
+                return
+
+    def _send(self, message: Dict) -> bool:
+        try:
+            self.wfile.write(_encode(message))
+            self.wfile.flush()
+            return True
+        except OSError:
+            return False
+
+    def _stream(self, daemon: MemwatchDaemon, request: Dict):
+        interval = request.get('interval')
+        if interval is not None:
+            interval = _parse_interval(interval)
+            if interval is None:
+                self._send({'id': request.get('id'), 'ok': False,
+                            'error': f"无效的采样间隔: {request['interval']!r}"})
+                return
+
+        subscriber = daemon.subscribe()
+        interval_name = f"subscriber-{id(subscriber)}"
+        try:
+            if interval is not None:
+                daemon.monitor.request_interval(interval_name, interval)
+            if not self._send({'id': request.get('id'), 'ok': True, 'result': daemon.last_stats}):
+                return
+            while not daemon.stopped:
+                try:
+                    line = subscriber.get(timeout=1)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    return
+                self.wfile.write(line)
+                self.wfile.flush()
+        except OSError:
+            pass    # 客户端断开
+        finally:
+            daemon.unsubscribe(subscriber)
+            daemon.monitor.request_interval(interval_name, None)
+
+
+def _parse_interval(value) -> Optional[float]:
+    """订阅请求中的采样间隔：正的有限秒数，否则返回 None"""
+    if isinstance(value, bool):
+        return None
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        return None
+    return seconds if math.isfinite(seconds) and seconds > 0 else None
+
+
+# ---------- 客户端 ----------
+
+class DaemonClient:
+    """控制套接字客户端（每个实例一个连接，非线程安全）"""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, timeout: Optional[float] = 5.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+        self._next_id = 0
+
+    def connect(self) -> 'DaemonClient':
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except OSError as e:
+            sock.close()
+            raise DaemonError(f"无法连接守护进程 {self.socket_path}: {e}")
+        self._sock = sock
+        self._file = sock.makefile('rwb')
+        return self
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self):
+        return self.connect() if self._sock is None else self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, cmd: str, **args):
+        """发送一条命令并返回结果，守护进程返回错误时抛出 DaemonError"""
+        if self._sock is None:
+            self.connect()
+        self._next_id += 1
+        self._file.write(_encode(dict(args, id=self._next_id, cmd=cmd)))
+        self._file.flush()
+        response = self._read()
+        if not response.get('ok'):
+            raise DaemonError(response.get('error', '未知错误'))
+        return response.get('result')
+
+    def subscribe(self, interval: Optional[float] = None) -> Iterator[Dict]:
+        """
+        订阅实时采样，逐个产生监控数据（连接之后只能用于订阅）
+        interval: 要求的最长采样间隔（秒），为空时按守护进程的自适应间隔
+        """
+        self.request('subscribe', interval=interval)
+        self._sock.settimeout(None)
+        while True:
+            message = self._read()
+            if message.get('event') == 'stats':
+                yield message['data']
+
+    def _read(self) -> Dict:
+        line = self._file.readline()
+        if not line:
+            raise DaemonError("守护进程已断开连接")
+        return json.loads(line)
+
+
+def daemon_available(socket_path: str = DEFAULT_SOCKET_PATH) -> bool:
+    """守护进程是否在运行"""
+    if not os.path.exists(socket_path):
+        return False
+    try:
+        with DaemonClient(socket_path, timeout=1.0) as client:
+            return client.request('ping') == 'pong'
+    except (DaemonError, OSError, ValueError):
+        return False
+
+
+class RemoteMonitor:
+    """
+    通过守护进程订阅实时采样，接口与 SystemMonitor 的回调部分一致，
+    GUI 等前端可以直接替换本地监控器
+    """
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET_PATH, interval: Optional[float] = None):
+        """interval: 要求守护进程的最长采样间隔（例如界面每秒刷新）"""
+        self.socket_path = socket_path
+        self.interval = interval
+        self.update_callbacks = []
+        self.is_running = False
+        self._client: Optional[DaemonClient] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def add_update_callback(self, callback_func):
+        if callback_func not in self.update_callbacks:
+            self.update_callbacks.append(callback_func)
+
+    def remove_updata_callback(self, callback_func):
+        if callback_func in self.update_callbacks:
+            self.update_callbacks.remove(callback_func)
+
+    def start_monitoring(self):
+        if self.is_running:
+            return
+        try:
+            self._client = DaemonClient(self.socket_path).connect()
+        except DaemonError as e:
+            print(f"❌ {e}")
+            return
+        self.is_running = True
+        self._thread = threading.Thread(target=self._receive_loop, daemon=True, name="RemoteMonitor")
+        self._thread.start()
+
+    def stop_monitoring(self):
+        self.is_running = False
+        if self._client is not None:
+            self._client.close()    # 关闭连接让接收线程退出
+            self._client = None
+
+    def _receive_loop(self):
+        client = self._client
+        try:
+            for stats in client.subscribe(self.interval):
+                if not self.is_running:
+                    break
+                for callback in self.update_callbacks.copy():
+                    try:
+                        callback(stats)
+                    except Exception as e:
+                        print(f"⚠️ 回调函数执行失败: {e}")
+        except (DaemonError, OSError, ValueError) as e:
+            if self.is_running:
+                print(f"⚠️ 与守护进程的连接中断: {e}")
+        self.is_running = False
+
+
+def main(argv=None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="memwatch 守护进程与控制命令")
+    parser.add_argument('--socket', help="控制套接字路径（默认按配置 daemon.socket_path）")
+    sub = parser.add_subparsers(dest='command', required=True)
+    serve = sub.add_parser('serve', help="启动守护进程")
+    serve.add_argument('--mode', choices=['office', 'game', 'auto'], help="启动后立即进入托管模式")
+    for name in ('status', 'stats', 'stop', 'shutdown', 'ping'):
+        sub.add_parser(name)
+    watch = sub.add_parser('watch', help="订阅实时采样")
+    watch.add_argument('--interval', type=float, help="要求的最长采样间隔（秒）")
+    for name in ('start', 'mode'):
+        sub.add_parser(name).add_argument('mode', choices=['office', 'game', 'auto'])
+    args = parser.parse_args(argv)
+
+    socket_path = args.socket
+    if socket_path is None:
+        from config.config_manager import get_config_manager
+        socket_path = get_config_manager().get('daemon.socket_path', DEFAULT_SOCKET_PATH)
+
+    if args.command == 'serve':
+        try:
+            daemon = MemwatchDaemon(socket_path).start(args.mode)
+        except (DaemonError, OSError) as e:
+            print(f"❌ {e}")
+            return 1
+        try:
+            daemon.wait()
+        finally:
+            daemon.stop()
+        return 0
+
+    try:
+        with DaemonClient(socket_path) as client:
+            if args.command == 'watch':
+                for stats in client.subscribe(args.interval):
+                    cpu = f"{stats['cpu_percent']}%" if stats.get('cpu_ready', True) else "采集中"
+                    print(f"📊 内存: {stats['memory_percent']}%  CPU: {cpu}  进程: {stats['process_count']}"
+                          f"  间隔: {stats.get('sample_interval', 1):g}s ({stats.get('sample_reason', '')})")
+                return 0
+            args_map = {'start': {'mode': getattr(args, 'mode', None)},
+                        'mode': {'mode': getattr(args, 'mode', None)}}
+            result = client.request(args.command, **args_map.get(args.command, {}))
+    except DaemonError as e:
+        print(f"❌ {e}")
+        return 1
+    except KeyboardInterrupt:
+        return 0
+
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(main())
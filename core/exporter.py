@@ -0,0 +1,416 @@
+# 指标导出（Prometheus 文本格式）
+"""
+把监控数据以 Prometheus 文本格式通过本机 HTTP 或 Unix 套接字提供给采集端
+
+- 每个监控采样点（SystemMonitor 回调）重新生成一次完整的响应体并编码为字节，
+  抓取请求只是把当前缓冲区原样写出：开销 O(1)，不会触发进程表遍历
+- 清理结果通过 cleaner_safe.add_cleanup_listener 累计到计数器中
+- 各阶段耗时来自 core.instrumentation（开启性能统计时才有数据）
+- 提供 asyncio 监控核心（AsyncCore）时，HTTP 服务作为协程运行在核心的事件循环中，不再占用线程
+
+用法:
+    python -m core.exporter --port 9464
+    python -m core.exporter --unix-socket /run/memwatch/metrics.sock
+    curl -s http://127.0.0.1:9464/metrics
+"""
+import asyncio
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from core import instrumentation
+from core.topk import KEY_CPU, KEY_MEMORY
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+REQUEST_TIMEOUT = 5.0       # asyncio 服务读取请求的超时（秒）
+
+# SystemMonitor 采样字段 -> (指标名, 说明)，内存字节数另从快照读取
+_GAUGES = (
+    ('memory_percent', 'memwatch_memory_percent', '系统内存使用率'),
+    ('cpu_percent', 'memwatch_cpu_percent', '系统 CPU 使用率'),
+    ('process_count', 'memwatch_process_count', '进程数量'),
+    ('generation', 'memwatch_snapshot_generation', '进程快照代数'),
+    ('timestamp', 'memwatch_sample_timestamp_seconds', '采样时间'),
+    ('sample_interval', 'memwatch_sample_interval_seconds', '当前采样间隔（自适应）'),
+)
+
+
+def escape_label(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _number(value) -> str:
+    if isinstance(value, float):
+        return repr(value) if value == value else 'NaN'
+    return str(value)
+
+
+class _Writer:
+    """按指标族追加 HELP / TYPE 和样本行"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value, labels: Optional[Dict] = None):
+        if labels:
+            body = ','.join(f'{key}="{escape_label(val)}"' for key, val in labels.items())
+            self.lines.append(f"{name}{{{body}}} {_number(value)}")
+        else:
+            self.lines.append(f"{name} {_number(value)}")
+
+    def encode(self) -> bytes:
+        return ('\n'.join(self.lines) + '\n').encode('utf-8')
+
+
+class MetricsExporter:
+    """
+    指标导出器
+    host / port: 监听本机 HTTP（默认 127.0.0.1:9464）
+    unix_socket: 改为监听 Unix 套接字（设置后忽略 host / port）
+    top_k: 导出内存 / CPU 占用最高的前几个进程
+    """
+
+    def __init__(self, monitor=None, snapshot_engine=None, host: str = '127.0.0.1', port: int = 9464,
+                 unix_socket: Optional[str] = None, top_k: int = 10, core=None):
+        self.monitor = monitor
+        self.core = core if core is not None else getattr(monitor, 'core', None)
+        self.snapshot_engine = snapshot_engine or (monitor.snapshot_engine if monitor is not None else None)
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket or None
+        self.top_k = top_k
+
+        self._lock = threading.Lock()
+        self._last_stats: Optional[Dict] = None
+        self._cleanup = {
+            'runs': 0,
+            'freed_bytes': 0.0,
+            'processes': 0,
+            'skipped': 0,
+            'cancelled': 0,
+            'reclaimed_bytes': 0.0,
+            'tier_freed_bytes': {},
+            'tier_seconds': {},
+            'last_freed_bytes': 0.0,
+            'last_timestamp': 0.0,
+        }
+        self._buffer = self._render()
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- 数据更新（监控线程 / 清理线程） ----------
+
+    def update(self, stats: Dict):
+        """SystemMonitor 回调：用最新采样重新生成响应体"""
+        with self._lock:
+            self._last_stats = stats
+            self._buffer = self._render()
+
+    def record_cleanup(self, result: Dict):
+        """清理结果回调：累计释放内存、清理 / 跳过的进程数"""
+        with self._lock:
+            cleanup = self._cleanup
+            freed = result.get('memory_freed_mb', 0) * 1024 * 1024
+            cleanup['runs'] += 1
+            cleanup['freed_bytes'] += freed
+            cleanup['processes'] += len(result.get('cleaned_processes', ()))
+            cleanup['skipped'] += result.get('skipped', 0)
+            cleanup['cancelled'] += 1 if result.get('cancelled') else 0
+            cleanup['reclaimed_bytes'] += result.get('reclaimed_mb', 0) * 1024 * 1024
+            for entry in result.get('tiers', ()):
+                if entry['skipped']:
+                    continue
+                tier = entry['tier']
+                cleanup['tier_freed_bytes'][tier] = (cleanup['tier_freed_bytes'].get(tier, 0.0)
+                                                     + entry['freed_mb'] * 1024 * 1024)
+                cleanup['tier_seconds'][tier] = cleanup['tier_seconds'].get(tier, 0.0) + entry['elapsed_ms'] / 1000
+            cleanup['last_freed_bytes'] = freed
+            cleanup['last_timestamp'] = time.time()
+            self._buffer = self._render()
+
+    def render(self) -> bytes:
+        """当前的响应体（抓取时直接使用）"""
+        return self._buffer
+
+    def _render(self) -> bytes:
+        w = _Writer()
+        stats = self._last_stats
+
+        w.family('memwatch_up', 'gauge', '导出器是否已收到监控采样')
+        w.sample('memwatch_up', 1 if stats else 0)
+
+        if stats:
+            for key, name, help_text in _GAUGES:
+                if key == 'cpu_percent' and not stats.get('cpu_ready', True):
+                    continue    # 首次采样没有 CPU 基线，不导出假的 0
+                if key in stats:
+                    w.family(name, 'gauge', help_text)
+                    w.sample(name, stats[key])
+            if 'sample_reason' in stats:
+                w.family('memwatch_sample_info', 'gauge', '当前采样间隔的原因')
+                w.sample('memwatch_sample_info', 1, {'reason': stats['sample_reason']})
+            memory = self._snapshot_memory()
+            if memory is not None:
+                w.family('memwatch_memory_bytes', 'gauge', '系统内存（字节）')
+                for kind in ('total', 'used', 'available'):
+                    w.sample('memwatch_memory_bytes', getattr(memory, kind), {'kind': kind})
+            self._render_top(w)
+            self._render_cgroups(w, stats.get('cgroups'))
+
+        self._render_cleanup(w)
+        self._render_instrumentation(w)
+        return w.encode()
+
+    def _snapshot_memory(self):
+        if self.snapshot_engine is None:
+            return None
+        snapshot = self.snapshot_engine.latest
+        return snapshot.memory if snapshot is not None else None
+
+    def _render_top(self, w: _Writer):
+        """Top-K 进程取自快照引擎的增量索引，开销与 K 成正比"""
+        if self.snapshot_engine is None or not self.top_k:
+            return
+        tracker = self.snapshot_engine.top_k
+
+        w.family('memwatch_top_process_rss_bytes', 'gauge', f'内存占用最高的 {self.top_k} 个进程的 RSS')
+        for record in tracker.top(self.top_k, KEY_MEMORY):
+            w.sample('memwatch_top_process_rss_bytes', record.rss, {'pid': record.pid, 'name': record.name})
+
+        w.family('memwatch_top_process_cpu_percent', 'gauge', f'CPU 占用最高的 {self.top_k} 个进程')
+        for record in tracker.top(self.top_k, KEY_CPU, minimum=0.0):
+            w.sample('memwatch_top_process_cpu_percent', record.cpu_percent,
+                     {'pid': record.pid, 'name': record.name})
+
+    def _render_cgroups(self, w: _Writer, cgroups: Optional[List[Dict]]):
+        """各 cgroup 的内存、预算和压力（采样数据中带有 cgroups 时）"""
+        if not cgroups:
+            return
+        for key, name, help_text in (
+            ('current_mb', 'memwatch_cgroup_memory_bytes', 'cgroup 内存占用（memory.current）'),
+            ('budget_mb', 'memwatch_cgroup_budget_bytes', 'cgroup 内存预算'),
+            ('reclaimable_mb', 'memwatch_cgroup_reclaimable_bytes', 'cgroup 可回收的冷内存（估算）'),
+        ):
+            w.family(name, 'gauge', help_text)
+            for cgroup in cgroups:
+                if cgroup[key] is not None:
+                    w.sample(name, cgroup[key] * 1024 * 1024, {'cgroup': cgroup['path']})
+        w.family('memwatch_cgroup_pressure_percent', 'gauge', 'cgroup 内存压力（memory.pressure avg10）')
+        for cgroup in cgroups:
+            for kind in ('some', 'full'):
+                w.sample('memwatch_cgroup_pressure_percent', cgroup[f'pressure_{kind}'],
+                         {'cgroup': cgroup['path'], 'kind': kind})
+
+    def _render_cleanup(self, w: _Writer):
+        cleanup = self._cleanup
+        for key, name, help_text in (
+            ('runs', 'memwatch_cleanup_runs_total', '清理次数'),
+            ('freed_bytes', 'memwatch_cleanup_freed_bytes_total', '清理累计释放的内存（估算）'),
+            ('processes', 'memwatch_cleanup_processes_total', '清理累计退出的进程数'),
+            ('skipped', 'memwatch_cleanup_skipped_total', '因白名单 / 系统关键进程跳过的次数'),
+            ('cancelled', 'memwatch_cleanup_cancelled_total', '被取消的清理次数'),
+            ('reclaimed_bytes', 'memwatch_cleanup_reclaimed_bytes_total', '清理时通过 cgroup memory.reclaim 回收的内存'),
+        ):
+            w.family(name, 'counter', help_text)
+            w.sample(name, cleanup[key])
+        for key, name, help_text in (
+            ('tier_freed_bytes', 'memwatch_cleanup_tier_freed_bytes_total', '分级回收各级释放的内存（按可用内存变化测量）'),
+            ('tier_seconds', 'memwatch_cleanup_tier_seconds_total', '分级回收各级的累计耗时'),
+        ):
+            w.family(name, 'counter', help_text)
+            for tier, value in sorted(cleanup[key].items()):
+                w.sample(name, value, {'tier': tier})
+        w.family('memwatch_cleanup_last_freed_bytes', 'gauge', '最近一次清理释放的内存（估算）')
+        w.sample('memwatch_cleanup_last_freed_bytes', cleanup['last_freed_bytes'])
+        w.family('memwatch_cleanup_last_timestamp_seconds', 'gauge', '最近一次清理的时间')
+        w.sample('memwatch_cleanup_last_timestamp_seconds', cleanup['last_timestamp'])
+
+    def _render_instrumentation(self, w: _Writer):
+        data = instrumentation.report()
+        usage = data['self']
+        w.family('memwatch_self_cpu_seconds_total', 'counter', 'memwatch 自身消耗的 CPU 时间')
+        w.sample('memwatch_self_cpu_seconds_total', usage['cpu_seconds'])
+        w.family('memwatch_self_rss_bytes', 'gauge', 'memwatch 自身的常驻内存')
+        w.sample('memwatch_self_rss_bytes', int(usage['rss_mb'] * 1024 * 1024))
+        w.family('memwatch_self_threads', 'gauge', 'memwatch 自身的线程数')
+        w.sample('memwatch_self_threads', usage['threads'])
+
+        if data['timers']:
+            w.family('memwatch_phase_duration_seconds', 'summary', '各阶段耗时（需开启性能统计）')
+            for phase, summary in data['timers'].items():
+                for quantile, key in (('0.5', 'p50_ms'), ('0.95', 'p95_ms'), ('0.99', 'p99_ms')):
+                    w.sample('memwatch_phase_duration_seconds', summary[key] / 1000,
+                             {'phase': phase, 'quantile': quantile})
+                w.sample('memwatch_phase_duration_seconds_sum', summary['total_ms'] / 1000, {'phase': phase})
+                w.sample('memwatch_phase_duration_seconds_count', summary['count'], {'phase': phase})
+        if data['counters']:
+            w.family('memwatch_events_total', 'counter', '内部事件计数（需开启性能统计）')
+            for name, value in data['counters'].items():
+                w.sample('memwatch_events_total', value, {'event': name})
+
+    # ---------- 服务 ----------
+
+    @property
+    def address(self) -> str:
+        if self.unix_socket:
+            return f"unix:{self.unix_socket}"
+        port = self.port
+        if isinstance(self._server, asyncio.AbstractServer):
+            port = self._server.sockets[0].getsockname()[1]
+        elif self._server is not None:
+            port = self._server.server_address[1]
+        return f"http://{self.host}:{port}/metrics"
+
+    def start(self) -> 'MetricsExporter':
+        if self._server is not None:
+            return self
+
+        if self.unix_socket and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)    # 上次异常退出留下的套接字文件
+
+        if self.core is not None:
+            self._server = self.core.start().spawn(self._start_async_server()).result(5)
+        else:
+            handler = _make_handler(self)
+            if self.unix_socket:
+                self._server = _UnixHTTPServer(self.unix_socket, handler)
+            else:
+                self._server = ThreadingHTTPServer((self.host, self.port), handler)
+            self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+
+        if self.monitor is not None:
+            self.monitor.add_update_callback(self.update)
+        from core.cleaner_safe import add_cleanup_listener
+        add_cleanup_listener(self.record_cleanup)
+        print(f"📡 指标导出已启动: {self.address}")
+        return self
+
+    def stop(self):
+        if self._server is None:
+            return
+        if self.monitor is not None:
+            self.monitor.remove_updata_callback(self.update)
+        from core.cleaner_safe import remove_cleanup_listener
+        remove_cleanup_listener(self.record_cleanup)
+
+        if isinstance(self._server, asyncio.AbstractServer):
+            if self.core.running:
+                self.core.spawn(_close_server(self._server)).result(5)
+        else:
+            self._server.shutdown()
+            self._server.server_close()
+        self._server = None
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self.unix_socket and os.path.exists(self.unix_socket):
+            os.unlink(self.unix_socket)
+
+
+    # ---------- asyncio 服务 ----------
+
+    async def _start_async_server(self):
+        if self.unix_socket:
+            return await asyncio.start_unix_server(self._handle_async, path=self.unix_socket)
+        return await asyncio.start_server(self._handle_async, self.host, self.port)
+
+    async def _handle_async(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """最简 HTTP/1.0：读请求行和请求头，写出当前缓冲区后关闭连接"""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+            while True:
+                line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+            parts = request_line.split()
+            path = parts[1].decode('latin-1').split('?', 1)[0] if len(parts) >= 2 else ''
+            if len(parts) >= 2 and parts[0] == b'GET' and path in ('/metrics', '/'):
+                body, status, content_type = self.render(), '200 OK', CONTENT_TYPE
+            else:
+                body, status, content_type = b'not found\n', '404 Not Found', 'text/plain'
+            writer.write(f"HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n"
+                         f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _close_server(server: asyncio.AbstractServer):
+    server.close()
+    await server.wait_closed()
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _make_handler(exporter: MetricsExporter):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = exporter.render()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def address_string(self):
+            # Unix 套接字的 client_address 是空字符串
+            return self.client_address[0] if self.client_address else 'unix'
+
+        def log_message(self, format, *args):
+            pass    # 抓取很频繁，不打印访问日志
+
+    return MetricsHandler
+
+
+def create_exporter(config, monitor=None) -> Optional[MetricsExporter]:
+    """按配置（ConfigManager）创建导出器，未开启时返回 None；监控器使用 asyncio 核心时共用其事件循环"""
+    if not config.get('exporter.enabled', False):
+        return None
+    return MetricsExporter(
+        monitor=monitor,
+        host=config.get('exporter.host', '127.0.0.1'),
+        port=config.get('exporter.port', 9464),
+        unix_socket=config.get('exporter.unix_socket', '') or None,
+        top_k=config.get('exporter.top_k', 10)
+    )
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="以 Prometheus 文本格式导出 memwatch 监控数据")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9464)
+    parser.add_argument('--unix-socket', help="监听 Unix 套接字（代替 HTTP 端口）")
+    parser.add_argument('--top-k', type=int, default=10)
+    args = parser.parse_args()
+
+    from core.monitor_realtime import SystemMonitor
+
+    monitor = SystemMonitor(max_data_points=3600)
+    exporter = MetricsExporter(monitor, host=args.host, port=args.port,
+                               unix_socket=args.unix_socket, top_k=args.top_k).start()
+    monitor.start_monitoring()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\n🛑 停止指标导出...")
+    finally:
+        monitor.stop_monitoring()
+        exporter.stop()
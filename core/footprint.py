@@ -0,0 +1,171 @@
+# 进程内存足迹（PSS / USS）
+"""
+RSS 把共享库和多进程应用共享的页面重复计入每个进程，按 RSS 估算"结束进程能释放多少内存"会严重偏高
+这里从 /proc/[pid]/smaps_rollup 读取：
+- USS（Private_Clean + Private_Dirty）：进程独占的内存，结束该进程后确定能回收
+- PSS：共享页面按共享进程数分摊后的占用
+- SwapPss：换出到交换区的部分（结束进程后释放的是交换区空间，不计入可用内存）
+
+读取 smaps_rollup 需要内核遍历进程的页表，大进程要几毫秒，因此只对排名靠前的候选进程读取，
+在线程池中并行读取，并按 (pid, 启动时间) 缓存 ttl 秒
+非 Linux 平台改用 psutil.Process.memory_full_info()（Windows / macOS 可以得到 USS）
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import psutil
+
+MB = 1024 * 1024
+
+
+class MemoryFootprint(NamedTuple):
+    """进程的内存足迹（字节）"""
+    rss: int
+    pss: int
+    uss: int
+    swap_pss: int
+
+
+def parse_smaps_rollup(text: str) -> Optional[MemoryFootprint]:
+    """解析 smaps_rollup：'Pss:    1234 kB' 形式的行"""
+    values = {}
+    for line in text.splitlines():
+        key, _, rest = line.partition(':')
+        parts = rest.split()
+        if len(parts) == 2 and parts[1] == 'kB':
+            try:
+                values[key] = int(parts[0]) * 1024
+            except ValueError:
+                pass
+    if 'Rss' not in values or 'Pss' not in values:
+        return None
+    return MemoryFootprint(
+        rss=values['Rss'],
+        pss=values['Pss'],
+        uss=values.get('Private_Clean', 0) + values.get('Private_Dirty', 0),
+        swap_pss=values.get('SwapPss', 0),
+    )
+
+
+def read_footprint(pid: int, create_time: Optional[float] = None,
+                   proc_root: str = '/proc') -> Optional[MemoryFootprint]:
+    """
+    读取单个进程的内存足迹，进程不存在、无权限或 PID 已被复用（create_time 不一致）时返回 None
+    """
+    try:
+        proc = psutil.Process(pid)
+        if create_time and abs(proc.create_time() - create_time) > 0.01:
+            return None
+        if sys.platform.startswith('linux'):
+            with open(os.path.join(proc_root, str(pid), 'smaps_rollup')) as f:
+                return parse_smaps_rollup(f.read())
+        info = proc.memory_full_info()
+        uss = getattr(info, 'uss', info.rss)
+        return MemoryFootprint(rss=info.rss, pss=getattr(info, 'pss', uss), uss=uss,
+                               swap_pss=getattr(info, 'swap', 0))
+    except (OSError, psutil.Error):
+        return None
+
+
+class FootprintSampler:
+    """
+    带缓存的内存足迹采样
+    ttl: 缓存有效期（秒），同一进程（pid + 启动时间）在有效期内不重复读取
+    max_workers: 并行读取的线程数
+    reader: 替换 read_footprint(pid, create_time)（性能测试中使用模拟进程表）
+    """
+
+    def __init__(self, ttl: float = 30.0, max_workers: int = 4,
+                 reader: Optional[Callable[[int, Optional[float]], Optional[MemoryFootprint]]] = None):
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self._reader = reader or read_footprint
+        self._cache: Dict[Tuple[int, float], Tuple[float, Optional[MemoryFootprint]]] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.reads = 0      # 实际读取次数（缓存未命中）
+        self.hits = 0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='footprint')
+        return self._executor
+
+    def measure(self, candidates: List[Dict]) -> Dict[int, MemoryFootprint]:
+        """
+        取得一批进程（get_memory_hogs 返回的字典）的内存足迹，返回 pid -> 足迹（读不到的不在结果中）
+        """
+        now = time.monotonic()
+        result: Dict[int, MemoryFootprint] = {}
+        missing = []
+        with self._lock:
+            for key in [key for key, (ts, _) in self._cache.items() if now - ts > self.ttl]:
+                del self._cache[key]
+            for proc_info in candidates:
+                key = (proc_info['pid'], proc_info.get('create_time') or 0.0)
+                cached = self._cache.get(key)
+                if cached is None:
+                    missing.append(key)
+                    continue
+                self.hits += 1
+                if cached[1] is not None:
+                    result[key[0]] = cached[1]
+
+        if missing:
+            if len(missing) == 1:
+                footprints = [self._reader(*missing[0])]
+            else:
+                footprints = list(self._pool().map(lambda key: self._reader(*key), missing))
+            with self._lock:
+                self.reads += len(missing)
+                for key, footprint in zip(missing, footprints):
+                    # 读不到（无权限等）也缓存，避免每次清理都重复尝试
+                    self._cache[key] = (now, footprint)
+                    if footprint is not None:
+                        result[key[0]] = footprint
+        return result
+
+    def annotate(self, candidates: List[Dict]) -> List[Dict]:
+        """
+        给候选进程补充 pss_mb / uss_mb，并按 USS（结束后确定能回收的内存）从大到小重新排序
+        读不到足迹的进程按 RSS 计
+        """
+        footprints = self.measure(candidates)
+        for proc_info in candidates:
+            footprint = footprints.get(proc_info['pid'])
+            if footprint is not None:
+                proc_info['pss_mb'] = footprint.pss / MB
+                proc_info['uss_mb'] = footprint.uss / MB
+            else:
+                proc_info['pss_mb'] = proc_info['uss_mb'] = proc_info['memory_mb']
+        return sorted(candidates, key=lambda proc_info: proc_info['uss_mb'], reverse=True)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def create_footprint_sampler(config) -> FootprintSampler:
+    """按配置（ConfigManager）创建内存足迹采样器"""
+    return FootprintSampler(ttl=config.get('cleanup.footprint_ttl', 30.0),
+                            max_workers=config.get('cleanup.footprint_workers', 4))
+
+
+_sampler: Optional[FootprintSampler] = None
+_sampler_lock = threading.Lock()
+
+
+def get_footprint_sampler() -> FootprintSampler:
+    """获取全局内存足迹采样器（各清理器共享缓存）"""
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                from config.config_manager import config_manager
+                _sampler = create_footprint_sampler(config_manager)
+    return _sampler
@@ -0,0 +1,159 @@
+# 内存增长趋势预测
+import heapq
+import math
+from typing import Dict, Optional, Tuple
+
+from core.topk import KEY_MEMORY
+
+
+class TrendForecaster:
+    """
+    Holt 线性趋势（双指数平滑），支持不等间隔采样
+    每次 update 为 O(1)，维护平滑后的水平值和每秒斜率
+    """
+
+    def __init__(self, alpha: float = 0.3, beta: float = 0.1):
+        """
+        alpha: 水平值平滑系数，越大越跟随最新值
+        beta: 斜率平滑系数，越大对趋势变化越敏感
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.level: Optional[float] = None
+        self.slope = 0.0        # 每秒变化量
+        self.last_time: Optional[float] = None
+        self.samples = 0
+
+    def update(self, timestamp: float, value: float):
+        self.samples += 1
+        if self.level is None:
+            self.level = value
+            self.last_time = timestamp
+            return
+
+        dt = timestamp - self.last_time
+        if dt <= 0:
+            return
+
+        predicted = self.level + self.slope * dt
+        level = self.alpha * value + (1 - self.alpha) * predicted
+        self.slope = self.beta * (level - self.level) / dt + (1 - self.beta) * self.slope
+        self.level = level
+        self.last_time = timestamp
+
+    def forecast(self, seconds: float) -> Optional[float]:
+        """预测 seconds 秒后的值"""
+        if self.level is None:
+            return None
+        return self.level + self.slope * seconds
+
+    def time_to(self, threshold: float) -> Optional[float]:
+        """
+        预计多少秒后到达 threshold
+        已超过返回 0，趋势不上升返回 None
+        """
+        if self.level is None:
+            return None
+        if self.level >= threshold:
+            return 0.0
+        if self.slope <= 1e-9:
+            return None
+        return (threshold - self.level) / self.slope
+
+
+class MemoryForecaster:
+    """
+    整机内存使用率趋势 + 增长最快的若干进程的 RSS 趋势
+    - 整机趋势每个采样点 O(1)
+    - 进程趋势只跟踪固定数量的候选进程（按 RSS 选取，每 refresh_every 个采样点刷新一次），
+      候选从快照引擎增量维护的 Top-K 索引读取，每个采样点的开销与进程总数无关
+    """
+
+    def __init__(self, alpha: float = 0.3, beta: float = 0.1, min_samples: int = 10,
+                 track_processes: int = 5, refresh_every: int = 30, top_k=None):
+        """
+        min_samples: 趋势稳定前至少需要的采样数，不足时不做预测
+        track_processes: 跟踪的候选进程数量
+        refresh_every: 每隔多少个采样点重新选取候选进程
+        top_k: 快照引擎的 TopKTracker，为空（或落后于快照）时遍历快照选取
+        """
+        self.alpha = alpha
+        self.beta = beta
+        self.min_samples = min_samples
+        self.track_processes = track_processes
+        self.refresh_every = refresh_every
+        self.top_k = top_k
+
+        self.host = TrendForecaster(alpha, beta)
+        # pid -> (create_time, 进程名, RSS 趋势（MB）)
+        self._processes: Dict[int, Tuple[float, str, TrendForecaster]] = {}
+        self._since_refresh = refresh_every
+
+    def update(self, timestamp: float, memory_percent: float, snapshot=None):
+        """输入一个采样点，snapshot 为同一时刻的进程快照（可选）"""
+        self.host.update(timestamp, memory_percent)
+
+        if snapshot is None or not self.track_processes:
+            return
+
+        self._since_refresh += 1
+        if self._since_refresh >= self.refresh_every:
+            self._since_refresh = 0
+            self._refresh_candidates(snapshot)
+
+        for pid, (create_time, name, trend) in list(self._processes.items()):
+            record = snapshot.get(pid)
+            if record is None or record.create_time != create_time:
+                del self._processes[pid]
+                continue
+            trend.update(timestamp, record.rss / 1024 / 1024)
+
+    def _refresh_candidates(self, snapshot):
+        """保留仍在增长的进程，空位用当前 RSS 最大的进程补齐"""
+        keep = {pid: entry for pid, entry in self._processes.items()
+                if entry[2].slope > 0 or entry[2].samples < self.min_samples}
+        if len(keep) > self.track_processes:
+            keep = dict(heapq.nlargest(self.track_processes, keep.items(),
+                                       key=lambda item: item[1][2].slope))
+
+        free = self.track_processes - len(keep)
+        if free > 0:
+            if self.top_k is not None and self.top_k.generation >= snapshot.generation:
+                largest = self.top_k.top(free + len(keep), KEY_MEMORY)
+            else:
+                largest = heapq.nlargest(free + len(keep), snapshot.processes, key=lambda p: p.rss)
+            for record in largest:
+                if len(keep) >= self.track_processes:
+                    break
+                if record.pid not in keep:
+                    keep[record.pid] = (record.create_time, record.name,
+                                        TrendForecaster(self.alpha, self.beta))
+        self._processes = keep
+
+    def predict(self, threshold: float) -> Dict:
+        """
+        预测到达阈值的时间
+        返回 {'ready', 'memory_percent', 'slope_per_minute', 'seconds_to_threshold', 'top_growing'}
+        """
+        host = self.host
+        ready = host.samples >= self.min_samples
+        eta = host.time_to(threshold) if ready else None
+
+        growing = []
+        for pid, (_, name, trend) in self._processes.items():
+            if trend.samples >= self.min_samples and trend.slope > 0:
+                growing.append({
+                    'pid': pid,
+                    'name': name,
+                    'memory_mb': round(trend.level, 1),
+                    'growth_mb_per_minute': round(trend.slope * 60, 2)
+                })
+        growing.sort(key=lambda x: x['growth_mb_per_minute'], reverse=True)
+
+        return {
+            'ready': ready,
+            'memory_percent': round(host.level, 1) if host.level is not None else None,
+            'slope_per_minute': round(host.slope * 60, 3),
+            'seconds_to_threshold': None if eta is None or math.isinf(eta) else round(eta, 1),
+            'top_growing': growing
+        }
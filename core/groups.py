@@ -0,0 +1,263 @@
+# 应用进程组索引
+"""
+浏览器、IDE、Electron 应用往往由几十个进程组成，单个进程都不大，合起来却有几个 GB
+这里按父子关系把进程归入"应用树"，汇总每棵树的 RSS / CPU 占用，清理器可以按应用排序和处理
+
+- 从一个进程沿 ppid 向上找，直到父进程是边界进程（init / systemd / explorer.exe / shell 等启动器）
+  或不存在，最上面的那个进程即为应用的根，组以根进程的 PID 标识、以根进程的名字命名
+- 父进程的创建时间晚于子进程时说明 PID 已被复用，不视为父子关系（也避免了环）
+- 每代快照只按差异更新：新增 / 退出 / 变化的进程各自 O(1) 地调整所属组的汇总值；
+  只有子进程先于父进程出现、有子进程的进程退出、进程被过继（ppid 变化）时才移动对应的子树
+- 快照代数不连续时整体重建
+"""
+import threading
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Set
+
+from core.snapshot import ProcessRecord
+
+# 边界进程：由它们启动的进程各自成为独立的应用
+GROUP_BOUNDARIES = frozenset({
+    # 系统 / 会话启动器
+    'init', 'systemd', 'kthreadd', 'launchd', 'kernel_task', 'sshd', 'login', 'gdm', 'sddm',
+    'gnome-shell', 'plasmashell', 'kwin_x11', 'kwin_wayland', 'xfce4-session', 'tmux: server', 'screen',
+    'system', 'smss.exe', 'wininit.exe', 'winlogon.exe', 'services.exe', 'svchost.exe', 'explorer.exe',
+    'userinit.exe', 'sihost.exe', 'runtimebroker.exe',
+    # shell：从终端启动的每条命令是独立的应用
+    'sh', 'bash', 'zsh', 'fish', 'dash', 'cmd.exe', 'powershell.exe', 'pwsh.exe', 'conhost.exe',
+    'windowsterminal.exe', 'openconsole.exe',
+})
+
+
+class GroupSummary(NamedTuple):
+    """一个应用组在某一时刻的汇总"""
+    root: int                   # 根进程 PID
+    name: str                   # 根进程名
+    create_time: float          # 根进程创建时间
+    rss: int                    # 全部成员 RSS 之和（字节，共享页面会被重复计入）
+    cpu_percent: float
+    process_count: int
+    names: FrozenSet[str]       # 成员中出现过的进程名（用于整棵树的白名单判定）
+
+
+class _Group:
+    __slots__ = ('root', 'name', 'create_time', 'members', 'rss', 'cpu_percent', 'names')
+
+    def __init__(self, record: ProcessRecord):
+        self.root = record.pid
+        self.name = record.name
+        self.create_time = record.create_time
+        self.members: Set[int] = set()
+        self.rss = 0
+        self.cpu_percent = 0.0
+        self.names: Dict[str, int] = {}
+
+    def add(self, record: ProcessRecord):
+        self.members.add(record.pid)
+        self.rss += record.rss
+        self.cpu_percent += record.cpu_percent
+        self.names[record.name] = self.names.get(record.name, 0) + 1
+
+    def discard(self, record: ProcessRecord):
+        self.members.discard(record.pid)
+        self.rss -= record.rss
+        self.cpu_percent -= record.cpu_percent
+        count = self.names.get(record.name, 0) - 1
+        if count > 0:
+            self.names[record.name] = count
+        else:
+            self.names.pop(record.name, None)
+
+    def summary(self) -> GroupSummary:
+        return GroupSummary(self.root, self.name, self.create_time, self.rss,
+                            round(max(self.cpu_percent, 0.0), 1), len(self.members), frozenset(self.names))
+
+
+class ProcessGroupIndex:
+    """
+    增量维护的应用组索引
+    boundaries: 边界进程名（小写），由它们启动的进程各自成为组的根
+    """
+
+    def __init__(self, boundaries: FrozenSet[str] = GROUP_BOUNDARIES):
+        self.boundaries = frozenset(name.lower() for name in boundaries)
+        self.generation = 0
+        self._records: Dict[int, ProcessRecord] = {}
+        self._children: Dict[int, Set[int]] = {}    # ppid -> 子进程 PID（父进程可能不在表中）
+        self._root_of: Dict[int, int] = {}
+        self._groups: Dict[int, _Group] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def apply(self, snapshot):
+        """用新一代快照更新索引"""
+        with self._lock:
+            delta = snapshot.delta
+            if delta is None or snapshot.generation != self.generation + 1:
+                self._rebuild(snapshot.processes)
+            else:
+                for record in delta.removed:
+                    self._remove(record)
+                for record in delta.changed:
+                    self._update(record)
+                for record in delta.added:
+                    self._insert(record)
+            self.generation = snapshot.generation
+
+    # ---------- 维护 ----------
+
+    def _rebuild(self, processes):
+        self._records = {}
+        self._children = {}
+        self._root_of = {}
+        self._groups = {}
+        # 按创建时间插入，父进程总是先于子进程，不需要移动子树
+        for record in sorted(processes, key=lambda p: p.create_time):
+            self._insert(record)
+
+    def _is_boundary(self, record: ProcessRecord) -> bool:
+        return record.pid <= 1 or record.name.lower() in self.boundaries
+
+    def _parent(self, record: ProcessRecord) -> Optional[ProcessRecord]:
+        """归组意义上的父进程：不存在、是边界进程或比子进程新（PID 被复用）时为 None"""
+        parent = self._records.get(record.ppid)
+        if (parent is None or parent.pid == record.pid or self._is_boundary(parent)
+                or parent.create_time >= record.create_time):
+            return None
+        return parent
+
+    def _find_root(self, record: ProcessRecord) -> int:
+        parent = self._parent(record)
+        if parent is None:
+            return record.pid
+        root = self._root_of.get(parent.pid, parent.pid)
+        return record.pid if root == record.pid else root
+
+    def _attach(self, record: ProcessRecord, root: int):
+        self._root_of[record.pid] = root
+        group = self._groups.get(root)
+        if group is None:
+            group = self._groups[root] = _Group(self._records.get(root, record))
+        group.add(record)
+
+    def _detach(self, record: ProcessRecord) -> Optional[_Group]:
+        root = self._root_of.pop(record.pid, None)
+        group = self._groups.get(root)
+        if group is None:
+            return None
+        group.discard(record)
+        if not group.members:
+            del self._groups[root]
+        return group
+
+    def _insert(self, record: ProcessRecord):
+        self._records[record.pid] = record
+        self._children.setdefault(record.ppid, set()).add(record.pid)
+        root = self._find_root(record)
+        self._attach(record, root)
+
+        # 子进程先于父进程出现（同一代中顺序颠倒）：把已经自成一组的子进程并入
+        if not self._is_boundary(record):
+            for child in list(self._children.get(record.pid, ())):
+                child_record = self._records.get(child)
+                if (child_record is not None and child != record.pid and self._root_of.get(child) == child
+                        and self._find_root(child_record) == root):
+                    self._move_subtree(child, root)
+
+    def _move_subtree(self, top: int, new_root: int):
+        """把以 top 为根的组整体并入 new_root"""
+        old_root = self._root_of.get(top)
+        if old_root == new_root:
+            return
+        stack = [top]
+        while stack:
+            pid = stack.pop()
+            record = self._records.get(pid)
+            if record is None or self._root_of.get(pid) != old_root:
+                continue
+            self._detach(record)
+            self._attach(record, new_root)
+            stack.extend(child for child in self._children.get(pid, ())
+                         if child in self._records and self._parent(self._records[child]) is record)
+
+    def _remove(self, record: ProcessRecord):
+        current = self._records.pop(record.pid, None)
+        if current is None:
+            return
+        siblings = self._children.get(current.ppid)
+        if siblings is not None:
+            siblings.discard(current.pid)
+            if not siblings:
+                del self._children[current.ppid]
+
+        self._detach(current)
+        # 父进程不在了，留在表中的子进程各自成为新应用的根（连同子树）；
+        # 之后若被过继，会以 ppid 变化的形式出现在 changed 中
+        for child in list(self._children.get(current.pid, ())):
+            if child in self._records and self._root_of.get(child) != child:
+                self._move_subtree(child, child)
+
+    def _update(self, record: ProcessRecord):
+        old = self._records.get(record.pid)
+        if old is None or old.create_time != record.create_time:
+            if old is not None:
+                self._remove(old)
+            self._insert(record)
+            return
+        if old.ppid != record.ppid or self._is_boundary(old) != self._is_boundary(record):
+            # 被过继（父进程退出后由 init / subreaper 接管）或 exec 成了边界进程（反之亦然），连同子树重新归组
+            subtree = [self._records[pid] for pid in self._descendants(record.pid)]
+            for descendant in reversed(subtree):
+                self._remove(descendant)
+            self._remove(old)
+            for moved in [record] + sorted(subtree, key=lambda p: p.create_time):
+                self._insert(moved)
+            return
+
+        self._records[record.pid] = record
+        group = self._groups.get(self._root_of.get(record.pid))
+        if group is not None:
+            group.discard(old)
+            group.add(record)
+            if record.pid == group.root:
+                group.name = record.name
+
+    def _descendants(self, pid: int) -> List[int]:
+        """pid 的全部后代（广度优先，父进程在前）"""
+        result = []
+        queue = [pid]
+        seen = {pid}
+        while queue:
+            current = queue.pop(0)
+            for child in self._children.get(current, ()):
+                if child not in seen and child in self._records and self._parent(self._records[child]) is not None:
+                    seen.add(child)
+                    result.append(child)
+                    queue.append(child)
+        return result
+
+    # ---------- 查询 ----------
+
+    def top(self, k: Optional[int] = None, minimum: Optional[int] = None) -> List[GroupSummary]:
+        """按 RSS 之和从大到小返回应用组，minimum 为最小 RSS（字节）"""
+        with self._lock:
+            groups = [group for group in self._groups.values() if minimum is None or group.rss > minimum]
+            groups.sort(key=lambda group: group.rss, reverse=True)
+            return [group.summary() for group in groups[:k]]
+
+    def group_of(self, pid: int) -> Optional[GroupSummary]:
+        """进程所在的应用组"""
+        with self._lock:
+            group = self._groups.get(self._root_of.get(pid))
+            return group.summary() if group is not None else None
+
+    def members(self, root: int) -> List[ProcessRecord]:
+        """应用组的成员，根进程在前，其余按创建时间排列"""
+        with self._lock:
+            group = self._groups.get(root)
+            if group is None:
+                return []
+            records = [self._records[pid] for pid in group.members]
+        records.sort(key=lambda p: (p.pid != root, p.create_time))
+        return records
@@ -0,0 +1,294 @@
+# 热点路径计时与自身开销统计
+"""
+轻量的进程内计时器 / 计数器，用来回答"memwatch 自己花了多少 CPU 和内存、每个阶段多长时间"
+
+- timed(name) 装饰器和 timer(name) 上下文管理器用单调时钟计时，结果记入固定分桶的直方图
+- count(name) 累加计数器
+- 默认关闭：关闭时装饰器只多一次全局变量判断，timer() 返回共享的空上下文
+- report() 汇总直方图、计数器和自身 CPU / RSS，供 get_status()、命令行和 GUI 显示
+- budgets 设置各计时器 p95 的预算（毫秒），例如 {'monitor.tick': 5}，超出时在报告中标记
+
+本模块导入时只依赖标准库，快照引擎等底层模块可以直接使用
+"""
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 直方图分桶上界（微秒），1-2-5 序列，覆盖 1µs ~ 10s
+BUCKET_BOUNDS_US = tuple(m * 10 ** e for e in range(7) for m in (1, 2, 5)) + (10_000_000,)
+
+_enabled = os.environ.get('MEMWATCH_INSTRUMENT', '') not in ('', '0')
+_budgets: Dict[str, float] = {}
+_started = time.monotonic()
+_started_cpu = time.process_time()
+
+
+class Histogram:
+    """耗时直方图：固定分桶计数，另记次数、总和、最小 / 最大值（纳秒）"""
+    __slots__ = ('name', 'count', 'total', 'min', 'max', 'buckets', '_lock')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+        self.buckets = [0] * (len(BUCKET_BOUNDS_US) + 1)    # 最后一个桶收纳超出上界的值
+        self._lock = threading.Lock()
+
+    def record(self, elapsed_ns: int):
+        index = bisect_left(BUCKET_BOUNDS_US, elapsed_ns / 1000)
+        with self._lock:
+            if self.count == 0 or elapsed_ns < self.min:
+                self.min = elapsed_ns
+            if elapsed_ns > self.max:
+                self.max = elapsed_ns
+            self.count += 1
+            self.total += elapsed_ns
+            self.buckets[index] += 1
+
+    def quantile(self, q: float) -> float:
+        """估算分位数（毫秒）：在所在分桶内线性插值，并限制在实际最小 / 最大值之间"""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = q * self.count
+            seen = 0
+            for index, n in enumerate(self.buckets):
+                if n and seen + n >= rank:
+                    break
+                seen += n
+            lower = BUCKET_BOUNDS_US[index - 1] * 1000 if index > 0 else 0
+            upper = BUCKET_BOUNDS_US[index] * 1000 if index < len(BUCKET_BOUNDS_US) else self.max
+            value = lower + (upper - lower) * max(0.0, rank - seen) / n
+            return min(max(value, self.min), self.max) / 1e6
+
+    def summary(self) -> Dict:
+        count = self.count
+        return {
+            'count': count,
+            'total_ms': round(self.total / 1e6, 3),
+            'mean_ms': round(self.total / count / 1e6, 4) if count else 0.0,
+            'min_ms': round(self.min / 1e6, 4),
+            'p50_ms': round(self.quantile(0.5), 4),
+            'p95_ms': round(self.quantile(0.95), 4),
+            'p99_ms': round(self.quantile(0.99), 4),
+            'max_ms': round(self.max / 1e6, 4),
+        }
+
+    def reset(self):
+        with self._lock:
+            self.count = self.total = self.min = self.max = 0
+            self.buckets = [0] * len(self.buckets)
+
+
+_histograms: Dict[str, Histogram] = {}
+_counters: Dict[str, int] = {}
+_registry_lock = threading.Lock()
+
+
+def histogram(name: str) -> Histogram:
+    """取得（必要时创建）指定名字的直方图"""
+    hist = _histograms.get(name)
+    if hist is None:
+        with _registry_lock:
+            hist = _histograms.setdefault(name, Histogram(name))
+    return hist
+
+
+# ---------- 开关 ----------
+
+def enable(flag: bool = True):
+    global _enabled
+    _enabled = bool(flag)
+
+
+def disable():
+    enable(False)
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_budgets(budgets: Optional[Dict[str, float]]):
+    """设置计时器 p95 预算（毫秒）"""
+    global _budgets
+    _budgets = {name: float(ms) for name, ms in (budgets or {}).items()}
+
+
+def configure(config) -> bool:
+    """按配置（ConfigManager）打开 / 关闭统计并设置预算，返回是否开启"""
+    enable(config.get('instrumentation.enabled', False))
+    set_budgets(config.get('instrumentation.budgets_ms', {}))
+    return _enabled
+
+
+def reset():
+    """清空全部直方图和计数器"""
+    with _registry_lock:
+        for hist in _histograms.values():
+            hist.reset()
+        _counters.clear()
+
+
+# ---------- 计时 / 计数 ----------
+
+def timed(name: str) -> Callable:
+    """函数计时装饰器，统计关闭时直接调用原函数"""
+    def decorate(func):
+        hist = histogram(name)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                hist.record(time.perf_counter_ns() - start)
+
+        return wrapper
+    return decorate
+
+
+class _Timer:
+    __slots__ = ('hist', 'start')
+
+    def __init__(self, hist: Histogram):
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.record(time.perf_counter_ns() - self.start)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timer(name: str):
+    """代码块计时：with timer('scheduler.loop'): ..."""
+    if not _enabled:
+        return _NULL_TIMER
+    return _Timer(histogram(name))
+
+
+def count(name: str, n: int = 1):
+    if not _enabled:
+        return
+    with _registry_lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+# ---------- 汇总 ----------
+
+def _self_rss() -> int:
+    """当前进程的常驻内存（字节）"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return 0
+
+
+def self_usage() -> Dict:
+    """memwatch 自身的资源占用：启动以来的 CPU 时间、平均 CPU 占用、线程数和 RSS"""
+    wall = time.monotonic() - _started
+    cpu = time.process_time() - _started_cpu
+    return {
+        'uptime_seconds': round(wall, 1),
+        'cpu_seconds': round(cpu, 3),
+        'cpu_percent': round(cpu / wall * 100, 2) if wall > 0 else 0.0,
+        'threads': threading.active_count(),
+        'rss_mb': round(_self_rss() / 1024 / 1024, 1),
+    }
+
+
+def over_budget() -> List[Tuple[str, float, float]]:
+    """超出预算的计时器：[(名字, p95 毫秒, 预算毫秒)]"""
+    result = []
+    for name, budget in _budgets.items():
+        hist = _histograms.get(name)
+        if hist is not None and hist.count:
+            p95 = hist.quantile(0.95)
+            if p95 > budget:
+                result.append((name, p95, budget))
+    return result
+
+
+def report() -> Dict:
+    """全部统计数据（可直接序列化为 JSON）"""
+    with _registry_lock:
+        histograms = sorted(_histograms.items())
+        counters = dict(sorted(_counters.items()))
+    return {
+        'enabled': _enabled,
+        'self': self_usage(),
+        'timers': {name: hist.summary() for name, hist in histograms if hist.count},
+        'counters': counters,
+        'budgets_ms': dict(_budgets),
+        'over_budget': [name for name, _, _ in over_budget()],
+    }
+
+
+def format_report(data: Optional[Dict] = None) -> List[str]:
+    """把 report() 的结果格式化为若干行文字（命令行和 GUI 共用）"""
+    data = data or report()
+    usage = data['self']
+    lines = [
+        f"⚙️ 自身开销: CPU {usage['cpu_seconds']:.2f} 秒 (平均 {usage['cpu_percent']:.2f}%), "
+        f"RSS {usage['rss_mb']:.1f} MB, 线程 {usage['threads']}"
+    ]
+    if not data['enabled']:
+        lines.append("ℹ️ 性能统计未开启（配置 instrumentation.enabled 或环境变量 MEMWATCH_INSTRUMENT=1）")
+        return lines
+
+    if data['timers']:
+        lines.append(f"{'阶段':<24}{'次数':>8}{'平均ms':>10}{'p50':>9}{'p95':>9}{'p99':>9}{'最大':>9}")
+    for name, s in data['timers'].items():
+        budget = data['budgets_ms'].get(name)
+        mark = ''
+        if budget is not None:
+            mark = f"  ⚠️ 超出预算 {budget:g}ms" if name in data['over_budget'] else f"  ✅ 预算 {budget:g}ms"
+        lines.append(f"{name:<24}{s['count']:>8}{s['mean_ms']:>10.3f}{s['p50_ms']:>9.3f}"
+                     f"{s['p95_ms']:>9.3f}{s['p99_ms']:>9.3f}{s['max_ms']:>9.3f}{mark}")
+    for name, value in data['counters'].items():
+        lines.append(f"{name:<24}{value:>8}")
+    return lines
+
+
+if __name__ == '__main__':
+    enable()
+    set_budgets({'demo.sleep': 1})
+
+    @timed('demo.sleep')
+    def demo():
+        time.sleep(0.002)
+
+    for _ in range(20):
+        demo()
+        count('demo.calls')
+    print("\n".join(format_report()))
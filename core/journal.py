@@ -0,0 +1,451 @@
+# 监控数据日志（内存映射，定长二进制记录）
+import mmap
+import os
+import queue
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:     # numpy 为可选依赖
+    np = None
+
+# 记录的指标列，顺序即二进制布局顺序
+JOURNAL_COLUMNS = ('memory_percent', 'cpu_percent', 'memory_used_gb',
+                   'memory_available_gb', 'process_count')
+
+# 文件头：魔数、版本、记录类型、记录数、首条时间、末条时间，补齐到 64 字节
+HEADER = struct.Struct('<4sHHQdd')
+HEADER_SIZE = 64
+MAGIC = b'MWJ1'
+VERSION = 1
+
+KIND_RAW = 0          # 原始采样：时间戳 + 各指标
+KIND_AGGREGATE = 1    # 降采样聚合：时间戳 + 各指标的平均值和最大值
+
+RECORD_FORMATS = {
+    KIND_RAW: struct.Struct('<d' + 'f' * len(JOURNAL_COLUMNS)),
+    KIND_AGGREGATE: struct.Struct('<d' + 'f' * len(JOURNAL_COLUMNS) * 2),
+}
+
+FILE_SUFFIX = '.mwj'
+
+
+def _journal_values(stats: Dict) -> Tuple[float, ...]:
+    """把一次采样转换为原始记录（时间戳 + JOURNAL_COLUMNS）"""
+    return (stats['timestamp'],) + tuple(float(stats.get(c, 0.0)) for c in JOURNAL_COLUMNS)
+
+
+def _record_fields(kind: int) -> Tuple[str, ...]:
+    if kind == KIND_RAW:
+        return ('timestamp',) + JOURNAL_COLUMNS
+    return (('timestamp',) + tuple(f'{c}_mean' for c in JOURNAL_COLUMNS)
+            + tuple(f'{c}_max' for c in JOURNAL_COLUMNS))
+
+
+class JournalFile:
+    """
+    单个定长记录文件，创建时预分配到固定大小，通过内存映射读写
+    """
+
+    def __init__(self, path: str, kind: int = KIND_RAW, size: int = 4 * 1024 * 1024,
+                 writable: bool = False):
+        self.path = path
+        self.record = RECORD_FORMATS[kind]
+        self.kind = kind
+        self.writable = writable
+
+        if writable and not os.path.exists(path):
+            with open(path, 'wb') as f:
+                f.truncate(size)
+                f.write(HEADER.pack(MAGIC, VERSION, kind, 0, 0.0, 0.0))
+
+        self._file = open(path, 'r+b' if writable else 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0,
+                             access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+
+        magic, version, file_kind, self.count, self.first_ts, self.last_ts = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or file_kind != kind:
+            self.close()
+            raise ValueError(f"不是有效的日志文件: {path}")
+
+        self.capacity = (len(self._mm) - HEADER_SIZE) // self.record.size
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+    def append(self, values: Sequence[float]):
+        """写入一条记录（先写记录，再更新文件头中的记录数）"""
+        offset = HEADER_SIZE + self.count * self.record.size
+        self.record.pack_into(self._mm, offset, *values)
+        self.count += 1
+        self.last_ts = values[0]
+        if self.count == 1:
+            self.first_ts = values[0]
+        HEADER.pack_into(self._mm, 0, MAGIC, VERSION, self.kind,
+                         self.count, self.first_ts, self.last_ts)
+
+    def refresh(self):
+        """重新读取文件头（文件可能正被其他进程写入）"""
+        _, _, _, self.count, self.first_ts, self.last_ts = HEADER.unpack_from(self._mm, 0)
+
+    def timestamp_at(self, index: int) -> float:
+        return struct.unpack_from('<d', self._mm, HEADER_SIZE + index * self.record.size)[0]
+
+    def bisect(self, ts: float) -> int:
+        """二分查找第一条时间戳 >= ts 的记录下标"""
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.timestamp_at(mid) < ts:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def read(self, start: int, end: int) -> List[tuple]:
+        """读取 [start, end) 范围的记录"""
+        begin = HEADER_SIZE + start * self.record.size
+        stop = HEADER_SIZE + end * self.record.size
+        return list(self.record.iter_unpack(self._mm[begin:stop]))
+
+    def read_array(self, start: int, end: int):
+        """以 numpy 结构化数组读取（零解析）"""
+        dtype = np.dtype([('timestamp', '<f8')] +
+                         [(name, '<f4') for name in _record_fields(self.kind)[1:]])
+        return np.frombuffer(self._mm, dtype=dtype, count=end - start,
+                             offset=HEADER_SIZE + start * self.record.size).copy()
+
+    def flush(self):
+        if self.writable:
+            self._mm.flush()
+
+    def close(self):
+        try:
+            self._mm.close()
+        finally:
+            self._file.close()
+
+
+class MetricsJournal:
+    """
+    只追加的监控数据日志
+    - 每个文件大小固定，写满后滚动到新文件，文件名为首条记录的时间戳
+    - append() 只把数据放入队列，由后台线程写入，永远不会阻塞监控循环
+    - read_range() 按时间范围二分定位，随机访问读取
+    - compact() 把较旧的原始 1 秒数据降采样为 1 分钟聚合
+    """
+
+    def __init__(self, directory: str = 'data/journal', file_size_mb: float = 4,
+                 compact_after_hours: float = 24, queue_size: int = 1024):
+        """
+        directory: 日志目录，原始数据在 raw/，聚合数据在 1m/
+        file_size_mb: 单个文件大小，写满后滚动
+        compact_after_hours: 滚动文件时，把早于该时长的原始数据压缩为聚合数据（0 表示不压缩）
+        """
+        self.directory = Path(directory)
+        self.compact_after = compact_after_hours * 3600
+        self.raw_dir = self.directory / 'raw'
+        self.aggregate_dir = self.directory / '1m'
+        self.file_size = int(file_size_mb * 1024 * 1024)
+
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._writer: Optional[threading.Thread] = None
+        self._current: Optional[JournalFile] = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    # ---- 写入 ----
+
+    def open(self):
+        """创建日志目录（由调用方自己调度 write() 时使用，不启动写入线程）"""
+        self.raw_dir.mkdir(parents=True, exist_ok=True)
+        self.aggregate_dir.mkdir(parents=True, exist_ok=True)
+
+    def start(self):
+        """启动后台写入线程"""
+        if self._writer and self._writer.is_alive():
+            return
+        self.open()
+        self._writer = threading.Thread(target=self._writer_loop, daemon=True, name="MetricsJournal")
+        self._writer.start()
+
+    def stop(self):
+        """写完队列中剩余的数据后停止"""
+        if self._writer and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5)
+        with self._lock:
+            if self._current:
+                self._current.flush()
+                self._current.close()
+                self._current = None
+
+    def append(self, stats: Dict):
+        """记录一次采样（非阻塞，队列满时丢弃并计数）"""
+        try:
+            self._queue.put_nowait(_journal_values(stats))
+        except queue.Full:
+            self.dropped += 1
+
+    def write(self, stats: Dict):
+        """同步写入一次采样（asyncio 监控核心在线程池中调用，代替写入线程）"""
+        try:
+            self._write_values(_journal_values(stats))
+        except Exception as e:
+            print(f"❌ 写入监控日志失败: {e}")
+
+    def _writer_loop(self):
+        while True:
+            values = self._queue.get()
+            if values is None:
+                break
+            try:
+                self._write_values(values)
+            except Exception as e:
+                print(f"❌ 写入监控日志失败: {e}")
+
+    def _write_values(self, values: Tuple[float, ...]):
+        with self._lock:
+            rotated = self._write(values)
+        # 压缩也在写入线程中进行，不影响监控循环
+        if rotated and self.compact_after > 0:
+            self.compact(self.compact_after)
+
+    def _write(self, values: Tuple[float, ...]) -> bool:
+        """写入一条记录，发生文件滚动时返回 True"""
+        current = self._current
+        rotated = current is None or current.is_full
+        if rotated:
+            if current is not None:
+                current.flush()
+                current.close()
+            path = self.raw_dir / f"{values[0]:.3f}{FILE_SUFFIX}"
+            current = self._current = JournalFile(str(path), KIND_RAW, self.file_size, writable=True)
+        current.append(values)
+        return rotated
+
+    # ---- 读取 ----
+
+    def _files(self, directory: Path) -> List[Tuple[float, Path]]:
+        if not directory.exists():
+            return []
+        files = []
+        for path in directory.iterdir():
+            if path.suffix == FILE_SUFFIX:
+                try:
+                    files.append((float(path.stem), path))
+                except ValueError:
+                    continue
+        return sorted(files)
+
+    def read_range(self, start: float, end: float, aggregated: bool = False,
+                   as_array: bool = False):
+        """
+        读取 [start, end) 时间范围内的记录
+        aggregated: 读取 1 分钟聚合数据
+        as_array: 返回 numpy 结构化数组（需要安装 numpy），否则返回元组列表
+        """
+        kind = KIND_AGGREGATE if aggregated else KIND_RAW
+        files = self._files(self.aggregate_dir if aggregated else self.raw_dir)
+        chunks = []
+
+        for i, (file_start, path) in enumerate(files):
+            # 文件按起始时间排序，下一个文件的起始时间就是本文件的上界
+            next_start = files[i + 1][0] if i + 1 < len(files) else float('inf')
+            if next_start <= start or file_start >= end:
+                continue
+
+            try:
+                journal_file = JournalFile(str(path), kind)
+            except (OSError, ValueError):
+                continue
+            try:
+                lo = journal_file.bisect(start)
+                hi = journal_file.bisect(end)
+                if hi > lo:
+                    if as_array and np is not None:
+                        chunks.append(journal_file.read_array(lo, hi))
+                    else:
+                        chunks.extend(journal_file.read(lo, hi))
+            finally:
+                journal_file.close()
+
+        if as_array and np is not None:
+            if not chunks:
+                return np.empty(0, dtype=[('timestamp', '<f8')] +
+                                [(n, '<f4') for n in _record_fields(kind)[1:]])
+            return np.concatenate(chunks)
+        return chunks
+
+    def fields(self, aggregated: bool = False) -> Tuple[str, ...]:
+        """read_range 返回记录中各字段的名称"""
+        return _record_fields(KIND_AGGREGATE if aggregated else KIND_RAW)
+
+    # ---- 压缩 ----
+
+    def compact(self, older_than: float = 24 * 3600, bucket_seconds: int = 60) -> int:
+        """
+        把早于 older_than 秒的原始数据文件降采样为聚合数据，并删除原始文件
+        一个时间桶可能跨越相邻的两个原始文件，未完结的桶带到下一个文件一起计算；
+        最后一个桶若延续到不压缩的文件（或 cutoff 之后），该文件留到下次压缩
+        返回处理的文件数
+        """
+        cutoff = time.time() - older_than
+        eligible = []               # (路径, 首条时间, 末条时间)
+        following = cutoff          # 不压缩的数据中最早的时间
+        for _, path in self._files(self.raw_dir):
+            with self._lock:
+                current = self._current is not None and Path(self._current.path) == path
+            source = JournalFile(str(path), KIND_RAW)
+            try:
+                count, first_ts, last_ts = source.count, source.first_ts, source.last_ts
+            finally:
+                source.close()
+            if not count:
+                continue
+            if current or last_ts >= cutoff:
+                following = min(following, first_ts)
+                break
+            eligible.append((path, first_ts, last_ts))
+
+        # 最后一个桶还没有完结时，对应的文件留到下次（可能连续几个文件都落在同一个桶里）
+        while eligible and _bucket_of(eligible[-1][2], bucket_seconds) + bucket_seconds > following:
+            following = eligible.pop()[1]
+        if not eligible:
+            return 0
+
+        self.aggregate_dir.mkdir(parents=True, exist_ok=True)
+        carry: List[tuple] = []     # 未完结的桶中的原始记录
+        pending: List[Tuple[Path, float]] = []
+        compacted = 0
+        for index, (path, _, last_ts) in enumerate(eligible):
+            source = JournalFile(str(path), KIND_RAW)
+            try:
+                records = carry + source.read(0, source.count)
+            finally:
+                source.close()
+
+            carry = []
+            if index < len(eligible) - 1:
+                # 最后一个桶可能延续到下一个文件，先不输出
+                open_bucket = _bucket_of(records[-1][0], bucket_seconds)
+                split = len(records)
+                while split and _bucket_of(records[split - 1][0], bucket_seconds) == open_bucket:
+                    split -= 1
+                records, carry = records[:split], records[split:]
+
+            aggregates = _downsample(records, bucket_seconds)
+            if aggregates:
+                self._append_aggregates(aggregates)
+
+            # 数据已全部写入聚合文件的原始文件才能删除
+            pending.append((path, last_ts))
+            carry_start = carry[0][0] if carry else float('inf')
+            for done_path, done_last in [entry for entry in pending if entry[1] < carry_start]:
+                os.remove(done_path)
+                pending.remove((done_path, done_last))
+                compacted += 1
+
+        return compacted
+
+    def _append_aggregates(self, aggregates: List[tuple]):
+        files = self._files(self.aggregate_dir)
+        target = None
+        if files:
+            target = JournalFile(str(files[-1][1]), KIND_AGGREGATE, writable=True)
+        try:
+            for values in aggregates:
+                if target is None or target.is_full:
+                    if target is not None:
+                        target.close()
+                    path = self.aggregate_dir / f"{values[0]:.3f}{FILE_SUFFIX}"
+                    target = JournalFile(str(path), KIND_AGGREGATE, self.file_size, writable=True)
+                # 聚合数据只能按时间顺序追加
+                if target.count and values[0] <= target.last_ts:
+                    continue
+                target.append(values)
+        finally:
+            if target is not None:
+                target.flush()
+                target.close()
+
+
+def _bucket_of(ts: float, bucket_seconds: int) -> int:
+    return int(ts // bucket_seconds) * bucket_seconds
+
+
+def _downsample(records: List[tuple], bucket_seconds: int) -> List[tuple]:
+    """按时间桶计算各指标的平均值和最大值"""
+    width = len(JOURNAL_COLUMNS)
+    result = []
+    bucket = None
+    sums = maxes = None
+    n = 0
+
+    def flush():
+        if n:
+            result.append((float(bucket),) + tuple(s / n for s in sums) + tuple(maxes))
+
+    for record in records:
+        key = _bucket_of(record[0], bucket_seconds)
+        if key != bucket:
+            flush()
+            bucket, n = key, 0
+            sums = [0.0] * width
+            maxes = [float('-inf')] * width
+        n += 1
+        for k in range(width):
+            value = record[k + 1]
+            sums[k] += value
+            if value > maxes[k]:
+                maxes[k] = value
+    flush()
+    return result
+
+
+def _parse_duration(text: str) -> float:
+    """解析 '90s'、'30m'、'12h'、'1d' 形式的时长"""
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Memwatch 监控日志工具")
+    parser.add_argument('--dir', default='data/journal', help="日志目录")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    replay = sub.add_parser('replay', help="回放一段时间的数据（CSV 输出）")
+    replay.add_argument('--since', default='1h', help="回放最近多长时间，如 30m、12h、1d")
+    replay.add_argument('--aggregated', action='store_true', help="读取 1 分钟聚合数据")
+
+    compact = sub.add_parser('compact', help="把旧数据降采样为 1 分钟聚合")
+    compact.add_argument('--older-than', default='1d', help="处理早于该时长的数据")
+
+    args = parser.parse_args(argv)
+    journal = MetricsJournal(args.dir)
+
+    if args.command == 'replay':
+        end = time.time()
+        records = journal.read_range(end - _parse_duration(args.since), end, args.aggregated)
+        print(','.join(journal.fields(args.aggregated)))
+        for record in records:
+            print(','.join(f'{v:.3f}' if isinstance(v, float) else str(v) for v in record))
+    elif args.command == 'compact':
+        count = journal.compact(_parse_duration(args.older_than))
+        print(f"✅ 已压缩 {count} 个日志文件")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
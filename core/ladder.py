@@ -0,0 +1,426 @@
+# 分级回收
+"""
+按代价从低到高逐级回收内存，每一级执行后重新测量可用内存，达到目标（低于阈值）即跳过其余级别
+
+    reclaim    cgroup memory.reclaim 回收冷的页缓存和匿名页（不影响任何进程）
+    demote     降低后台进程的优先级：nice / ionice，并提高 oom_score_adj，
+               内存紧张时内核优先回收 / 结束这些进程
+    pause      暂停后台进程（进程独占的 cgroup 用 freezer，否则 SIGSTOP），停止其继续分配内存，
+               其页面变冷后可以被回收；内存恢复或暂停超时后自动恢复
+    terminate  温和终止（TerminationPipeline，先请求关闭再等待，不强制结束）
+
+每一级的结果记录实际释放的内存（按前后可用内存之差测量）和耗时
+降级和暂停状态由全局的 ProcessThrottle 记录，调度器在内存恢复后恢复；
+没有调度器负责时（界面 / 命令行单次清理）由定时器在 max_pause_seconds 后恢复，
+memwatch 退出时（atexit、SIGTERM / SIGHUP）也会恢复
+"""
+import atexit
+import os
+import signal
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import psutil
+
+from core import instrumentation
+
+TIER_RECLAIM = 'reclaim'
+TIER_DEMOTE = 'demote'
+TIER_PAUSE = 'pause'
+TIER_TERMINATE = 'terminate'
+TIERS = (TIER_RECLAIM, TIER_DEMOTE, TIER_PAUSE, TIER_TERMINATE)
+
+TIER_NAMES = {
+    TIER_RECLAIM: '回收缓存',
+    TIER_DEMOTE: '降低优先级',
+    TIER_PAUSE: '暂停进程',
+    TIER_TERMINATE: '终止进程',
+}
+
+PAUSE_FREEZER = 'freezer'
+PAUSE_SIGNAL = 'signal'
+
+MB = 1024 * 1024
+
+
+class _Demoted(NamedTuple):
+    create_time: float
+    nice: Optional[int]
+    ionice: Optional[Tuple]
+    oom_score_adj: Optional[int]
+
+
+class _Paused(NamedTuple):
+    create_time: float
+    method: str
+    cgroup: Optional[str]       # freezer 暂停时进程所在的 cgroup 目录
+    since: float                # monotonic
+
+
+def _read_oom_score_adj(pid: int) -> Optional[int]:
+    try:
+        with open(f'/proc/{pid}/oom_score_adj') as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_oom_score_adj(pid: int, value: int) -> bool:
+    try:
+        with open(f'/proc/{pid}/oom_score_adj', 'w') as f:
+            f.write(str(value))
+        return True
+    except OSError:
+        return False
+
+
+class ProcessThrottle:
+    """
+    降级 / 暂停后台进程并记录原状态，之后可以恢复
+    进程用 (pid, create_time) 识别，PID 被复用时不会误操作新进程
+    cgroup_root: 查找 cgroup freezer 时使用的 cgroup v2 挂载点
+    """
+
+    def __init__(self, nice: int = 10, oom_score_adj: int = 500, pause_method: str = 'auto',
+                 max_pause_seconds: float = 300.0, cgroup_root: str = '/sys/fs/cgroup',
+                 process_factory: Optional[Callable] = None):
+        self.nice = nice
+        self.oom_score_adj = oom_score_adj
+        self.pause_method = pause_method
+        self.max_pause_seconds = max_pause_seconds
+        self.cgroup_root = cgroup_root
+        self._process = process_factory or psutil.Process
+
+        self.demoted: Dict[int, _Demoted] = {}
+        self.paused: Dict[int, _Paused] = {}
+        self._lock = threading.Lock()
+        self._owners = 0            # 负责按内存状态恢复的调度器数量
+        self._timer: Optional[threading.Timer] = None
+
+    # ---------- 负责恢复的一方 ----------
+
+    @property
+    def managed(self) -> bool:
+        """是否有调度器负责在内存恢复后恢复暂停 / 降级的进程"""
+        return self._owners > 0
+
+    def own(self):
+        """调度器启动时登记，此后由它按内存状态恢复"""
+        with self._lock:
+            self._owners += 1
+
+    def disown(self):
+        with self._lock:
+            self._owners = max(0, self._owners - 1)
+        self.expire_later()
+
+    def expire_later(self):
+        """没有调度器负责时，由定时器在暂停满 max_pause_seconds 后恢复进程"""
+        with self._lock:
+            if self._owners or not self.paused or self._timer is not None:
+                return
+            oldest = min(state.since for state in self.paused.values())
+            delay = max(0.0, oldest + self.max_pause_seconds - time.monotonic())
+            self._timer = threading.Timer(delay, self._on_expiry_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _on_expiry_timer(self):
+        with self._lock:
+            self._timer = None
+        self.resume_expired()
+        self.expire_later()
+
+    def _open(self, proc_info: Dict):
+        """取得进程对象，PID 已被复用时返回 None"""
+        proc = self._process(proc_info['pid'])
+        create_time = proc_info.get('create_time')
+        if create_time and abs(proc.create_time() - create_time) > 0.01:
+            return None
+        return proc
+
+    def _same(self, pid: int, create_time: float):
+        try:
+            proc = self._process(pid)
+            if create_time and abs(proc.create_time() - create_time) > 0.01:
+                return None
+            return proc
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+
+    # ---------- 降级 ----------
+
+    def demote(self, candidates: List[Dict]) -> List[Dict]:
+        """降低一批进程的 CPU / IO 优先级并提高 oom_score_adj，返回每个进程的处理结果"""
+        results = []
+        for proc_info in candidates:
+            outcome = {'pid': proc_info['pid'], 'name': proc_info['name'], 'ok': False}
+            results.append(outcome)
+            with self._lock:
+                if proc_info['pid'] in self.demoted:
+                    outcome['ok'] = True
+                    continue
+            try:
+                proc = self._open(proc_info)
+                if proc is None:
+                    continue
+                old_nice = proc.nice()
+                if sys.platform == 'win32':
+                    proc.nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+                elif old_nice < self.nice:
+                    proc.nice(self.nice)
+
+                old_ionice = None
+                if hasattr(proc, 'ionice') and hasattr(psutil, 'IOPRIO_CLASS_IDLE'):
+                    try:
+                        old_ionice = tuple(proc.ionice())
+                        proc.ionice(psutil.IOPRIO_CLASS_IDLE)
+                    except (psutil.AccessDenied, OSError):
+                        old_ionice = None
+
+                old_oom = _read_oom_score_adj(proc.pid)
+                if old_oom is not None and old_oom < self.oom_score_adj:
+                    # 提高 oom_score_adj 不需要特权
+                    _write_oom_score_adj(proc.pid, self.oom_score_adj)
+
+                with self._lock:
+                    self.demoted[proc.pid] = _Demoted(proc.create_time(), old_nice, old_ionice, old_oom)
+                outcome['ok'] = True
+            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                outcome['error'] = type(e).__name__
+        return results
+
+    def restore_priority(self, pids: Optional[List[int]] = None) -> int:
+        """恢复降级前的优先级（pids 为空时恢复全部），返回恢复的进程数"""
+        with self._lock:
+            targets = [(pid, self.demoted.pop(pid)) for pid in list(pids or self.demoted) if pid in self.demoted]
+        restored = 0
+        for pid, state in targets:
+            proc = self._same(pid, state.create_time)
+            if proc is None:
+                continue
+            try:
+                if state.nice is not None:
+                    proc.nice(state.nice)
+                if state.ionice is not None:
+                    proc.ionice(state.ionice[0], state.ionice[1])
+            except (psutil.NoSuchProcess, psutil.AccessDenied, OSError):
+                pass    # 非特权进程不能调回更高的优先级
+            if state.oom_score_adj is not None:
+                _write_oom_score_adj(pid, state.oom_score_adj)
+            restored += 1
+        return restored
+
+    # ---------- 暂停 ----------
+
+    def _own_cgroup(self, pid: int) -> Optional[str]:
+        """进程独占的 cgroup v2 目录（其中只有这一个进程，才能用 freezer 而不影响其他进程）"""
+        try:
+            with open(f'/proc/{pid}/cgroup') as f:
+                for line in f:
+                    if line.startswith('0::'):
+                        path = os.path.join(self.cgroup_root, line[3:].strip().lstrip('/'))
+                        break
+                else:
+                    return None
+            with open(os.path.join(path, 'cgroup.procs')) as f:
+                procs = f.read().split()
+        except OSError:
+            return None
+        if procs != [str(pid)] or not os.path.exists(os.path.join(path, 'cgroup.freeze')):
+            return None
+        return path
+
+    def _freeze(self, cgroup: str, frozen: bool) -> bool:
+        try:
+            with open(os.path.join(cgroup, 'cgroup.freeze'), 'w') as f:
+                f.write('1' if frozen else '0')
+            return True
+        except OSError:
+            return False
+
+    def pause(self, candidates: List[Dict]) -> List[Dict]:
+        """暂停一批进程，返回每个进程的处理结果（method 为 freezer 或 signal）"""
+        results = []
+        for proc_info in candidates:
+            outcome = {'pid': proc_info['pid'], 'name': proc_info['name'], 'ok': False, 'method': None}
+            results.append(outcome)
+            with self._lock:
+                if proc_info['pid'] in self.paused:
+                    outcome.update(ok=True, method=self.paused[proc_info['pid']].method)
+                    continue
+            try:
+                proc = self._open(proc_info)
+                if proc is None:
+                    continue
+                cgroup = self._own_cgroup(proc.pid) if self.pause_method in ('auto', PAUSE_FREEZER) else None
+                if cgroup is not None and self._freeze(cgroup, True):
+                    method = PAUSE_FREEZER
+                elif self.pause_method == PAUSE_FREEZER:
+                    outcome['error'] = '没有可用的 cgroup freezer'
+                    continue
+                else:
+                    cgroup = None
+                    proc.suspend()      # POSIX 下为 SIGSTOP
+                    method = PAUSE_SIGNAL
+                with self._lock:
+                    self.paused[proc.pid] = _Paused(proc.create_time(), method, cgroup, time.monotonic())
+                outcome.update(ok=True, method=method)
+            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
+                outcome['error'] = type(e).__name__
+        return results
+
+    def resume(self, pids: Optional[List[int]] = None) -> int:
+        """恢复暂停的进程（pids 为空时恢复全部），返回恢复的进程数"""
+        with self._lock:
+            targets = [(pid, self.paused.pop(pid)) for pid in list(pids or self.paused) if pid in self.paused]
+        resumed = 0
+        for pid, state in targets:
+            if state.method == PAUSE_FREEZER:
+                if self._freeze(state.cgroup, False):
+                    resumed += 1
+                continue
+            proc = self._same(pid, state.create_time)
+            if proc is None:
+                continue
+            try:
+                proc.resume()
+                resumed += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return resumed
+
+    def resume_expired(self) -> int:
+        """恢复暂停时间超过 max_pause_seconds 的进程"""
+        deadline = time.monotonic() - self.max_pause_seconds
+        with self._lock:
+            expired = [pid for pid, state in self.paused.items() if state.since <= deadline]
+        return self.resume(expired) if expired else 0
+
+    def release(self) -> Tuple[int, int]:
+        """内存恢复后撤销全部暂停和降级，返回 (恢复的进程数, 恢复优先级的进程数)"""
+        return self.resume(), self.restore_priority()
+
+    def info(self) -> Dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'demoted': sorted(self.demoted),
+                'paused': [{'pid': pid, 'method': state.method, 'seconds': round(now - state.since, 1)}
+                           for pid, state in sorted(self.paused.items())],
+            }
+
+
+class ReclamationLadder:
+    """
+    逐级执行回收动作并测量效果
+    memory: 返回当前系统内存（SystemMemory）的函数
+    settle: 不直接释放内存的级别（降级、暂停）执行后，等待内核回收再测量的时间（秒）
+    """
+
+    def __init__(self, memory: Callable, settle: float = 0.5):
+        self.memory = memory
+        self.settle = settle
+
+    def run(self, tiers: List[Tuple[str, Callable[[], Dict]]], threshold: float,
+            cancel: Optional[threading.Event] = None,
+            on_tier: Optional[Callable[[Dict], None]] = None) -> List[Dict]:
+        """
+        tiers: [(级别名, 动作)]，动作返回该级别的细节（如处理的进程数），按顺序执行
+        threshold: 目标内存使用率（%），达到后跳过其余级别
+        返回每一级的结果：freed_mb（前后可用内存之差）、elapsed_ms、skipped 及动作返回的细节
+        """
+        results = []
+        reached = False
+        for name, action in tiers:
+            entry = {'tier': name, 'freed_mb': 0.0, 'elapsed_ms': 0.0, 'skipped': False}
+            results.append(entry)
+
+            before = self.memory()
+            if reached or before.percent < threshold or (cancel is not None and cancel.is_set()):
+                reached = reached or before.percent < threshold
+                entry['skipped'] = True
+                continue
+
+            start = time.perf_counter()
+            with instrumentation.timer(f'cleaner.tier.{name}'):
+                try:
+                    details = action() or {}
+                except Exception as e:
+                    details = {'error': str(e)}
+                    print(f"❌ 回收级别 {name} 执行失败: {e}")
+                if name in (TIER_DEMOTE, TIER_PAUSE) and details.get('processes') and self.settle > 0:
+                    if cancel is not None:
+                        cancel.wait(self.settle)
+                    else:
+                        time.sleep(self.settle)
+            elapsed = time.perf_counter() - start
+
+            after = self.memory()
+            entry.update(details)
+            entry['freed_mb'] = round(max(0, after.available - before.available) / MB, 1)
+            entry['elapsed_ms'] = round(elapsed * 1000, 1)
+            entry['memory_percent'] = round(after.percent, 1)
+            reached = after.percent < threshold
+            if on_tier is not None:
+                on_tier(entry)
+        return results
+
+
+def create_throttle(config) -> ProcessThrottle:
+    """按配置（ConfigManager）创建降级 / 暂停控制器"""
+    return ProcessThrottle(
+        nice=config.get('ladder.demote_nice', 10),
+        oom_score_adj=config.get('ladder.demote_oom_score_adj', 500),
+        pause_method=config.get('ladder.pause_method', 'auto'),
+        max_pause_seconds=config.get('ladder.max_pause_seconds', 300.0),
+        cgroup_root=config.get('cgroup.root', '/sys/fs/cgroup')
+    )
+
+
+_throttle: Optional[ProcessThrottle] = None
+_throttle_lock = threading.Lock()
+
+
+def get_throttle() -> ProcessThrottle:
+    """获取全局降级 / 暂停控制器（所有清理器共享，保证暂停的进程总能被恢复）"""
+    global _throttle
+    if _throttle is None:
+        with _throttle_lock:
+            if _throttle is None:
+                from config.config_manager import config_manager
+                _throttle = create_throttle(config_manager)
+                # memwatch 退出时不能留下被暂停的进程
+                atexit.register(_throttle.release)
+                _install_signal_release(_throttle)
+    return _throttle
+
+
+def _install_signal_release(throttle: ProcessThrottle):
+    """
+    SIGTERM / SIGHUP 默认直接结束进程，不会执行 atexit：收到时先恢复暂停和降级的进程，
+    再交给原来的处理方式（原处理函数或默认动作）
+    只能在主线程中安装，其他线程中首次创建时跳过（仍有 atexit 和定时器兜底）
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for name in ('SIGTERM', 'SIGHUP'):
+        sig = getattr(signal, name, None)
+        if sig is None:
+            continue
+        previous = signal.getsignal(sig)
+
+        def handler(signum, frame, previous=previous):
+            throttle.release()
+            if callable(previous):
+                previous(signum, frame)
+            elif previous != signal.SIG_IGN:
+                signal.signal(signum, signal.SIG_DFL)
+                os.kill(os.getpid(), signum)
+
+        try:
+            signal.signal(sig, handler)
+        except (ValueError, OSError):
+            pass
@@ -0,0 +1,160 @@
+# 白名单匹配器
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick 多模式子串匹配自动机
+    构建一次后，单次匹配耗时只与文本长度有关，与模式数量无关
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 每个状态命中的模式下标（-1 表示无命中），沿失败链继承
+        self._output: List[int] = [-1]
+        self.patterns: List[str] = []
+
+        for pattern in patterns:
+            if pattern:
+                self._add(pattern)
+        self._build()
+
+    def _add(self, pattern: str):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(-1)
+            state = nxt
+        if self._output[state] < 0:
+            self._output[state] = len(self.patterns)
+        self.patterns.append(pattern)
+
+    def _build(self):
+        """广度优先计算失败指针"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                if self._output[nxt] < 0:
+                    self._output[nxt] = self._output[self._fail[nxt]]
+
+    def search(self, text: str) -> Optional[str]:
+        """返回 text 中命中的第一个模式，无命中返回 None"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if output[state] >= 0:
+                return self.patterns[output[state]]
+        return None
+
+
+class WhitelistMatcher:
+    """
+    编译后的进程保护规则
+    - 精确进程名走哈希集合
+    - 子串规则（系统关键进程 + 模式白名单）合并为每个模式一个自动机
+    - 判定结果按 (模式, 进程名) 缓存
+    """
+
+    def __init__(self, system_critical: Iterable[str], whitelists: Dict[str, Iterable[str]],
+                 cache_size: int = 4096):
+        self.system_critical = [p.lower() for p in system_critical if p]
+        self.whitelists = {mode: [p.lower() for p in names if p]
+                           for mode, names in whitelists.items()}
+        self.cache_size = cache_size
+
+        self._exact: Dict[str, frozenset] = {}
+        self._automata: Dict[str, AhoCorasick] = {}
+        self._cache: Dict[tuple, bool] = {}
+        self._lock = threading.Lock()
+
+    def _compile(self, mode: str):
+        whitelist = self.whitelists.get(mode, [])
+        patterns = self.system_critical + whitelist
+        self._exact[mode] = frozenset(patterns)
+        self._automata[mode] = AhoCorasick(patterns)
+
+    def protected_by(self, process_name: str, mode: str) -> Optional[str]:
+        """返回保护该进程的规则，不受保护时返回 None"""
+        if mode not in self._automata:
+            with self._lock:
+                if mode not in self._automata:
+                    self._compile(mode)
+
+        name = process_name.lower()
+        if name in self._exact[mode]:
+            return name
+        return self._automata[mode].search(name)
+
+    def tree_protected_by(self, names: Iterable[str], mode: str) -> Optional[str]:
+        """整棵应用树的判定：任何一个成员受保护，整棵树都受保护，返回第一个命中的进程名"""
+        for name in names:
+            if name and not self.is_safe_to_clean(name, mode):
+                return name
+        return None
+
+    def is_safe_to_clean(self, process_name: str, mode: str) -> bool:
+        """判断进程是否可以清理（带缓存）"""
+        key = (mode, process_name)
+        verdict = self._cache.get(key)
+        if verdict is None:
+            verdict = self.protected_by(process_name, mode) is None
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[key] = verdict
+        return verdict
+
+
+_matcher: Optional[WhitelistMatcher] = None
+_matcher_stale = True
+_matcher_rules: Optional[tuple] = None
+_matcher_lock = threading.Lock()
+
+
+def _on_config_changed(manager):
+    """配置变更事件：标记匹配器需要重新检查白名单"""
+    global _matcher_stale
+    _matcher_stale = True
+
+
+def get_whitelist_matcher() -> WhitelistMatcher:
+    """
+    获取按当前配置编译的匹配器
+    收到配置变更事件后检查白名单是否真的改变，只有白名单改变才重新编译
+    """
+    global _matcher, _matcher_stale, _matcher_rules
+
+    if _matcher is None or _matcher_stale:
+        with _matcher_lock:
+            if _matcher is None or _matcher_stale:
+                from config.config_manager import get_config_manager
+                config_manager = get_config_manager()
+                config_manager.add_change_listener(_on_config_changed)
+                # 先清除标记再读取配置，读取期间发生的变更会在下次调用时处理
+                _matcher_stale = False
+                rules = (
+                    tuple(config_manager.get_whitelist('system_critical')),
+                    tuple(config_manager.get_whitelist('office')),
+                    tuple(config_manager.get_whitelist('game')),
+                )
+                if rules != _matcher_rules:
+                    _matcher = WhitelistMatcher(rules[0], {'office': rules[1], 'game': rules[2]})
+                    _matcher_rules = rules
+    return _matcher
@@ -1,15 +1,17 @@
 import psutil
-import time
-from rich import print
-from rich.table import Table
+from core.snapshot import get_snapshot_engine
+from core.topk import KEY_CPU
 
 
-def get_cpu_usage():
+def get_cpu_usage(snapshot=None):
     """
     获取当前 CPU 使用率（整体）
-    interval=1 表示以 1 秒为间隔采样一次
+    由快照引擎根据与上一次采样的 CPU 时间差值计算，不再 sleep 等待采样间隔
+    还没有基线（首次采样）时返回 None
     """
-    return psutil.cpu_percent(interval=1)
+    if snapshot is None:
+        snapshot = get_snapshot_engine().get_snapshot()
+    return snapshot.cpu_percent if snapshot.cpu_ready else None
 
 def get_memory_info():
     """
@@ -24,49 +26,61 @@ def get_memory_info():
         "percent": mem.percent
     }
 
-def get_top_processes(limit=5):
+def _not_idle(record):
+    return record.name not in ("System Idle Process", "System")
+
+def get_top_processes(limit=5, snapshot=None):
     """
     获取当前系统中 CPU 占用最高的前几个进程（默认5个）。
     返回进程的 PID、名称、CPU 占用率、内存占用率。   
+    数据来自共享的进程快照，不再单独遍历进程表。
+    快照还没有 CPU 基线时返回空列表（调用方可通过 snapshot.cpu_ready 区分）。
     """
-    processes = []
-    skipped = 0
-
-    for proc in psutil.process_iter():
-        try:
-            proc.cpu_percent(interval=None)
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
+    engine = get_snapshot_engine()
 
-    time.sleep(1)
+    if snapshot is None:
+        snapshot = engine.get_snapshot()
+    if not snapshot.cpu_ready:
+        return []
 
-    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-        try:
-            pinfo = proc.info
+    total = snapshot.memory.total
+    top = []
 
-            if pinfo['cpu_percent'] > 0.1 and pinfo["name"] not in ("System Idle Process", "System"):
-                processes.append(proc.info)
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            skipped += 1
-            continue
+    if engine.top_k.generation >= snapshot.generation:
+        # 从增量 Top-K 索引直接取，不对全部进程排序
+        records = engine.top_k.top(limit, KEY_CPU, minimum=0.1, predicate=_not_idle)
+    else:
+        records = sorted((p for p in snapshot.processes if p.cpu_percent > 0.1 and _not_idle(p)),
+                         key=lambda p: p.cpu_percent, reverse=True)[:limit]
 
-    top = sorted(processes, key=lambda x: x['cpu_percent'], reverse=True)
+    for record in records:
+        top.append({
+            'pid': record.pid,
+            'name': record.name,
+            'cpu_percent': record.cpu_percent,
+            'memory_percent': record.rss / total * 100 if total else 0.0
+        })
 
-    if skipped > 0:
-        print(f"[red]⚠️ 跳过了 {skipped} 个进程（无权限或已终止）[/red]")
-
-    return top[:limit]
+    return top
 
 
 def display_system_status():
     """
     打印当前系统状态，包括 CPU、内存、进程。
-    使用 rich 库格式化输出。   
+    使用 rich 库格式化输出（rich 只在这里按需导入）。   
     """
+    from rich import print
+    from rich.table import Table
+
     print("[bold cyan]\n🖥️ 当前系统状态[/bold cyan]")
 
-    cpu = get_cpu_usage()
-    print(f"[green]CPU 使用率: [/green]{cpu}%")
+    snapshot = get_snapshot_engine().get_snapshot()
+
+    cpu = get_cpu_usage(snapshot)
+    if cpu is None:
+        print("[green]CPU 使用率: [/green]暂无基线（下次采样后可用）")
+    else:
+        print(f"[green]CPU 使用率: [/green]{cpu}%")
 
     mem = get_memory_info()
     print(f"[green]内存使用率: [/green]{mem['percent']}%")
@@ -83,7 +97,11 @@ def display_system_status():
     table.add_column("CPU%", justify="right")
     table.add_column("内存%", justify="right")
 
-    for proc in get_top_processes():
+    if not snapshot.cpu_ready:
+        print("暂无 CPU 基线，进程 CPU 占用将在下次采样后显示")
+        return
+
+    for proc in get_top_processes(snapshot=snapshot):
         table.add_row(
             str(proc['pid']),
             proc["name"][:25] if proc["name"] else "Unknown",
@@ -97,16 +115,20 @@ def show_system_status():
     print("\n📊 系统状态监控")
     print("-" * 30)
 
+    snapshot = get_snapshot_engine().get_snapshot()
+
     # 内存信息
-    mem = psutil.virtual_memory()
+    mem = snapshot.memory
     print(f"内存使用: {mem.percent:.1f}% ({mem.used // (1024 ** 2)} MB / {mem.total // (1024 ** 2)} MB)")
 
-    # CPU 信息
-    cpu = psutil.cpu_percent(interval=0.5)
-    print(f"CPU 使用: {cpu:.1f}%")
+    # CPU 信息（与上一次采样的差值，首次采样没有基线）
+    cpu = get_cpu_usage(snapshot)
+    if cpu is None:
+        print("CPU 使用: 暂无基线（下次采样后可用）")
+    else:
+        print(f"CPU 使用: {cpu:.1f}%")
 
     # 活跃进程数量
-    processes = list(psutil.process_iter())
-    print(f"进程数量: {len(processes)}")
+    print(f"进程数量: {snapshot.process_count}")
 
     print("-" * 30)
\ No newline at end of file
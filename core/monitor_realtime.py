@@ -1,19 +1,44 @@
-import psutil
 import threading
 import time
-from collections import deque
+from core import instrumentation
+from core.cgroup import get_reclaimer
+from core.sampling import AdaptiveSampler
+from core.snapshot import get_snapshot_engine
+from core.timeseries import TimeSeriesStore
+
+# 历史数据中记录的指标列
+HISTORY_COLUMNS = ('memory_percent', 'cpu_percent', 'memory_used_gb',
+                   'memory_available_gb', 'process_count')
 
 class SystemMonitor:
-    def __init__(self, max_data_points=60):
+    def __init__(self, max_data_points=24 * 3600, snapshot_engine=None, journal=None, core=None,
+                 sampler=None, reclaimer=None):
         """
         初始化系统监视器
-        max_data_points: 保存的最大数据点数量（默认60秒）
+        max_data_points: 保存的最大数据点数量（默认24小时，1秒一个点）
+        snapshot_engine: 共享的进程快照引擎（默认使用全局引擎）
+        journal: 监控数据日志（MetricsJournal），为空时不落盘
+        core: asyncio 监控核心（AsyncCore）。提供时采样和日志写入作为协程运行，
+              回调经有界队列分发（各自丢弃最旧数据），不再使用独立的监控线程
+        sampler: 采样间隔控制器（AdaptiveSampler），默认按内存距阈值的远近自适应调整
+        reclaimer: cgroup 回收器（CgroupReclaimer），提供时每个采样点附带各 cgroup 的内存状态，
+                   默认按配置创建（未开启 cgroup 时为 None）
         """
         self.max_data_points = max_data_points
-
-        self.memory_data = deque(maxlen=max_data_points)
-        self.cpu_data = deque(maxlen=max_data_points)
-        self.timestamps = deque(maxlen=max_data_points)
+        self.snapshot_engine = snapshot_engine or get_snapshot_engine()
+        self.journal = journal
+        self.core = core
+        self.broadcaster = None
+        self._sample_future = None
+        self._bridges = {}      # 回调函数 -> 订阅（asyncio 模式）
+        self._journal_subscription = None
+        self.sampler = sampler or AdaptiveSampler()
+        self.reclaimer = reclaimer if reclaimer is not None else get_reclaimer()
+        self._wake_event = threading.Event()
+        self._async_wake = None
+
+        # 列式环形缓冲区，保存全部历史数据
+        self.history = TimeSeriesStore(max_data_points, HISTORY_COLUMNS)
 
         self.is_running = False
         self.monitor_thread = None
@@ -22,17 +47,18 @@ class SystemMonitor:
 
         print("📊 系统监控器初始化完成")
 
-    def get_current_stats(self):
+    @instrumentation.timed('monitor.tick')
+    def get_current_stats(self, max_staleness=None):
         """
         获取当前系统状态
         返回包含内存、CPU等信息的字典
+        max_staleness: 可以复用的快照最长时间（秒），默认使用快照引擎的设置
         """         
         try:
-            memory = psutil.virtual_memory()
-
-            cpu_percent = psutil.cpu_percent(interval=None)
-
-            process_count = len(psutil.pids())
+            snapshot = self.snapshot_engine.get_snapshot(max_staleness)
+            memory = snapshot.memory
+            cpu_percent = snapshot.cpu_percent
+            process_count = snapshot.process_count
 
             stats = {
                 'memory_percent': round(memory.percent, 1),
@@ -40,9 +66,13 @@ class SystemMonitor:
                 'memory_total_gb': round(memory.total / 1024**3, 2),
                 'memory_available_gb': round(memory.available / 1024**3, 2),
                 'cpu_percent': round(cpu_percent, 1),
+                'cpu_ready': snapshot.cpu_ready,    # 首次采样没有 CPU 基线
                 'process_count': process_count,
-                'timestamp': time.time()
+                'timestamp': snapshot.timestamp,
+                'generation': snapshot.generation
             }
+            if self.reclaimer is not None:
+                stats['cgroups'] = [memory.to_dict() for memory in self.reclaimer.read_all()]
 
             return stats
 
@@ -50,6 +80,78 @@ class SystemMonitor:
             print(f"❌ 获取系统状态失败: {e}")
             return None
 
+    @property
+    def memory_data(self):
+        """内存使用率历史（零拷贝视图）"""
+        return self.history.column('memory_percent')
+
+    @property
+    def cpu_data(self):
+        """CPU使用率历史（零拷贝视图）"""
+        return self.history.column('cpu_percent')
+
+    @property
+    def timestamps(self):
+        return self.history.timestamps()
+
+    def track_process(self, pid):
+        """
+        记录指定进程的 RSS 历史
+        槽位已满时返回 False
+        """
+        return self.history.track_pid(pid)
+
+    def untrack_process(self, pid):
+        self.history.untrack_pid(pid)
+
+    def get_history_stats(self, metric, seconds=None):
+        """
+        获取历史窗口统计（min/max/mean/p50/p95/变化率）
+        metric: 指标名，或 'pid:<PID>' 表示跟踪进程的 RSS
+        seconds: 最近多少秒，为空表示全部历史
+        """
+        return self.history.stats(metric, seconds=seconds)
+
+    def _record_history(self, stats):
+        """把一次采样写入历史缓冲区"""
+        process_rss_mb = None
+        tracked = self.history.tracked_pids
+        if tracked:
+            snapshot = self.snapshot_engine.get_snapshot()
+            process_rss_mb = {}
+            for pid in tracked:
+                record = snapshot.get(pid)
+                if record is not None:
+                    process_rss_mb[pid] = record.rss / 1024 / 1024
+
+        values = stats
+        if not stats.get('cpu_ready', True):
+            # 没有基线的 CPU 值记为缺失，而不是 0
+            values = dict(stats)
+            del values['cpu_percent']
+        self.history.append(stats['timestamp'], values, process_rss_mb)
+
+        if self.journal is not None and self.core is None:
+            # asyncio 模式下由日志订阅者写入
+            self.journal.append(stats)
+
+    def load_history(self, seconds=3600):
+        """
+        从监控日志回放最近的数据到历史缓冲区（启动时调用）
+        返回载入的数据点数量
+        """
+        if self.journal is None:
+            return 0
+
+        end = time.time()
+        start = end - min(seconds, self.max_data_points)
+        fields = self.journal.fields()
+        records = self.journal.read_range(start, end)
+        for record in records:
+            values = dict(zip(fields, record))
+            self.history.append(values['timestamp'], values)
+        return len(records)
+
     def add_update_callback(self, callback_func):
         """
         添加更新回调函数
@@ -57,12 +159,16 @@ class SystemMonitor:
         """
         if callback_func not in self.update_callbacks:
             self.update_callbacks.append(callback_func)
+            if self.broadcaster is not None:
+                self.core.call(self._bridge, callback_func)
             print(f"✅ 已注册更新回调函数")  
 
     def remove_updata_callback(self, callback_func):
         """移除回调函数"""
         if callback_func in self.update_callbacks:
             self.update_callbacks.remove(callback_func)
+            if self.broadcaster is not None:
+                self.core.call(self._unbridge, callback_func)
 
     def start_monitoring(self):
         """
@@ -74,6 +180,14 @@ class SystemMonitor:
 
         print("🚀 启动系统实时监控...")
         self.is_running = True
+        self._wake_event.clear()
+
+        if self.core is not None:
+            self._start_async()
+            return
+
+        if self.journal is not None:
+            self.journal.start()
 
         self.monitor_thread = threading.Thread(
             target=self._monitor_loop,
@@ -91,10 +205,95 @@ class SystemMonitor:
 
         print("🛑 停止系统监控...")
         self.is_running = False        
+        self._wake_event.set()
+
+        if self.core is not None:
+            self._stop_async()
 
         if self.monitor_thread and self.monitor_thread.is_alive():
             self.monitor_thread.join(timeout=2)
 
+        if self.journal is not None:
+            self.journal.stop()
+
+    # ---------- asyncio 模式 ----------
+
+    def _start_async(self):
+        from core.async_core import Broadcaster
+
+        core = self.core.start()
+        self.broadcaster = Broadcaster(core)
+        if self.journal is not None:
+            self.journal.open()
+            core.call(self._add_journal_writer)
+        for callback in self.update_callbacks.copy():
+            core.call(self._bridge, callback)
+        self._sample_future = core.spawn(self._sample_loop())
+
+    def _stop_async(self):
+        if self._sample_future is not None:
+            self._sample_future.cancel()
+            self._sample_future = None
+        if self.broadcaster is not None and self.core.running:
+            for callback in list(self._bridges):
+                self.core.call(self._unbridge, callback)
+            self.core.call(self._close_subscriptions)
+        self.broadcaster = None
+
+    def _add_journal_writer(self):
+        journal = self.journal
+
+        async def write(stats):
+            await self.core.run_blocking(journal.write, stats)
+        self._journal_subscription = self.broadcaster.add_subscriber(write, 'journal', maxsize=1024)
+
+    def _close_subscriptions(self):
+        if self._journal_subscription is not None:
+            self._journal_subscription.close()
+            self._journal_subscription = None
+
+    def _bridge(self, callback):
+        """把同步回调接到广播上（在事件循环线程中调用）"""
+        if callback not in self._bridges:
+            self._bridges[callback] = self.broadcaster.add_callback(callback)
+
+    def _unbridge(self, callback):
+        subscription = self._bridges.pop(callback, None)
+        if subscription is not None:
+            subscription.close()
+
+    async def _sample_loop(self):
+        """
+        采样协程：进程表遍历在线程池中进行，结果写入历史后广播给所有订阅者
+        按采样控制器给出的节拍采样，订阅者处理得慢不会推迟下一次采样
+        """
+        import asyncio
+
+        print("📊 监控协程已启动，开始收集数据...")
+        loop = asyncio.get_running_loop()
+        self._async_wake = asyncio.Event()
+        next_tick = loop.time()
+        while self.is_running:
+            interval = self.sampler.interval
+            try:
+                stats = await self.core.run_blocking(self.get_current_stats, self._staleness())
+                if stats:
+                    interval = self._schedule_next(stats)
+                    self._record_history(stats)
+                    self.broadcaster.publish(stats)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ 监控循环出错: {e}")
+
+            next_tick = max(next_tick + interval, loop.time())
+            try:
+                await asyncio.wait_for(self._async_wake.wait(), next_tick - loop.time())
+                next_tick = loop.time()     # 被唤醒，立即采样
+            except asyncio.TimeoutError:
+                pass
+            self._async_wake.clear()
+
     def _monitor_loop(self):
         """
         监控主循环（运行在后台线程中）
@@ -103,24 +302,55 @@ class SystemMonitor:
         print("📊 监控线程已启动，开始收集数据...")
 
         while self.is_running:
+            interval = self.sampler.interval
             try:
-                stats = self.get_current_stats()
+                stats = self.get_current_stats(self._staleness())
 
                 if stats:
-                    self.memory_data.append(stats['memory_percent'])
-                    self.cpu_data.append(stats['cpu_percent'])
-                    self.timestamps.append(stats['timestamp'])
+                    interval = self._schedule_next(stats)
+                    self._record_history(stats)
 
                     self._notify_callbacks(stats)
 
-                time.sleep(1)
-
             except Exception as e:
                 print(f"❌ 监控循环出错: {e}")
-                time.sleep(1)
+
+            # 等到下一次采样，wake() 或 stop_monitoring() 可以提前唤醒
+            self._wake_event.wait(interval)
+            self._wake_event.clear()
 
         print("📊 监控线程已停止")
 
+    # ---------- 自适应采样 ----------
+
+    def _staleness(self) -> float:
+        """本次采样可以复用的快照时间：不超过当前采样间隔的一半"""
+        return min(self.snapshot_engine.max_staleness, self.sampler.interval / 2)
+
+    def _schedule_next(self, stats) -> float:
+        """根据本次采样决定下一次采样的间隔，并把间隔和原因写进采样数据"""
+        interval = self.sampler.next_interval(stats['memory_percent'], stats['timestamp'])
+        stats['sample_interval'] = interval
+        stats['sample_reason'] = self.sampler.reason
+        return interval
+
+    def wake(self):
+        """立即进行下一次采样（内存压力事件等），此后按最小间隔采样直到压力解除"""
+        self.sampler.wake()
+        self._interrupt_wait()
+
+    def request_interval(self, name, seconds):
+        """订阅者要求的最长采样间隔（例如界面每秒刷新），seconds 为 None 时取消"""
+        self.sampler.request_interval(name, seconds)
+        # 让正在进行的长等待按新要求重新计时（不像 wake() 那样降到最小间隔）
+        self._interrupt_wait()
+
+    def _interrupt_wait(self):
+        """结束采样线程 / 采样协程当前的等待，立即采样一次"""
+        self._wake_event.set()
+        if self._async_wake is not None and self.core is not None and self.core.running:
+            self.core.loop.call_soon_threadsafe(self._async_wake.set)
+
     def _notify_callbacks(self, stats):
         """
         安全地通知所有回调函数
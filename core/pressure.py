@@ -0,0 +1,113 @@
+# 内存压力事件（Linux PSI）
+import os
+import select
+import sys
+import threading
+
+PSI_MEMORY_PATH = '/proc/pressure/memory'
+
+# wait() 的返回值
+WAKE_PRESSURE = 'pressure'    # PSI 触发：停顿时间超过阈值
+WAKE_REQUEST = 'wake'         # 被 wake() 主动唤醒
+WAKE_TIMEOUT = 'timeout'      # 等待超时（轮询模式下的常规唤醒）
+
+
+class PressureWaiter:
+    """
+    等待内存压力事件
+    Linux 下向 /proc/pressure/memory 注册 PSI 触发器：在 window 时间窗口内
+    进程因内存不足停顿超过 stall 时间时，poll() 返回 POLLPRI。
+    不支持 PSI 时退化为普通的超时等待。
+    """
+
+    def __init__(self, stall_ms: int = 150, window_ms: int = 1000, kind: str = 'some',
+                 use_psi: bool = True, psi_path: str = PSI_MEMORY_PATH):
+        """
+        stall_ms: 时间窗口内的停顿阈值（毫秒）
+        window_ms: 时间窗口（毫秒，内核要求 500ms ~ 10s）
+        kind: 'some'（部分任务停顿）或 'full'（全部任务停顿）
+        """
+        self._psi_fd = None
+        self._poller = None
+        self._wake_r = self._wake_w = None
+        self._event = threading.Event()
+
+        if use_psi:
+            self._open_psi(psi_path, kind, stall_ms * 1000, window_ms * 1000)
+
+    @property
+    def psi_enabled(self) -> bool:
+        return self._psi_fd is not None
+
+    def _open_psi(self, path: str, kind: str, stall_us: int, window_us: int):
+        if not sys.platform.startswith('linux') or not hasattr(select, 'poll'):
+            return
+        try:
+            fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        except OSError:
+            return
+
+        try:
+            os.write(fd, f"{kind} {stall_us} {window_us}\0".encode())
+        except OSError as e:
+            # 非特权进程的窗口必须是 2 秒的整数倍，按比例放大后重试一次
+            unprivileged_window = -(-window_us // 2000000) * 2000000
+            try:
+                if unprivileged_window == window_us:
+                    raise e
+                stall_us = stall_us * unprivileged_window // window_us
+                os.write(fd, f"{kind} {stall_us} {unprivileged_window}\0".encode())
+            except OSError as e2:
+                print(f"⚠️ 注册 PSI 触发器失败，使用轮询模式: {e2}")
+                os.close(fd)
+                return
+
+        self._psi_fd = fd
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self._poller = select.poll()
+        self._poller.register(fd, select.POLLPRI)
+        self._poller.register(self._wake_r, select.POLLIN)
+
+    def wait(self, timeout: float) -> str:
+        """
+        等待压力事件、主动唤醒或超时，返回唤醒原因
+        """
+        if self._poller is None:
+            woke = self._event.wait(timeout)
+            self._event.clear()
+            return WAKE_REQUEST if woke else WAKE_TIMEOUT
+
+        events = self._poller.poll(max(0, int(timeout * 1000)))
+        reason = WAKE_TIMEOUT
+        for fd, mask in events:
+            if fd == self._wake_r:
+                try:
+                    os.read(self._wake_r, 64)
+                except BlockingIOError:
+                    pass
+                return WAKE_REQUEST
+            if fd == self._psi_fd:
+                if mask & (select.POLLERR | select.POLLNVAL):
+                    raise OSError("PSI 触发器已失效")
+                reason = WAKE_PRESSURE
+        return reason
+
+    def wake(self):
+        """唤醒正在 wait() 的线程"""
+        self._event.set()
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b'x')
+            except OSError:
+                pass
+
+    def close(self):
+        for fd in (self._psi_fd, self._wake_r, self._wake_w):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._psi_fd = self._wake_r = self._wake_w = None
+        self._poller = None
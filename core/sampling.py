@@ -0,0 +1,167 @@
+# 自适应采样间隔
+"""
+根据内存使用率离清理阈值的距离和变化速度决定下一次采样的间隔
+
+- 远低于阈值且平稳：逐步放慢到 max_interval（默认 10 秒），降低 memwatch 自身的空闲开销
+- 接近阈值或按当前增速很快会超过阈值：立即加快到 min_interval（默认 0.2 秒）
+- 其他情况使用 base_interval（默认 1 秒）
+- 订阅者可以用 request_interval() 要求不低于某个刷新频率（例如界面每秒刷新），
+  平稳时的间隔从固定档位中选取，便于与订阅者的周期对齐
+
+加快立即生效，放慢每次最多放大一档，避免在边界附近来回抖动
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+# 平稳时可选的采样间隔（秒），相邻档位成倍数关系，便于与订阅者周期对齐
+INTERVAL_STEPS = (0.1, 0.2, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+
+REASON_FIXED = 'fixed'              # 未开启自适应
+REASON_NORMAL = 'normal'            # 常规间隔
+REASON_STABLE = 'stable'            # 平稳且远低于阈值，放慢
+REASON_NEAR = 'near_threshold'      # 接近阈值
+REASON_RISING = 'rising_fast'       # 按当前增速很快会超过阈值
+REASON_WAKE = 'wake'                # 被外部事件（内存压力）唤醒
+REASON_SUBSCRIBER = 'subscriber'    # 订阅者要求的刷新频率
+
+
+class AdaptiveSampler:
+    """
+    采样间隔控制器（由监控循环在每次采样后调用 next_interval）
+    threshold: 清理阈值（%），托管模式运行时由调度器按当前模式更新
+    near_margin: 距离阈值小于该值（百分点）时加快
+    far_margin: 距离阈值大于该值且平稳时放慢
+    stable_rate: 变化速度低于该值（百分点 / 秒）视为平稳
+    horizon: 按当前增速预计在该时间（秒）内超过阈值时加快
+    """
+
+    def __init__(self, base_interval: float = 1.0, min_interval: float = 0.2, max_interval: float = 10.0,
+                 threshold: float = 75.0, near_margin: float = 5.0, far_margin: float = 20.0,
+                 stable_rate: float = 0.05, horizon: float = 30.0, adaptive: bool = True,
+                 history: int = 32):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.threshold = threshold
+        self.near_margin = near_margin
+        self.far_margin = far_margin
+        self.stable_rate = stable_rate
+        self.horizon = horizon
+        self.adaptive = adaptive
+
+        self.interval = base_interval
+        self.reason = REASON_NORMAL if adaptive else REASON_FIXED
+        self.rate = 0.0                 # 内存使用率变化速度（百分点 / 秒，指数平滑）
+        self.changes: Deque[Tuple[float, float, str]] = deque(maxlen=history)   # (时间, 间隔, 原因)
+
+        self._last: Optional[Tuple[float, float]] = None
+        self._requests: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    # ---------- 订阅者 ----------
+
+    def request_interval(self, name: str, seconds: Optional[float]):
+        """订阅者要求的最长采样间隔，seconds 为 None 时取消"""
+        with self._lock:
+            if seconds is None:
+                self._requests.pop(name, None)
+            else:
+                self._requests[name] = max(self.min_interval, float(seconds))
+
+    def _subscriber_limit(self) -> Tuple[Optional[float], str]:
+        with self._lock:
+            if not self._requests:
+                return None, ''
+            name = min(self._requests, key=self._requests.get)
+            return self._requests[name], name
+
+    # ---------- 决策 ----------
+
+    def next_interval(self, memory_percent: float, timestamp: Optional[float] = None) -> float:
+        """根据最新采样计算下一次采样的间隔（秒）"""
+        if timestamp is None:
+            timestamp = time.monotonic()
+
+        if self._last is not None:
+            dt = timestamp - self._last[1]
+            if dt > 0:
+                rate = (memory_percent - self._last[0]) / dt
+                self.rate = rate if self.rate == 0.0 else 0.5 * self.rate + 0.5 * rate
+        self._last = (memory_percent, timestamp)
+
+        if not self.adaptive:
+            interval, reason = self.base_interval, REASON_FIXED
+        else:
+            interval, reason = self._decide(memory_percent)
+
+        limit, name = self._subscriber_limit()
+        if limit is not None and limit < interval:
+            interval, reason = limit, f"{REASON_SUBSCRIBER}:{name}"
+
+        self._set(interval, reason, timestamp)
+        return interval
+
+    def _decide(self, memory_percent: float) -> Tuple[float, str]:
+        headroom = self.threshold - memory_percent
+        if headroom <= self.near_margin:
+            return self.min_interval, REASON_NEAR
+        if self.rate > 0 and headroom / self.rate <= self.horizon:
+            return self.min_interval, REASON_RISING
+
+        if headroom >= self.far_margin and abs(self.rate) <= self.stable_rate:
+            # 平稳时每次最多放大一档
+            target = _next_step(max(self.interval, self.base_interval))
+            return min(target, self.max_interval), REASON_STABLE
+
+        if self.interval < self.base_interval:
+            # 压力解除后逐档恢复
+            return min(_next_step(self.interval), self.base_interval), REASON_NORMAL
+        return self.base_interval, REASON_NORMAL
+
+    def wake(self):
+        """外部事件（内存压力）要求立即采样，下一次间隔降到最小"""
+        self._set(self.min_interval, REASON_WAKE, time.monotonic())
+
+    def _set(self, interval: float, reason: str, timestamp: float):
+        interval = max(self.min_interval, min(self.max_interval, interval)) if self.adaptive else interval
+        if interval != self.interval or reason != self.reason:
+            self.changes.append((time.time(), interval, reason))
+        self.interval = interval
+        self.reason = reason
+
+    def info(self) -> Dict:
+        """当前采样状态，供 get_status / 界面显示"""
+        limit, name = self._subscriber_limit()
+        return {
+            'adaptive': self.adaptive,
+            'interval': self.interval,
+            'reason': self.reason,
+            'rate_per_second': round(self.rate, 4),
+            'threshold': self.threshold,
+            'subscriber_limit': {name: limit} if limit is not None else {},
+            'changes': [{'timestamp': ts, 'interval': interval, 'reason': reason}
+                        for ts, interval, reason in self.changes],
+        }
+
+
+def _next_step(interval: float) -> float:
+    """比 interval 大一档的间隔"""
+    for step in INTERVAL_STEPS:
+        if step > interval + 1e-9:
+            return step
+    return INTERVAL_STEPS[-1]
+
+
+def create_sampler(config) -> AdaptiveSampler:
+    """按配置（ConfigManager）创建采样控制器"""
+    return AdaptiveSampler(
+        base_interval=config.get('monitor.base_interval', 1.0),
+        min_interval=config.get('monitor.min_interval', 0.2),
+        max_interval=config.get('monitor.max_interval', 10.0),
+        threshold=config.get('thresholds.office', 75.0),
+        near_margin=config.get('monitor.near_margin', 5.0),
+        far_margin=config.get('monitor.far_margin', 20.0),
+        adaptive=config.get('monitor.adaptive', True)
+    )
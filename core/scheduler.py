@@ -9,23 +9,53 @@ sys.path.insert(0, str(project_root))
 
 import threading
 import time
-import psutil
 from typing import Optional, Callable
 
 # 修改为绝对导入
+from core import instrumentation
 from core.cleaner_safe import SafeMemoryCleaner
+from core.snapshot import get_snapshot_engine
+from core.pressure import PressureWaiter, WAKE_PRESSURE
+from core.forecast import MemoryForecaster
 from config.config_manager import config_manager
 
+def _acted(result) -> bool:
+    """清理是否真正作用到了进程或 cgroup（低于阈值提前返回、没有候选都不算）"""
+    return any(not entry['skipped'] and (entry.get('processes') or entry.get('cgroups'))
+               for entry in result.get('tiers', ()))
+
 class MemoryScheduler:
 
-    def __init__(self):
+    def __init__(self, monitor=None, core=None):
+        """
+        monitor: 实时监控器（SystemMonitor），提供后可以在每个采样点更新趋势预测，
+                 预计即将超过阈值时提前清理
+        core: asyncio 监控核心（AsyncCore），提供时调度循环作为协程运行，
+              检查、清理和压力等待在其线程池中执行
+        """
         self.is_running = False     # 是否运行中
         self.thread: Optional[Threading.Tread]= None
-        self.cleaner = SafeMemoryCleaner()
+        self.core = core
+        self._future = None
+        self.snapshot_engine = get_snapshot_engine()
+        self.cleaner = SafeMemoryCleaner(self.snapshot_engine)
         self.check_interval = 60
         self.current_mode = None
         self.last_cleanup_time = 0
         self.status_callback: Optional[Callable] = None
+        self.waiter: Optional[PressureWaiter] = None
+        self.monitor = monitor
+        self.forecaster = MemoryForecaster(top_k=self.snapshot_engine.top_k)
+        self.last_prediction: Optional[dict] = None
+
+        # 每个检查点都要读取的配置，编译为访问器，配置变更后自动失效
+        self._thresholds = {
+            'office': config_manager.accessor('thresholds.office', 75.0),
+            'game': config_manager.accessor('thresholds.game', 80.0),
+            'auto': config_manager.accessor('thresholds.auto', 85.0),
+        }
+        self._forecast_lead = config_manager.accessor('scheduler.forecast_lead_seconds', 60)
+        self._resume_margin = config_manager.accessor('ladder.resume_margin', 5.0)
 
     def start(self, mode='office') -> bool:
         """
@@ -48,78 +78,231 @@ class MemoryScheduler:
         self.is_running = True
         self.current_mode = mode
 
-        self.thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self.thread.start()
+        trigger = config_manager.get('scheduler.trigger', 'auto')
+        self.waiter = PressureWaiter(
+            stall_ms=config_manager.get('scheduler.psi_stall_ms', 150),
+            window_ms=config_manager.get('scheduler.psi_window_ms', 1000),
+            use_psi=trigger in ('auto', 'psi')
+        )
+        if trigger == 'psi' and not self.waiter.psi_enabled:
+            print("⚠️ 当前系统不支持 PSI 内存压力事件，使用轮询模式")
+
+        # 由调度器负责在内存恢复后恢复被暂停 / 降级的进程
+        self.cleaner.throttle.own()
+
+        if self.monitor is not None:
+            # 采样频率按当前模式的阈值调整
+            self.monitor.sampler.threshold = self._get_threshold(mode)
+            self.monitor.add_update_callback(self._on_monitor_sample)
+
+        # 托管模式长时间运行，配置文件被修改时自动重新加载
+        config_manager.start_watching()
+        instrumentation.configure(config_manager)
+
+        if self.core is not None:
+            self._future = self.core.start().spawn(self._async_loop())
+        else:
+            self.thread = threading.Thread(target=self._monitor_loop, daemon=True)
+            self.thread.start()
 
         print(f"🚀 托管模式已启动 - {mode.upper()} 模式")
         return True
 
+    def set_mode(self, mode: str) -> bool:
+        """运行中切换模式，下一次检查即按新模式的阈值和白名单"""
+        if mode not in ['office', 'game', 'auto']:
+            print(f"❌ 无效的模式: {mode}")
+            return False
+        self.current_mode = mode
+        print(f"🔀 托管模式切换为 {mode.upper()}")
+        if self.waiter:
+            self.waiter.wake()
+        return True
+
+    def _announce(self):
+        if self.waiter.psi_enabled:
+            print(f"🔄 托管调度器启动，由内存压力事件触发（兜底检查间隔: {self.check_interval // 60} 分钟）")
+        else:
+            print(f"🔄 托管调度器启动，检查间隔: {self.check_interval // 60} 分钟")
+
     def _monitor_loop(self):
-        print(f"🔄 托管调度器启动，检查间隔: {self.check_interval // 60} 分钟")
+        self._announce()
 
         while self.is_running:
             try:
-                memory_usage = psutil.virtual_memory().percent
+                self._check()
+                self._smart_sleep()
 
-                threshold = self._get_threshold(self.current_mode)
+            except Exception as e:
+                print(f"❌ 托管调度器错误: {e}")
+                time.sleep(10) 
 
-                print(f"📊 内存使用: {memory_usage:.1f}% (阈值: {threshold}%)")
+    async def _async_loop(self):
+        """
+        调度协程：检查（可能包含清理）和压力等待都是阻塞调用，交给核心的有界线程池
+        """
+        import asyncio
 
-                if self._should_cleanup(memory_usage, threshold):
-                    self._perform_cleanup()
+        self._announce()
 
-                self._smart_sleep()
+        while self.is_running:
+            try:
+                await self.core.run_blocking(self._check)
+                await self.core.run_blocking(self._smart_sleep)
 
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
                 print(f"❌ 托管调度器错误: {e}")
-                time.sleep(10) 
+                await asyncio.sleep(10)
 
+    def _check(self):
+        """一次检查：读取内存使用率，必要时清理"""
+        # 只统计检查本身，不包括等待
+        with instrumentation.timer('scheduler.loop'):
+            memory_usage = self.snapshot_engine.get_snapshot().memory.percent
 
-    def _get_threshold(self, mode):
-        if mode == 'office':
-            return config_manager.get('thresholds.office', 75.0)    # 这有什么用
-        elif mode == 'game':
-            return config_manager.get('thresholds.game', 80.0)
-        elif mode == 'auto':
-            return config_manager.get('thresholds.auto', 85.0)
+            threshold = self._get_threshold(self.current_mode)
+
+            if self.monitor is None:
+                # 没有实时监控器时，用调度器自己的检查点更新趋势
+                self._update_forecast(time.time(), memory_usage, threshold)
+
+            print(f"📊 内存使用: {memory_usage:.1f}% (阈值: {threshold}%)")
+
+            if self.cleaner.reclaimer is not None:
+                self._enforce_cgroup_budgets()
+            self._release_throttled(memory_usage, threshold)
+
+            if self._should_cleanup(memory_usage, threshold):
+                self._perform_cleanup()
+
+
+    def _enforce_cgroup_budgets(self):
+        """把超预算的 cgroup 回收到预算以下（只回收冷内存，不终止进程，不受清理间隔限制）"""
+        for r in self.cleaner.reclaimer.enforce_budgets():
+            if r['error']:
+                print(f"⚠️ cgroup {r['path']} 回收失败: {r['error']}")
+            else:
+                print(f"♻️ cgroup {r['path']} 超出预算，回收 {r['freed_mb']:.1f} MB（耗时 {r['elapsed_ms']:.1f} ms）")
+
+    def _release_throttled(self, memory_usage: float, threshold: float):
+        """内存回落到阈值以下一定余量后，恢复分级回收中被暂停 / 降级的进程；暂停超时的随时恢复"""
+        throttle = self.cleaner.throttle
+        if not throttle.paused and not throttle.demoted:
+            return
+        if memory_usage < threshold - self._resume_margin():
+            resumed, restored = throttle.release()
+            if resumed or restored:
+                print(f"▶️ 内存已恢复，恢复 {resumed} 个暂停的进程，{restored} 个进程的优先级")
         else:
-            return 75.0
+            resumed = throttle.resume_expired()
+            if resumed:
+                print(f"▶️ {resumed} 个进程暂停超时，已恢复")
+
+    def _get_threshold(self, mode):
+        accessor = self._thresholds.get(mode)
+        return accessor() if accessor is not None else 75.0
 
     def _should_cleanup(self, current_usage: float, threshold: float) -> bool:
-        if current_usage < threshold:
+        if current_usage < threshold and not self._threshold_imminent():
             return False
         
         if time.time() - self.last_cleanup_time < self.check_interval:
             print("⏰ 距离上次清理时间太短，跳过本次清理")
             return False
+
+        if current_usage < threshold:
+            eta = self.last_prediction['seconds_to_threshold']
+            print(f"📈 预计 {eta:.0f} 秒后超过阈值，提前清理")
         
         return True
 
+    def _threshold_imminent(self) -> bool:
+        """趋势预测是否显示即将超过阈值"""
+        prediction = self.last_prediction
+        if not prediction or prediction['seconds_to_threshold'] is None:
+            return False
+        lead = self._forecast_lead()
+        return prediction['seconds_to_threshold'] <= lead
+
+    def _update_forecast(self, timestamp: float, memory_percent: float, threshold: float,
+                         snapshot=None):
+        self.forecaster.update(timestamp, memory_percent, snapshot)
+        self.last_prediction = self.forecaster.predict(threshold)
+
+    def _on_monitor_sample(self, stats):
+        """
+        监控器每个采样点的回调（运行在监控线程中）
+        更新趋势预测，预计即将超过阈值时唤醒调度线程
+        """
+        if not self.is_running:
+            return
+
+        threshold = self._get_threshold(self.current_mode)
+        self.monitor.sampler.threshold = threshold
+        self._update_forecast(stats['timestamp'], stats['memory_percent'], threshold,
+                              self.snapshot_engine.get_snapshot())
+
+        cooling_down = time.time() - self.last_cleanup_time < self.check_interval
+        if not cooling_down and stats['memory_percent'] < threshold and self._threshold_imminent():
+            self.waiter.wake()
+        elif any(c['excess_mb'] > 0 for c in stats.get('cgroups', ())) and self.cleaner.reclaimer.over_budget():
+            # 有 cgroup 超出预算，立即检查（回收不终止进程，不需要等清理间隔）
+            self.waiter.wake()
+
+    def _cleanup_target(self) -> Optional[float]:
+        """
+        清理使用的阈值：已超过阈值时按模式阈值（返回 None）；
+        趋势预测触发时，目标是让 forecast_lead_seconds 秒后仍不超过阈值，
+        即 阈值 - 斜率 × 提前量，并且不高于当前使用率（否则清理器认为无需清理）
+        """
+        threshold = self._get_threshold(self.current_mode)
+        current = self.snapshot_engine.memory().percent
+        if current >= threshold or not self._threshold_imminent():
+            return None
+        slope_per_second = self.last_prediction['slope_per_minute'] / 60
+        target = min(current, threshold - slope_per_second * self._forecast_lead())
+        return max(0.0, target)
+
     def _perform_cleanup(self):
         print(f"🧹 开始清理内存 - {self.current_mode.upper()} 模式")
 
         cleanup_mode = self.current_mode
 
         if cleanup_mode == 'auto':
-            current_hour = time.loacltime().tm_hour
+            current_hour = time.localtime().tm_hour
             if 8 < current_hour <= 22:
                 cleanup_mode = 'office'
             else:
                 cleanup_mode = 'game'
 
-        result = self.cleaner.gentle_cleanup(cleanup_mode)
-        self.last_cleanup_time = time.time()
+        result = self.cleaner.gentle_cleanup(cleanup_mode, threshold=self._cleanup_target())
+        if _acted(result):
+            # 只有真正执行了回收才进入清理间隔，否则内存越过阈值时会被间隔挡住
+            self.last_cleanup_time = time.time()
 
         freed_mb = result.get('memory_freed_mb', 0)
         print(f"✅ 清理完成，释放内存: {freed_mb:.1f} MB")
 
     def _smart_sleep(self):
-        sleep_time = self.check_interval
-        elapsed = 0
-
-        while elapsed < sleep_time and self.is_running:
-            time.sleep(min(10, sleep_time - elapsed))
-            elapsed += 10
+        """
+        等待下一次检查：内存压力事件触发、stop() 唤醒或到达检查间隔
+        """
+        try:
+            reason = self.waiter.wait(self.check_interval)
+        except OSError as e:
+            print(f"⚠️ 内存压力事件失效，改用轮询模式: {e}")
+            self.waiter.close()
+            self.waiter = PressureWaiter(use_psi=False)
+            return
+
+        instrumentation.count(f'scheduler.wake.{reason}')
+        if reason == WAKE_PRESSURE and self.is_running:
+            print("⚡ 检测到内存压力，立即检查")
+            if self.monitor is not None:
+                # 压力期间监控器按最小间隔采样
+                self.monitor.wake()
 
     def stop(self):
         if not self.is_running:
@@ -127,10 +310,29 @@ class MemoryScheduler:
             return False
 
         self.is_running = False
+        if self.monitor is not None:
+            self.monitor.remove_updata_callback(self._on_monitor_sample)
+        if self.waiter:
+            self.waiter.wake()
 
         if self.thread and self.thread.is_alive():
             print("⏹️ 正在停止托管模式...")
             self.thread.join(timeout=5)
+        if self._future is not None:
+            # 被唤醒后协程在下一轮检查前退出
+            try:
+                self._future.result(timeout=5)
+            except Exception:
+                self._future.cancel()
+            self._future = None
+
+        if self.waiter:
+            self.waiter.close()
+            self.waiter = None
+
+        # 托管模式停止后不再有人负责恢复，立即撤销暂停和降级
+        self.cleaner.throttle.disown()
+        self.cleaner.throttle.release()
 
         print("✅ 托管模式已停止")
         return True      
@@ -139,19 +341,32 @@ class MemoryScheduler:
     def get_status(self) -> dict:
         return {
             'is_running': self.is_running,
-            'mode': self.mode,
+            'mode': self.current_mode,
             'check_interval': self.check_interval,
-            'last_cleanup_time': self.last_cleanup_time
+            'last_cleanup_time': self.last_cleanup_time,
+            'prediction': self.last_prediction,
+            'sampling': self.monitor.sampler.info() if self.monitor is not None else None,
+            'cgroups': self.cleaner.reclaimer.info() if self.cleaner.reclaimer is not None else None,
+            'throttle': self.cleaner.throttle.info(),
+            'instrumentation': instrumentation.report()
         }               
 
 
 
-scheduler = MemoryScheduler()
+_scheduler: Optional[MemoryScheduler] = None
+
+
+def get_scheduler() -> MemoryScheduler:
+    """获取全局调度器（首次调用时创建，导入本模块不会创建清理器和快照引擎）"""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = MemoryScheduler()
+    return _scheduler
 
 if __name__ == '__main__':
     print("测试托管调度器...")
 
-    # scheduler = MemoryScheduler()
+    scheduler = get_scheduler()
     scheduler.start('office')
     
     try:
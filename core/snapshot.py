@@ -0,0 +1,229 @@
+# 进程快照引擎
+import threading
+import time
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+from core import instrumentation
+
+
+class SystemMemory(NamedTuple):
+    """系统内存信息（字节），字段与 psutil.virtual_memory() 保持一致"""
+    total: int
+    available: int
+    used: int
+    free: int
+    percent: float
+
+
+class ProcessRecord(NamedTuple):
+    """单个进程在某一时刻的属性"""
+    pid: int
+    ppid: int
+    name: str
+    rss: int                # 常驻内存（字节）
+    vms: int                # 虚拟内存（字节）
+    cpu_percent: float
+    create_time: float
+    status: str
+
+
+class SnapshotDelta(NamedTuple):
+    """相邻两代快照之间的差异"""
+    added: Tuple[ProcessRecord, ...]      # 新出现的进程（PID 被复用也算新进程）
+    changed: Tuple[ProcessRecord, ...]    # RSS 或 CPU 占用发生变化的进程（新值）
+    removed: Tuple[ProcessRecord, ...]    # 已退出的进程（旧值）
+
+
+class ProcessSnapshot:
+    """
+    一次进程表遍历的不可变结果
+    同一个快照对象可以被监控器、清理器、调度器同时共享
+    delta 为相对上一代快照的差异（第一代为 None）
+    cpu_ready 为 False 表示还没有上一次采样作为基线，此时 CPU 占用（整机和进程）都不可用
+    """
+    __slots__ = ('generation', 'timestamp', 'monotonic', 'memory', 'cpu_percent',
+                 'percpu', 'cpu_ready', 'processes', 'delta', '_by_pid')
+
+    def __init__(self, generation: int, timestamp: float, monotonic: float,
+                 memory: SystemMemory, cpu_percent: float,
+                 processes: Tuple[ProcessRecord, ...],
+                 delta: Optional[SnapshotDelta] = None,
+                 by_pid: Optional[Dict[int, ProcessRecord]] = None,
+                 percpu: Tuple[float, ...] = (),
+                 cpu_ready: bool = True):
+        object.__setattr__(self, 'generation', generation)
+        object.__setattr__(self, 'timestamp', timestamp)
+        object.__setattr__(self, 'monotonic', monotonic)
+        object.__setattr__(self, 'memory', memory)
+        object.__setattr__(self, 'cpu_percent', cpu_percent)
+        object.__setattr__(self, 'percpu', percpu)
+        object.__setattr__(self, 'cpu_ready', cpu_ready)
+        object.__setattr__(self, 'processes', processes)
+        object.__setattr__(self, 'delta', delta)
+        object.__setattr__(self, '_by_pid', by_pid)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("ProcessSnapshot 是只读对象")
+
+    def __iter__(self) -> Iterator[ProcessRecord]:
+        return iter(self.processes)
+
+    def __len__(self) -> int:
+        return len(self.processes)
+
+    @property
+    def process_count(self) -> int:
+        return len(self.processes)
+
+    @property
+    def age(self) -> float:
+        """快照距今的秒数"""
+        return time.monotonic() - self.monotonic
+
+    def get(self, pid: int) -> Optional[ProcessRecord]:
+        """按 PID 查找进程"""
+        return self._index().get(pid)
+
+    def _index(self) -> Dict[int, ProcessRecord]:
+        """PID 索引（首次调用时建立）"""
+        by_pid = self._by_pid
+        if by_pid is None:
+            by_pid = {p.pid: p for p in self.processes}
+            object.__setattr__(self, '_by_pid', by_pid)
+        return by_pid
+
+
+def diff_snapshots(old: Dict[int, ProcessRecord], new: Dict[int, ProcessRecord]) -> SnapshotDelta:
+    """计算两代快照的差异（按 PID + 创建时间识别进程）"""
+    added = []
+    changed = []
+    for pid, record in new.items():
+        prev = old.get(pid)
+        if prev is None:
+            added.append(record)
+        elif prev.create_time != record.create_time:
+            added.append(record)
+        elif (prev.rss != record.rss or prev.cpu_percent != record.cpu_percent
+              or prev.ppid != record.ppid or prev.name != record.name):
+            changed.append(record)
+
+    removed = [prev for pid, prev in old.items()
+               if pid not in new or new[pid].create_time != prev.create_time]
+    return SnapshotDelta(tuple(added), tuple(changed), tuple(removed))
+
+
+class SnapshotEngine:
+    """
+    单次遍历的进程快照引擎
+    所有使用方通过 get_snapshot() 获取快照，在 max_staleness 秒内复用同一份数据，
+    避免每个模块各自调用 process_iter 遍历整个进程表
+    """
+
+    def __init__(self, max_staleness: float = 1.0, collector=None):
+        """
+        max_staleness: 快照最长复用时间（秒）
+        collector: 采集后端，默认按平台自动选择（见 core.collectors）
+        """
+        if collector is None:
+            from core.collectors import create_collector
+            collector = create_collector('auto')
+
+        self.max_staleness = max_staleness
+        self.collector = collector
+        self._snapshot: Optional[ProcessSnapshot] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        # 按内存 / CPU 排序的增量 Top-K 索引，每代快照按差异更新
+        from core.topk import TopKTracker
+        self.top_k = TopKTracker()
+        # 按父子关系汇总的应用组索引，同样按差异更新
+        from core.groups import ProcessGroupIndex
+        self.groups = ProcessGroupIndex()
+        # 每个进程最近一次活跃的时间（选择清理对象时计算空闲时间）
+        from core.victims import ActivityTracker
+        self.activity = ActivityTracker()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    @property
+    def latest(self) -> Optional[ProcessSnapshot]:
+        """最近一次采集的快照（不会触发采集，还没有采集过时为 None）"""
+        return self._snapshot
+
+    def get_snapshot(self, max_staleness: Optional[float] = None) -> ProcessSnapshot:
+        """
+        获取不超过 max_staleness 秒的快照，过期时重新采集
+        多个线程同时请求时只会采集一次
+        """
+        if max_staleness is None:
+            max_staleness = self.max_staleness
+
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.age <= max_staleness:
+            return snapshot
+
+        with self._lock:
+            # 等锁期间其他线程可能已经刷新过
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.age <= max_staleness:
+                return snapshot
+            return self._refresh_locked()
+
+    def memory(self) -> SystemMemory:
+        """读取当前系统内存（不遍历进程表，也不生成新快照）"""
+        return self.collector.memory()
+
+    def refresh(self) -> ProcessSnapshot:
+        """强制采集新快照"""
+        with self._lock:
+            return self._refresh_locked()
+
+    @instrumentation.timed('snapshot.scan')
+    def _refresh_locked(self) -> ProcessSnapshot:
+        memory, cpu, processes = self.collector.collect()
+        by_pid = {p.pid: p for p in processes}
+
+        previous = self._snapshot
+        delta = diff_snapshots(previous._index(), by_pid) if previous is not None else None
+
+        self._generation += 1
+        snapshot = ProcessSnapshot(
+            generation=self._generation,
+            timestamp=time.time(),
+            monotonic=time.monotonic(),
+            memory=memory,
+            cpu_percent=cpu.percent,
+            processes=tuple(processes),
+            delta=delta,
+            by_pid=by_pid,
+            percpu=cpu.percpu,
+            cpu_ready=cpu.ready
+        )
+        self._snapshot = snapshot
+        self.top_k.apply(snapshot)
+        self.groups.apply(snapshot)
+        self.activity.apply(snapshot)
+        return snapshot
+
+
+_engine: Optional[SnapshotEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_snapshot_engine() -> SnapshotEngine:
+    """获取全局共享的快照引擎（首次调用时按配置创建）"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from config.config_manager import config_manager
+                from core.collectors import create_collector
+                _engine = SnapshotEngine(
+                    max_staleness=config_manager.get('snapshot.max_staleness', 1.0),
+                    collector=create_collector(config_manager.get('snapshot.backend', 'auto'))
+                )
+                _engine.activity.active_cpu_percent = config_manager.get('selection.active_cpu_percent', 1.0)
+    return _engine
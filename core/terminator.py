@@ -0,0 +1,147 @@
+# 进程终止流水线
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import psutil
+
+
+# 单个进程的终止结果
+OUTCOME_EXITED = 'exited'        # 收到 TERM 后在期限内退出
+OUTCOME_TIMEOUT = 'timeout'      # 期限内未退出（不强制结束）
+OUTCOME_GONE = 'gone'            # 发送信号前进程已不存在（或 PID 已被复用）
+OUTCOME_DENIED = 'denied'        # 无权限
+OUTCOME_ERROR = 'error'
+OUTCOME_CANCELLED = 'cancelled'  # 任务被取消（未发送 TERM，或不再等待其退出）
+
+# 等待进程退出时检查取消标志的间隔（秒）
+CANCEL_CHECK_INTERVAL = 0.05
+
+
+class TerminationPipeline:
+    """
+    批量温和终止进程
+    1. 对整批进程依次发送 TERM（可选速率限制）
+    2. 用 psutil.wait_procs 同时等待所有进程，共享一个全局期限
+    3. 返回每个进程的终止结果
+    """
+
+    def __init__(self, deadline: float = 3.0, max_terms_per_second: float = 0.0,
+                 process_factory: Optional[Callable] = None, wait_procs: Optional[Callable] = None):
+        """
+        deadline: 整批进程的总等待期限（秒）
+        max_terms_per_second: 每秒最多发送的 TERM 信号数，0 表示不限速
+        process_factory / wait_procs: 替换 psutil.Process / psutil.wait_procs（性能测试中使用模拟进程表）
+        """
+        self.deadline = deadline
+        self.max_terms_per_second = max_terms_per_second
+        self._process = process_factory or psutil.Process
+        self._wait_procs = wait_procs or psutil.wait_procs
+
+    def run(self, candidates: List[Dict], deadline: Optional[float] = None,
+            on_event: Optional[Callable[[str, Dict], None]] = None,
+            cancel: Optional[threading.Event] = None) -> List[Dict]:
+        """
+        终止一批进程
+        candidates: get_memory_hogs() 返回的进程信息字典
+        on_event: 进度回调 (事件名, 结果字典)，事件名为 'term_sent' 或最终结果
+        cancel: 取消标志，置位后不再发送 TERM，也不再等待（CANCEL_CHECK_INTERVAL 内返回）
+        返回与 candidates 顺序一致的结果列表
+        """
+        if deadline is None:
+            deadline = self.deadline
+        start = time.monotonic()
+        end = start + deadline
+
+        results = []
+        waiting: Dict[int, Dict] = {}
+        procs = []
+        min_gap = 1.0 / self.max_terms_per_second if self.max_terms_per_second > 0 else 0.0
+        last_sent = 0.0
+
+        for proc_info in candidates:
+            result = {
+                'pid': proc_info['pid'],
+                'name': proc_info['name'],
+                'memory_mb': proc_info.get('memory_mb', 0.0),
+                'outcome': OUTCOME_ERROR,
+                'elapsed': 0.0
+            }
+            results.append(result)
+
+            if min_gap and last_sent:
+                wait = last_sent + min_gap - time.monotonic()
+                if wait > 0:
+                    _sleep(wait, cancel)
+
+            if cancel is not None and cancel.is_set():
+                result['outcome'] = OUTCOME_CANCELLED
+                self._emit(on_event, OUTCOME_CANCELLED, result)
+                continue
+
+            outcome = self._send_term(proc_info, result, procs)
+            if outcome is None:
+                last_sent = time.monotonic()
+                waiting[proc_info['pid']] = result
+                self._emit(on_event, 'term_sent', result)
+            else:
+                result['outcome'] = outcome
+                self._emit(on_event, outcome, result)
+
+        if procs:
+            def on_exit(proc):
+                result = waiting.pop(proc.pid, None)
+                if result is not None:
+                    result['outcome'] = OUTCOME_EXITED
+                    result['elapsed'] = round(time.monotonic() - start, 3)
+                    self._emit(on_event, OUTCOME_EXITED, result)
+
+            alive = procs
+            while alive:
+                remaining = end - time.monotonic()
+                if remaining <= 0 or (cancel is not None and cancel.is_set()):
+                    break
+                # 有取消标志时分段等待，保证能及时响应取消
+                timeout = remaining if cancel is None else min(remaining, CANCEL_CHECK_INTERVAL)
+                _, alive = self._wait_procs(alive, timeout=timeout, callback=on_exit)
+
+        final = OUTCOME_CANCELLED if cancel is not None and cancel.is_set() else OUTCOME_TIMEOUT
+        for result in waiting.values():
+            result['outcome'] = final
+            result['elapsed'] = round(time.monotonic() - start, 3)
+            self._emit(on_event, final, result)
+
+        return results
+
+    def _send_term(self, proc_info: Dict, result: Dict, procs: List) -> Optional[str]:
+        """发送 TERM 信号，成功返回 None，否则返回结果"""
+        try:
+            proc = self._process(proc_info['pid'])
+            # 快照可能已过期，确认 PID 没有被其他进程复用
+            create_time = proc_info.get('create_time')
+            if create_time and abs(proc.create_time() - create_time) > 0.01:
+                return OUTCOME_GONE
+            proc.terminate()
+            procs.append(proc)
+            return None
+        except psutil.NoSuchProcess:
+            return OUTCOME_GONE
+        except psutil.AccessDenied:
+            return OUTCOME_DENIED
+        except Exception as e:
+            print(f"❌ 清理 {proc_info['name']} 时出错: {e}")
+            return OUTCOME_ERROR
+
+    def _emit(self, on_event, event: str, result: Dict):
+        if on_event is not None:
+            try:
+                on_event(event, result)
+            except Exception as e:
+                print(f"⚠️ 终止事件回调失败: {e}")
+
+
+def _sleep(seconds: float, cancel: Optional[threading.Event]):
+    if cancel is None:
+        time.sleep(seconds)
+    else:
+        cancel.wait(seconds)
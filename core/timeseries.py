@@ -0,0 +1,190 @@
+# 环形缓冲时间序列存储
+import math
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:     # numpy 为可选依赖，缺失时退化为纯 Python 统计
+    np = None
+
+
+class TimeSeriesStore:
+    """
+    列式环形缓冲区，每个指标一列，预分配定长数组
+    - append 为 O(1)
+    - 每个值写入两次（i 和 i + capacity），任意不超过容量的窗口在内存中都是连续的，
+      因此窗口查询直接返回 memoryview 切片，不复制数据
+    - 安装了 numpy 时，统计查询在同一块内存上向量化计算
+
+    时间戳使用 float64，指标使用 float32：24 小时 1Hz 数据、5 个指标约 5MB
+    """
+
+    def __init__(self, capacity: int, columns: Sequence[str], max_tracked_pids: int = 4):
+        self.capacity = capacity
+        self.columns = list(columns)
+        self.max_tracked_pids = max_tracked_pids
+
+        size = capacity * 2
+        self._timestamps = array('d', bytes(8 * size))
+        self._data: Dict[str, array] = {name: array('f', bytes(4 * size)) for name in self.columns}
+        # 跟踪进程的 RSS（MB），进程不存在时记为 NaN
+        self._pid_slots: Dict[int, int] = {}
+        self._pid_data: List[array] = [array('f', [math.nan]) * size for _ in range(max_tracked_pids)]
+
+        self._pos = 0       # 下一个写入位置（0 ~ capacity-1）
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, timestamp: float, values: Dict[str, float],
+               process_rss_mb: Optional[Dict[int, float]] = None):
+        """追加一个采样点"""
+        with self._lock:
+            i = self._pos
+            j = i + self.capacity
+
+            self._timestamps[i] = self._timestamps[j] = timestamp
+            for name, column in self._data.items():
+                column[i] = column[j] = values.get(name, math.nan)
+
+            for pid, slot in self._pid_slots.items():
+                value = math.nan
+                if process_rss_mb is not None:
+                    value = process_rss_mb.get(pid, math.nan)
+                column = self._pid_data[slot]
+                column[i] = column[j] = value
+
+            self._pos = (i + 1) % self.capacity
+            if self._count < self.capacity:
+                self._count += 1
+
+    def track_pid(self, pid: int) -> bool:
+        """开始记录某个进程的 RSS，槽位已满时返回 False"""
+        with self._lock:
+            if pid in self._pid_slots:
+                return True
+            used = set(self._pid_slots.values())
+            for slot in range(self.max_tracked_pids):
+                if slot not in used:
+                    column = self._pid_data[slot]
+                    column[:] = array('f', [math.nan]) * len(column)
+                    self._pid_slots[pid] = slot
+                    return True
+            return False
+
+    def untrack_pid(self, pid: int):
+        with self._lock:
+            self._pid_slots.pop(pid, None)
+
+    @property
+    def tracked_pids(self) -> List[int]:
+        return list(self._pid_slots)
+
+    def _window(self, last: Optional[int], seconds: Optional[float]):
+        """返回窗口在镜像缓冲区中的 [start, end) 下标"""
+        end = self._pos + self.capacity
+        n = self._count if last is None else min(last, self._count)
+        start = end - n
+
+        if seconds is not None and n:
+            since = self._timestamps[end - 1] - seconds
+            start = bisect_left(self._timestamps, since, start, end)
+        return start, end
+
+    def timestamps(self, last: Optional[int] = None, seconds: Optional[float] = None) -> memoryview:
+        """时间戳窗口（零拷贝视图）"""
+        start, end = self._window(last, seconds)
+        return memoryview(self._timestamps)[start:end]
+
+    def column(self, name: str, last: Optional[int] = None,
+               seconds: Optional[float] = None) -> memoryview:
+        """指标窗口（零拷贝视图），last 为最近 N 个点，seconds 为最近 N 秒"""
+        start, end = self._window(last, seconds)
+        return memoryview(self._data[name])[start:end]
+
+    def process_rss(self, pid: int, last: Optional[int] = None,
+                    seconds: Optional[float] = None) -> Optional[memoryview]:
+        """跟踪进程的 RSS 窗口（MB），未跟踪时返回 None"""
+        slot = self._pid_slots.get(pid)
+        if slot is None:
+            return None
+        start, end = self._window(last, seconds)
+        return memoryview(self._pid_data[slot])[start:end]
+
+    def stats(self, name: str, last: Optional[int] = None, seconds: Optional[float] = None,
+              percentiles: Sequence[float] = (50, 95)) -> Optional[Dict[str, float]]:
+        """
+        窗口统计：min / max / mean / 百分位 / 变化率（每秒）
+        name 可以是指标列名，也可以是 'pid:<PID>' 表示跟踪进程的 RSS
+        """
+        with self._lock:
+            if name.startswith('pid:'):
+                values = self.process_rss(int(name[4:]), last, seconds)
+            else:
+                values = self.column(name, last, seconds)
+            if values is None:
+                return None
+            times = self.timestamps(last, seconds)
+            if np is not None:
+                return _stats_numpy(np.frombuffer(values, dtype=np.float32),
+                                    np.frombuffer(times, dtype=np.float64), percentiles)
+            return _stats_python(values, times, percentiles)
+
+    def rate_of_change(self, name: str, seconds: float) -> Optional[float]:
+        """最近 seconds 秒内的平均变化率（每秒）"""
+        result = self.stats(name, seconds=seconds, percentiles=())
+        return result['rate'] if result else None
+
+
+def _stats_numpy(values, times, percentiles) -> Optional[Dict[str, float]]:
+    mask = ~np.isnan(values)
+    if not mask.any():
+        return None
+    valid = values[mask]
+    valid_times = times[mask]
+
+    result = {
+        'count': int(valid.size),
+        'min': float(valid.min()),
+        'max': float(valid.max()),
+        'mean': float(valid.mean()),
+        'rate': 0.0
+    }
+    for p, v in zip(percentiles, np.percentile(valid, list(percentiles)) if percentiles else ()):
+        result[f'p{p:g}'] = float(v)
+
+    span = valid_times[-1] - valid_times[0]
+    if span > 0:
+        result['rate'] = float((valid[-1] - valid[0]) / span)
+    return result
+
+
+def _stats_python(values, times, percentiles) -> Optional[Dict[str, float]]:
+    points = [(t, v) for t, v in zip(times, values) if not math.isnan(v)]
+    if not points:
+        return None
+    valid = [v for _, v in points]
+    ordered = sorted(valid)
+
+    result = {
+        'count': len(valid),
+        'min': ordered[0],
+        'max': ordered[-1],
+        'mean': sum(valid) / len(valid),
+        'rate': 0.0
+    }
+    for p in percentiles:
+        # 与 numpy 默认的线性插值保持一致
+        k = (len(ordered) - 1) * p / 100
+        lo, hi = math.floor(k), math.ceil(k)
+        result[f'p{p:g}'] = ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+    span = points[-1][0] - points[0][0]
+    if span > 0:
+        result['rate'] = (points[-1][1] - points[0][1]) / span
+    return result
@@ -0,0 +1,104 @@
+# 增量 Top-K 进程索引
+import threading
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.snapshot import ProcessRecord
+
+KEY_MEMORY = 'memory'
+KEY_CPU = 'cpu'
+
+
+class TopKTracker:
+    """
+    按内存（RSS）和 CPU 占用排序的进程索引
+    - 每代快照只根据差异（新增 / 变化 / 退出）更新，单个进程更新为二分查找 + 插入
+    - 查询 Top-K 从有序表尾部直接取，开销与 K 成正比，不需要对全部进程排序
+    - 快照代数不连续（漏掉中间某代）时整体重建
+    """
+
+    def __init__(self):
+        self.generation = 0
+        self._records: Dict[int, ProcessRecord] = {}
+        # 升序排列的 (指标值, pid)
+        self._by_memory: List[Tuple[int, int]] = []
+        self._by_cpu: List[Tuple[float, int]] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def apply(self, snapshot):
+        """用新一代快照更新索引"""
+        with self._lock:
+            delta = snapshot.delta
+            if delta is None or snapshot.generation != self.generation + 1:
+                self._rebuild(snapshot.processes)
+            else:
+                for record in delta.removed:
+                    self._remove(record)
+                for record in delta.changed:
+                    self._update(record)
+                for record in delta.added:
+                    self._insert(record)
+            self.generation = snapshot.generation
+
+    def _rebuild(self, processes):
+        self._records = {p.pid: p for p in processes}
+        self._by_memory = sorted((p.rss, p.pid) for p in processes)
+        self._by_cpu = sorted((p.cpu_percent, p.pid) for p in processes)
+
+    def _insert(self, record: ProcessRecord):
+        self._records[record.pid] = record
+        insort(self._by_memory, (record.rss, record.pid))
+        insort(self._by_cpu, (record.cpu_percent, record.pid))
+
+    def _remove(self, record: ProcessRecord):
+        current = self._records.pop(record.pid, None)
+        if current is None:
+            return
+        _discard(self._by_memory, (current.rss, current.pid))
+        _discard(self._by_cpu, (current.cpu_percent, current.pid))
+
+    def _update(self, record: ProcessRecord):
+        old = self._records.get(record.pid)
+        if old is None:
+            self._insert(record)
+            return
+        self._records[record.pid] = record
+        if old.rss != record.rss:
+            _discard(self._by_memory, (old.rss, old.pid))
+            insort(self._by_memory, (record.rss, record.pid))
+        if old.cpu_percent != record.cpu_percent:
+            _discard(self._by_cpu, (old.cpu_percent, old.pid))
+            insort(self._by_cpu, (record.cpu_percent, record.pid))
+
+    def top(self, k: Optional[int] = None, key: str = KEY_MEMORY, minimum: Optional[float] = None,
+            predicate: Optional[Callable[[ProcessRecord], bool]] = None) -> List[ProcessRecord]:
+        """
+        按指标从大到小返回进程
+        k: 最多返回多少个（None 表示不限）
+        minimum: 只返回指标严格大于该值的进程
+        predicate: 额外的过滤条件
+        """
+        with self._lock:
+            ordered = self._by_memory if key == KEY_MEMORY else self._by_cpu
+            records = self._records
+            result = []
+            for i in range(len(ordered) - 1, -1, -1):
+                value, pid = ordered[i]
+                if minimum is not None and value <= minimum:
+                    break
+                record = records[pid]
+                if predicate is not None and not predicate(record):
+                    continue
+                result.append(record)
+                if k is not None and len(result) >= k:
+                    break
+            return result
+
+
+def _discard(ordered: list, item: tuple):
+    i = bisect_left(ordered, item)
+    if i < len(ordered) and ordered[i] == item:
+        del ordered[i]
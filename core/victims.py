@@ -0,0 +1,352 @@
+# 清理对象选择
+"""
+按"需要释放多少内存"求代价最小的一组清理对象（应用组或单个进程），在发送任何信号之前给出可解释的计划
+
+- 需要释放的量：把内存使用率降到 阈值 - hysteresis_percent 所需的字节数（留出余量，避免清理后很快又超过阈值）
+- 每个候选的收益为预计释放量（应用组按成员 PSS 之和，单个进程按 USS），代价为
+    base + activity × 活跃度 + restart × 重启代价 + priority × 用户优先级
+  活跃度：刚刚占用过 CPU 为 1，按空闲时间以 idle_halflife 为半衰期衰减
+  重启代价：运行时间（满 restart_horizon 记 1）加上进程数（每多一个进程 0.1，最多 1）
+  用户优先级：priorities 中配置的进程名，组内取最大值
+- 求解"收益之和不低于需要量、个数不超过每批上限、代价之和最小"的覆盖背包：
+  先用动态规划精确求解（收益按需要量划分为 resolution 份，向下取整，保证实际覆盖），
+  超过 solver_time_ms 改用贪心（按 代价 / 收益 排序，再与单个即可覆盖的最便宜候选比较，去掉多余的）
+- 全部候选加起来也不够时，选收益最大的几个（尽力而为），计划中标记为未满足
+
+ActivityTracker 由快照引擎按差异维护每个进程最近一次活跃的时间，用于计算空闲时间
+"""
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from core import instrumentation
+from core.snapshot import SystemMemory
+
+MB = 1024 * 1024
+
+SOLVER_NONE = 'none'                # 不需要释放内存
+SOLVER_DP = 'dp'                    # 动态规划（最优）
+SOLVER_GREEDY = 'greedy'            # 贪心（动态规划超时或无解时）
+SOLVER_BEST_EFFORT = 'best_effort'  # 全部候选也不够，选收益最大的几个
+
+DEFAULT_WEIGHTS = {'base': 1.0, 'activity': 2.0, 'restart': 1.0, 'priority': 1.0}
+
+
+class ActivityTracker:
+    """
+    每个进程最近一次活跃（CPU 占用达到 active_cpu_percent）的时间
+    快照代数连续时只处理差异中的进程和当前活跃的进程
+    """
+
+    def __init__(self, active_cpu_percent: float = 1.0):
+        self.active_cpu_percent = active_cpu_percent
+        self.generation = 0
+        self.started = time.time()
+        self._active: Set[Tuple[int, float]] = set()
+        self._last_active: Dict[Tuple[int, float], float] = {}
+        self._lock = threading.Lock()
+
+    def apply(self, snapshot):
+        """用新一代快照更新活跃时间"""
+        with self._lock:
+            delta = snapshot.delta
+            if not snapshot.cpu_ready:
+                # 没有 CPU 基线，本代不判断活跃与否
+                pass
+            elif delta is None or snapshot.generation != self.generation + 1:
+                self._active = {(p.pid, p.create_time) for p in snapshot.processes
+                                if p.cpu_percent >= self.active_cpu_percent}
+                alive = {(p.pid, p.create_time) for p in snapshot.processes}
+                self._last_active = {key: ts for key, ts in self._last_active.items() if key in alive}
+            else:
+                for record in delta.removed:
+                    key = (record.pid, record.create_time)
+                    self._active.discard(key)
+                    self._last_active.pop(key, None)
+                for record in delta.changed + delta.added:
+                    key = (record.pid, record.create_time)
+                    if record.cpu_percent >= self.active_cpu_percent:
+                        self._active.add(key)
+                    else:
+                        self._active.discard(key)
+            for key in self._active:
+                self._last_active[key] = snapshot.timestamp
+            self.generation = snapshot.generation
+
+    def idle_seconds(self, pid: int, create_time: float, now: Optional[float] = None) -> float:
+        """进程已空闲多久（秒）；开始跟踪以来从未活跃过的，从进程启动或开始跟踪时算起"""
+        if now is None:
+            now = time.time()
+        last = self._last_active.get((pid, create_time))
+        if last is None:
+            last = max(create_time or 0.0, self.started)
+        return max(0.0, now - last)
+
+
+class VictimPlan(NamedTuple):
+    """一次清理的选择结果"""
+    needed_mb: float            # 需要释放的内存（MB）
+    target_percent: float       # 目标内存使用率（阈值 - hysteresis）
+    memory_percent: float       # 计划时的内存使用率
+    selected: Tuple[Dict, ...]  # 选中的候选（含收益、代价及各项分数）
+    rejected: Tuple[Dict, ...]  # 未选中的候选及原因（含被白名单排除的）
+    covered_mb: float           # 选中候选的预计释放量之和
+    cost: float                 # 选中候选的代价之和
+    satisfied: bool             # 预计释放量是否达到需要量
+    solver: str
+    elapsed_ms: float
+
+    def to_dict(self) -> Dict:
+        return {
+            'needed_mb': round(self.needed_mb, 1),
+            'target_percent': round(self.target_percent, 1),
+            'memory_percent': round(self.memory_percent, 1),
+            'selected': [dict(entry) for entry in self.selected],
+            'rejected': [dict(entry) for entry in self.rejected],
+            'covered_mb': round(self.covered_mb, 1),
+            'cost': round(self.cost, 3),
+            'satisfied': self.satisfied,
+            'solver': self.solver,
+            'elapsed_ms': round(self.elapsed_ms, 2),
+        }
+
+    def explain(self) -> List[str]:
+        """逐行说明选择的理由"""
+        if self.solver == SOLVER_NONE:
+            return [f"内存使用 {self.memory_percent:.1f}% 已低于目标 {self.target_percent:.1f}%，不需要结束进程"]
+        lines = [f"内存使用 {self.memory_percent:.1f}%，目标 {self.target_percent:.1f}%，"
+                 f"需要释放 {self.needed_mb:.0f} MB；选中 {len(self.selected)} 个，"
+                 f"预计释放 {self.covered_mb:.0f} MB，代价 {self.cost:.2f}（{self.solver}，{self.elapsed_ms:.1f} ms）"]
+        if not self.satisfied:
+            lines.append("可清理的候选不足以达到目标，尽力而为")
+        for entry in self.selected:
+            lines.append(f"  ✔ {entry['name']}: 释放 {entry['freed_mb']:.0f} MB，代价 {entry['cost']:.2f}"
+                         f"（空闲 {entry['idle_seconds']:.0f} 秒，活跃度 {entry['activity']:.2f}，"
+                         f"重启 {entry['restart']:.2f}，优先级 {entry['priority']:g}）")
+        for entry in self.rejected:
+            lines.append(f"  ✘ {entry['name']}: {entry['reason']}")
+        return lines
+
+
+def bytes_needed(memory: SystemMemory, target_percent: float) -> int:
+    """把内存使用率（与 psutil 一致，按可用内存计算）降到 target_percent 需要释放的字节数"""
+    if memory.total <= 0:
+        return 0
+    in_use = memory.total - memory.available
+    return max(0, int(in_use - memory.total * target_percent / 100))
+
+
+def solve_dp(benefits: Sequence[float], costs: Sequence[float], need: float, max_count: int,
+             resolution: int = 256, deadline: Optional[float] = None) -> Optional[List[int]]:
+    """
+    覆盖背包的动态规划：收益之和 >= need、个数 <= max_count 时代价之和最小的下标集合
+    无解（按取整后的收益）或超过 deadline（time.monotonic()）时返回 None
+    """
+    if need <= 0:
+        return []
+    unit = need / resolution
+    size = resolution
+    weights = [min(size, int(b / unit)) for b in benefits]
+    inf = math.inf
+    # best[k][w]：用 k 个候选、取整后收益（封顶 size）为 w 时的最小代价；
+    # chain[k][w] 为对应的选择（(下标, 前一个) 组成的链表，各状态共享前缀）
+    best = [[inf] * (size + 1) for _ in range(max_count + 1)]
+    chain: List[List[Optional[tuple]]] = [[None] * (size + 1) for _ in range(max_count + 1)]
+    best[0][0] = 0.0
+    for i, (weight, cost) in enumerate(zip(weights, costs)):
+        if deadline is not None and time.monotonic() > deadline:
+            return None
+        if weight <= 0:
+            continue
+        # k 从大到小，保证每个候选最多被选一次
+        for k in range(min(max_count, i + 1), 0, -1):
+            row, prev_row = best[k], best[k - 1]
+            row_chain, prev_chain = chain[k], chain[k - 1]
+            for w in range(size + 1):
+                base = prev_row[w]
+                if base == inf:
+                    continue
+                target = min(size, w + weight)
+                if base + cost < row[target]:
+                    row[target] = base + cost
+                    row_chain[target] = (i, prev_chain[w])
+
+    count = min(range(max_count + 1), key=lambda k: best[k][size])
+    if best[count][size] == inf:
+        return None
+    picked = []
+    node = chain[count][size]
+    while node is not None:
+        picked.append(node[0])
+        node = node[1]
+    return picked
+
+
+def solve_greedy(benefits: Sequence[float], costs: Sequence[float], need: float,
+                 max_count: int) -> Optional[List[int]]:
+    """贪心近似：按 代价 / 收益 选，与单个即可覆盖的最便宜候选比较，再去掉多余的；无解时返回 None"""
+    if need <= 0:
+        return []
+    indices = [i for i, b in enumerate(benefits) if b > 0]
+    plans = []
+    for order in (sorted(indices, key=lambda i: costs[i] / benefits[i]),
+                  sorted(indices, key=lambda i: benefits[i], reverse=True)):
+        picked, total = [], 0.0
+        for i in order:
+            if total >= need or len(picked) >= max_count:
+                break
+            picked.append(i)
+            total += benefits[i]
+        if total >= need:
+            plans.append(picked)
+    single = [i for i in indices if benefits[i] >= need]
+    if single and max_count > 0:
+        plans.append([min(single, key=lambda i: costs[i])])
+    if not plans:
+        return None
+
+    pruned = []
+    for picked in plans:
+        picked = list(picked)
+        for i in sorted(picked, key=lambda i: costs[i], reverse=True):
+            if sum(benefits[j] for j in picked if j != i) >= need:
+                picked.remove(i)
+        pruned.append(picked)
+    return min(pruned, key=lambda picked: (sum(costs[i] for i in picked), len(picked)))
+
+
+class VictimSelector:
+    """
+    清理对象选择器
+    hysteresis_percent: 目标内存使用率为阈值减去该值
+    weights: 代价权重（base / activity / restart / priority）
+    idle_halflife: 活跃度半衰期（秒）
+    restart_horizon: 运行时间达到该值（秒）重启代价记满
+    priorities: 进程名 -> 用户优先级（越大越不愿意结束）
+    solver_time_ms: 动态规划的时间上限
+    resolution: 动态规划的收益划分份数
+    activity: 活跃时间跟踪（默认使用快照引擎维护的）
+    """
+
+    def __init__(self, hysteresis_percent: float = 5.0, weights: Optional[Dict[str, float]] = None,
+                 idle_halflife: float = 300.0, restart_horizon: float = 3600.0,
+                 priorities: Optional[Dict[str, float]] = None, solver_time_ms: float = 50.0,
+                 resolution: int = 256, activity: Optional[ActivityTracker] = None):
+        self.hysteresis_percent = hysteresis_percent
+        self.weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+        self.idle_halflife = idle_halflife
+        self.restart_horizon = restart_horizon
+        self.priorities = {name.lower(): value for name, value in (priorities or {}).items()}
+        self.solver_time_ms = solver_time_ms
+        self.resolution = resolution
+        self.activity = activity
+
+    # ---------- 评分 ----------
+
+    def score(self, candidate: Dict, now: Optional[float] = None) -> Dict:
+        """计算单个候选（应用组或进程字典）的收益和代价"""
+        if now is None:
+            now = time.time()
+        members = candidate.get('members') or [candidate]
+        if self.activity is not None:
+            idle = min(self.activity.idle_seconds(m['pid'], m.get('create_time') or 0.0, now) for m in members)
+        else:
+            idle = 0.0 if candidate.get('cpu_percent', 0.0) > 0 else self.idle_halflife
+        activity = 0.5 ** (idle / self.idle_halflife) if self.idle_halflife > 0 else 0.0
+
+        uptime = max(0.0, now - (candidate.get('create_time') or now))
+        count = candidate.get('process_count', len(members))
+        restart = (min(1.0, uptime / self.restart_horizon) if self.restart_horizon > 0 else 0.0) \
+            + min(1.0, (count - 1) / 10)
+
+        names = candidate.get('names') or [m['name'] for m in members]
+        priority = max((self.priorities.get(name.lower(), 0.0) for name in names), default=0.0)
+
+        w = self.weights
+        cost = w['base'] + w['activity'] * activity + w['restart'] * restart + w['priority'] * priority
+        return {
+            'pid': candidate['pid'],
+            'name': candidate['name'],
+            'process_count': count,
+            'freed_mb': round(candidate.get('estimate_mb', candidate['memory_mb']), 1),
+            'cost': round(cost, 3),
+            'idle_seconds': round(idle, 1),
+            'activity': round(activity, 3),
+            'restart': round(restart, 3),
+            'priority': priority,
+        }
+
+    # ---------- 求解 ----------
+
+    @instrumentation.timed('cleaner.select')
+    def plan(self, candidates: List[Dict], memory: SystemMemory, threshold: float, max_victims: int,
+             excluded: Iterable[Dict] = ()) -> VictimPlan:
+        """
+        candidates: 已过滤白名单、带 estimate_mb（预计释放量）的候选
+        excluded: 被排除的候选（{'name', 'reason'}），只用于解释
+        """
+        start = time.monotonic()
+        target = max(0.0, threshold - self.hysteresis_percent)
+        need_mb = bytes_needed(memory, target) / MB
+        scored = [self.score(candidate) for candidate in candidates]
+        rejected = [dict(entry) for entry in excluded]
+
+        benefits = [entry['freed_mb'] for entry in scored]
+        costs = [entry['cost'] for entry in scored]
+        satisfied = True
+        if need_mb <= 0 or max_victims <= 0:
+            picked, solver = [], SOLVER_NONE
+        else:
+            deadline = start + self.solver_time_ms / 1000
+            picked, solver = solve_dp(benefits, costs, need_mb, max_victims, self.resolution, deadline), SOLVER_DP
+            if picked is None:
+                picked, solver = solve_greedy(benefits, costs, need_mb, max_victims), SOLVER_GREEDY
+            if picked is None:
+                satisfied = False
+                picked = sorted(range(len(scored)), key=lambda i: (-benefits[i], costs[i]))[:max_victims]
+                solver = SOLVER_BEST_EFFORT
+
+        chosen = set(picked)
+        selected = [scored[i] for i in sorted(chosen, key=lambda i: -benefits[i])]
+        for i, entry in enumerate(scored):
+            if i not in chosen:
+                if solver == SOLVER_NONE:
+                    reason = "未选中：内存已低于目标"
+                elif solver == SOLVER_BEST_EFFORT:
+                    reason = f"未选中：每批最多 {max_victims} 个，优先释放量更大的"
+                else:
+                    reason = "未选中：选中的组合代价更低"
+                rejected.append(dict(entry, reason=reason))
+        for entry in selected:
+            entry['reason'] = "选中"
+
+        covered = sum(entry['freed_mb'] for entry in selected)
+        if need_mb > 0 and covered < need_mb:
+            satisfied = False
+        return VictimPlan(
+            needed_mb=need_mb,
+            target_percent=target,
+            memory_percent=memory.percent,
+            selected=tuple(selected),
+            rejected=tuple(rejected),
+            covered_mb=covered,
+            cost=sum(entry['cost'] for entry in selected),
+            satisfied=satisfied,
+            solver=solver,
+            elapsed_ms=(time.monotonic() - start) * 1000,
+        )
+
+
+def create_selector(config, activity: Optional[ActivityTracker] = None) -> VictimSelector:
+    """按配置（ConfigManager）创建清理对象选择器"""
+    return VictimSelector(
+        hysteresis_percent=config.get('selection.hysteresis_percent', 5.0),
+        weights=config.get('selection.weights', DEFAULT_WEIGHTS),
+        idle_halflife=config.get('selection.idle_halflife', 300.0),
+        restart_horizon=config.get('selection.restart_horizon', 3600.0),
+        priorities=config.get('selection.priorities', {}),
+        solver_time_ms=config.get('selection.solver_time_ms', 50.0),
+        resolution=config.get('selection.resolution', 256),
+        activity=activity
+    )
@@ -1,7 +1,8 @@
-from core.monitor import show_system_status
-from core.cleaner_safe import clean_memory
+import sys
 
-def run_memwatch():
+
+def run_memwatch(show_stats=False):
+    # 先显示提示，监控和清理模块（psutil 等）在输入模式后再导入
     mode = input("请选择模式 (office/game): ").strip().lower()
 
     if mode not in ['office', 'game']:
@@ -9,10 +10,25 @@ def run_memwatch():
         return 
 
     print("🚀 Memwatch 启动中...")
+    from core import instrumentation
+    from config.config_manager import config_manager
+
+    # --stats 强制开启性能统计，否则按配置 instrumentation.enabled
+    instrumentation.configure(config_manager)
+    if show_stats:
+        instrumentation.enable()
+
+    from core.monitor import show_system_status
+    from core.cleaner_safe import clean_memory
+
     print(f"\n当前模式: {mode.upper()}")
     show_system_status()
     clean_memory(mode=mode)
 
+    if show_stats:
+        print("\n📈 性能统计")
+        print("\n".join(instrumentation.format_report()))
+
 
 if __name__ == '__main__':
-    run_memwatch()
+    run_memwatch(show_stats='--stats' in sys.argv[1:])
@@ -0,0 +1,261 @@
+# cgroup v2 预算与 memory.reclaim 回收：在临时目录伪造的 cgroupfs 上测试
+import errno
+import os
+
+import pytest
+
+from core import cgroup
+from core.cgroup import MB, CgroupReclaimer, _parse_limit
+
+
+def make_cgroup(root, path, current, high='max', limit='max', reclaim=True, stat=None, pressure=None):
+    """在伪造的 cgroupfs 中创建一个 cgroup（只写入回收器会读取的文件）"""
+    directory = root / path
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / 'memory.current').write_text(f'{current}\n')
+    (directory / 'memory.high').write_text(f'{high}\n')
+    (directory / 'memory.max').write_text(f'{limit}\n')
+    if stat is not None:
+        (directory / 'memory.stat').write_text(''.join(f'{k} {v}\n' for k, v in stat.items()))
+    if pressure is not None:
+        (directory / 'memory.pressure').write_text(pressure)
+    if reclaim:
+        (directory / 'memory.reclaim').write_text('')
+    return directory
+
+
+class FakeClock:
+    """替换 core.cgroup 模块中的 time：只在伪造的内核回收时前进"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+class FakeKernel:
+    """
+    替换 core.cgroup 模块中的 os：写入 memory.reclaim 时按可回收量减少 memory.current
+    回收不到请求的数量时与内核一样报 EAGAIN（已回收的部分保留）
+    """
+
+    def __init__(self, clock, reclaimable, step_seconds=0.0):
+        self.clock = clock
+        self.reclaimable = dict(reclaimable)    # cgroup 目录 -> 还能回收的字节数
+        self.step_seconds = step_seconds
+        self.writes = []                        # (cgroup 目录, 请求字节数)
+        self._fds = {}
+
+    def __getattr__(self, name):
+        return getattr(os, name)
+
+    def open(self, path, flags, *args):
+        fd = os.open(path, flags, *args)        # 文件不存在时照常报 ENOENT
+        if os.path.basename(path) == 'memory.reclaim':
+            self._fds[fd] = os.path.dirname(path)
+        return fd
+
+    def close(self, fd):
+        self._fds.pop(fd, None)
+        os.close(fd)
+
+    def write(self, fd, data):
+        directory = self._fds.get(fd)
+        if directory is None:
+            return os.write(fd, data)
+        request = int(data)
+        self.writes.append((directory, request))
+        self.clock.now += self.step_seconds
+        freed = min(request, self.reclaimable.get(directory, 0))
+        self.reclaimable[directory] = self.reclaimable.get(directory, 0) - freed
+        current_file = os.path.join(directory, 'memory.current')
+        with open(current_file) as f:
+            current = int(f.read())
+        with open(current_file, 'w') as f:
+            f.write(f'{current - freed}\n')
+        if freed < request:
+            raise OSError(errno.EAGAIN, os.strerror(errno.EAGAIN))
+        return len(data)
+
+
+@pytest.fixture
+def root(tmp_path):
+    (tmp_path / 'cgroup.controllers').write_text('cpu memory pids\n')
+    return tmp_path
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cgroup, 'time', clock)
+    return clock
+
+
+def install_kernel(monkeypatch, clock, reclaimable, step_seconds=0.0):
+    kernel = FakeKernel(clock, reclaimable, step_seconds)
+    monkeypatch.setattr(cgroup, 'os', kernel)
+    return kernel
+
+
+# ---------- 解析与预算 ----------
+
+@pytest.mark.parametrize('text, expected', [
+    ('max\n', None),
+    ('max', None),
+    ('', None),
+    (None, None),
+    ('not-a-number', None),
+    ('1073741824\n', 1073741824),
+])
+def test_parse_limit(text, expected):
+    assert _parse_limit(text) == expected
+
+
+def test_budget_prefers_memory_high(root):
+    make_cgroup(root, 'user.slice', current=900 * MB, high=600 * MB, limit=1024 * MB)
+    memory = CgroupReclaimer(str(root), {'user.slice': None}).read('user.slice')
+    assert (memory.high, memory.max, memory.budget) == (600 * MB, 1024 * MB, 600 * MB)
+    assert memory.excess == 300 * MB
+
+
+def test_budget_falls_back_to_memory_max(root):
+    make_cgroup(root, 'user.slice', current=900 * MB, high='max', limit=800 * MB)
+    memory = CgroupReclaimer(str(root), {'user.slice': 0}).read('user.slice')
+    assert memory.high is None
+    assert memory.budget == 800 * MB
+    assert memory.excess == 100 * MB
+
+
+def test_unlimited_cgroup_is_only_monitored(root):
+    make_cgroup(root, 'user.slice', current=900 * MB)
+    reclaimer = CgroupReclaimer(str(root), {'user.slice': None})
+    memory = reclaimer.read('user.slice')
+    assert (memory.high, memory.max, memory.budget, memory.excess) == (None, None, None, 0)
+    assert reclaimer.over_budget() == []
+
+
+def test_configured_budget_overrides_limits(root):
+    make_cgroup(root, 'user.slice', current=900 * MB, high=600 * MB, limit=1024 * MB)
+    memory = CgroupReclaimer(str(root), {'user.slice': 850 * MB}).read('user.slice')
+    assert memory.budget == 850 * MB
+    assert memory.excess == 50 * MB
+
+
+def test_read_stat_and_pressure(root):
+    make_cgroup(root, 'app', current=100, stat={'anon': 40, 'file': 60, 'inactive_anon': 10, 'inactive_file': 30},
+                pressure='some avg10=1.50 avg60=0.00 avg300=0.00 total=10\n'
+                         'full avg10=0.25 avg60=0.00 avg300=0.00 total=2\n')
+    memory = CgroupReclaimer(str(root), {'app': None}).read('app')
+    assert (memory.anon, memory.file, memory.reclaimable) == (40, 60, 40)
+    assert (memory.pressure_some, memory.pressure_full) == (1.5, 0.25)
+
+
+def test_missing_cgroup(root):
+    reclaimer = CgroupReclaimer(str(root), {'missing.slice': None})
+    assert reclaimer.available
+    assert reclaimer.read('missing.slice') is None
+    assert reclaimer.read_all() == []
+    assert reclaimer.reclaim('missing.slice', MB)['error']
+
+
+# ---------- 回收 ----------
+
+def test_reclaim_is_split_into_steps(root, clock, monkeypatch):
+    directory = make_cgroup(root, 'user.slice', current=2048 * MB)
+    kernel = install_kernel(monkeypatch, clock, {str(directory): 1024 * MB})
+    reclaimer = CgroupReclaimer(str(root), {'user.slice': None}, reclaim_step=256 * MB)
+
+    result = reclaimer.reclaim('user.slice', 600 * MB)
+    assert [request for _, request in kernel.writes] == [256 * MB, 256 * MB, 88 * MB]
+    assert result['complete'] and result['error'] is None
+    assert result['freed_mb'] == 600
+    assert 'user.slice' not in reclaimer._backoff
+
+
+def test_reclaim_stops_at_timeout(root, clock, monkeypatch):
+    directory = make_cgroup(root, 'user.slice', current=4096 * MB)
+    kernel = install_kernel(monkeypatch, clock, {str(directory): 4096 * MB}, step_seconds=0.4)
+    reclaimer = CgroupReclaimer(str(root), {'user.slice': None}, reclaim_step=100 * MB, reclaim_timeout=1.0)
+
+    result = reclaimer.reclaim('user.slice', 1000 * MB)
+    # 0.4 秒一步：第 3 步之后累计 1.2 秒，超过上限不再继续
+    assert len(kernel.writes) == 3
+    assert not result['complete']
+    assert result['freed_mb'] == 300
+    assert result['elapsed_ms'] == pytest.approx(1200)
+
+
+def test_reclaim_eagain_keeps_partial_result(root, clock, monkeypatch):
+    directory = make_cgroup(root, 'user.slice', current=1024 * MB)
+    kernel = install_kernel(monkeypatch, clock, {str(directory): 300 * MB})
+    reclaimer = CgroupReclaimer(str(root), {'user.slice': None}, reclaim_step=256 * MB)
+
+    result = reclaimer.reclaim('user.slice', 1000 * MB)
+    assert len(kernel.writes) == 2               # 第 2 步只回收到 44 MB，报 EAGAIN 后停止
+    assert result['error'] is None
+    assert not result['complete']
+    assert result['freed_mb'] == 300
+    assert reclaimer.reclaimed_total == 300 * MB
+
+
+def test_reclaim_enoent_without_kernel_support(root, clock):
+    make_cgroup(root, 'user.slice', current=1024 * MB, high=512 * MB, reclaim=False)
+    reclaimer = CgroupReclaimer(str(root), {'user.slice': None})
+
+    result = reclaimer.reclaim('user.slice', 100 * MB)
+    assert result['error'] == '内核不支持 memory.reclaim（需要 5.19 以上）'
+    assert not result['complete']
+    # 不带 O_CREAT：不会在 cgroup 目录里创建普通文件
+    assert not (root / 'user.slice' / 'memory.reclaim').exists()
+    assert reclaimer.over_budget() == []
+
+
+def test_under_delivering_reclaim_backs_off(root, clock, monkeypatch):
+    directory = make_cgroup(root, 'user.slice', current=1000 * MB, high=500 * MB)
+    kernel = install_kernel(monkeypatch, clock, {str(directory): 100 * MB})
+    reclaimer = CgroupReclaimer(str(root), {'user.slice': None}, reclaim_step=1024 * MB,
+                                retry_interval=30.0, margin=0)
+
+    results = reclaimer.enforce_budgets()
+    assert [r['freed_mb'] for r in results] == [100]
+    assert kernel.writes == [(str(directory), 500 * MB)]
+
+    # 冷却期内不再重试，即使仍然超出预算
+    clock.now += 29.0
+    assert reclaimer.read('user.slice').excess == 400 * MB
+    assert reclaimer.over_budget() == []
+    assert reclaimer.enforce_budgets() == []
+    assert reclaimer.reclaim_for(100 * MB) == []
+    assert len(kernel.writes) == 1
+
+    # 冷却期结束后重试
+    clock.now += 2.0
+    kernel.reclaimable[str(directory)] = 1000 * MB
+    results = reclaimer.enforce_budgets()
+    assert [r['freed_mb'] for r in results] == [400]
+    assert results[0]['complete']
+    assert reclaimer.read('user.slice').excess == 0
+
+
+def test_sufficient_reclaim_does_not_back_off(root, clock, monkeypatch):
+    directory = make_cgroup(root, 'user.slice', current=1000 * MB, high=500 * MB)
+    install_kernel(monkeypatch, clock, {str(directory): 1000 * MB})
+    reclaimer = CgroupReclaimer(str(root), {'user.slice': None}, reclaim_step=1024 * MB, margin=64 * MB)
+
+    results = reclaimer.enforce_budgets()
+    assert [r['freed_mb'] for r in results] == [564]
+    assert reclaimer._backoff == {}
+
+
+def test_reclaim_for_splits_by_reclaimable_memory(root, clock, monkeypatch):
+    a = make_cgroup(root, 'a.slice', current=1000 * MB, stat={'inactive_file': 300 * MB, 'inactive_anon': 0})
+    b = make_cgroup(root, 'b.slice', current=1000 * MB, stat={'inactive_file': 100 * MB, 'inactive_anon': 0})
+    kernel = install_kernel(monkeypatch, clock, {str(a): 1000 * MB, str(b): 1000 * MB})
+    reclaimer = CgroupReclaimer(str(root), {'a.slice': None, 'b.slice': None}, reclaim_step=1024 * MB)
+
+    reclaimer.reclaim_for(200 * MB)
+    assert dict(kernel.writes) == {str(a): 150 * MB, str(b): 50 * MB}
@@ -0,0 +1,77 @@
+# /proc 采集后端：描述符缓存不超出打开文件数限制，memory() 可以并发调用
+import sys
+import threading
+
+import pytest
+
+if not sys.platform.startswith('linux'):
+    pytest.skip("/proc 采集后端只在 Linux 下可用", allow_module_level=True)
+
+import resource
+
+from benchmarks.bench_collectors import build_fake_procfs
+from core.collectors import ProcfsCollector, default_fd_cache_size
+
+PROCESS_COUNT = 1500
+
+
+@pytest.fixture(scope='module')
+def fake_proc(tmp_path_factory):
+    root = tmp_path_factory.mktemp('proc')
+    build_fake_procfs(str(root), PROCESS_COUNT)
+    return str(root)
+
+
+@pytest.fixture
+def nofile_1024():
+    """把打开文件数软限制降到常见的默认值 1024"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and hard < 1024:
+        pytest.skip("打开文件数硬限制低于 1024")
+    resource.setrlimit(resource.RLIMIT_NOFILE, (1024, hard))
+    yield
+    resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+def test_default_cache_leaves_room_for_other_files(fake_proc, nofile_1024):
+    assert default_fd_cache_size() == 256
+    collector = ProcfsCollector(fake_proc)
+    try:
+        for _ in range(2):
+            _, _, processes = collector.collect()
+            assert len(processes) == PROCESS_COUNT
+            assert len(collector._pid_fds) <= 256
+    finally:
+        collector.close()
+
+
+def test_emfile_releases_cached_fds(fake_proc, nofile_1024):
+    # 上限超过软限制时，遇到 EMFILE 关闭缓存的描述符后重试，不丢进程也不在下次采集时崩溃
+    collector = ProcfsCollector(fake_proc, max_cached_fds=PROCESS_COUNT)
+    try:
+        for _ in range(3):
+            _, _, processes = collector.collect()
+            assert len(processes) == PROCESS_COUNT
+        assert collector.max_cached_fds < 1024
+    finally:
+        collector.close()
+
+
+def test_concurrent_memory_reads(fake_proc):
+    collector = ProcfsCollector(fake_proc)
+    expected = collector.memory()
+    results = []
+
+    def read():
+        results.extend(collector.memory() for _ in range(500))
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        collector.close()
+    assert len(results) == 2000
+    assert all(memory == expected for memory in results)
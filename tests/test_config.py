@@ -0,0 +1,127 @@
+# 配置管理：编译访问器、延迟保存、文件变更监视与重新加载
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from config.config_manager import ConfigManager
+from config.config_watcher import ConfigWatcher
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def _write_externally(path, config):
+    """模拟编辑器保存：写临时文件再原子替换"""
+    tmp = f"{path}.edit"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(config, f)
+    os.replace(tmp, path)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = ConfigManager(str(tmp_path / 'user_config.json'), save_delay=0.05)
+    yield manager
+    manager.stop_watching()
+    manager.flush()
+
+
+def test_creates_default_file(manager):
+    assert os.path.exists(manager.config_file)
+    assert manager.get('thresholds.office') == manager._get_default_config()['thresholds']['office']
+
+
+def test_accessor_follows_version(manager):
+    threshold = manager.accessor('thresholds.game')
+    missing = manager.accessor('no.such.key', 'fallback')
+    assert missing() == 'fallback'
+
+    value = threshold()
+    manager.config['thresholds']['game'] = value + 1    # 绕过 set()：版本不变，访问器仍返回缓存值
+    assert threshold() == value
+    manager.set('thresholds.game', 42.0)
+    assert threshold() == 42.0
+    assert manager.get('thresholds.game') == 42.0
+    assert missing() == 'fallback'
+
+
+def test_set_notifies_and_coalesces_saves(manager):
+    events = []
+    manager.add_change_listener(lambda m: events.append(m.version))
+    manager.set('thresholds.office', 61.0)
+    manager.set('scheduler.interval_minutes', 9)
+    assert len(events) == 2 and events[1] == events[0] + 1
+
+    # 两次修改合并为一次延迟保存
+    def saved():
+        with open(manager.config_file, encoding='utf-8') as f:
+            config = json.load(f)
+        return config['thresholds']['office'] == 61.0 and config['scheduler']['interval_minutes'] == 9
+    assert _wait_for(saved)
+    assert manager._save_timer is None
+
+
+def test_reload(manager):
+    manager.save()
+    assert manager.reload() is False                # 自己写入的文件不触发重新加载
+
+    config = manager._get_default_config()
+    config['thresholds']['office'] = 55.0
+    _write_externally(manager.config_file, config)
+    accessor = manager.accessor('thresholds.office')
+    assert manager.reload() is True
+    assert accessor() == 55.0
+
+    with open(manager.config_file, 'w') as f:
+        f.write('{"thresholds": ')                  # 写了一半的文件
+    assert manager.reload() is False
+    assert accessor() == 55.0
+
+
+@pytest.mark.parametrize('use_inotify', [False, True])
+def test_watcher_detects_atomic_replace(tmp_path, use_inotify):
+    path = tmp_path / 'watched.json'
+    path.write_text('{}')
+    fired = threading.Event()
+    watcher = ConfigWatcher(str(path), fired.set, poll_interval=0.05, debounce=0.02, use_inotify=use_inotify)
+    if use_inotify and watcher.mode != 'inotify':
+        pytest.skip("inotify 不可用")
+    watcher.start()
+    try:
+        time.sleep(0.1)
+        _write_externally(str(path), {'changed': True})
+        assert fired.wait(3)
+    finally:
+        watcher.stop()
+
+
+def test_watcher_ignores_other_files(tmp_path):
+    path = tmp_path / 'watched.json'
+    path.write_text('{}')
+    fired = threading.Event()
+    watcher = ConfigWatcher(str(path), fired.set, debounce=0.02)
+    if watcher.mode != 'inotify':
+        pytest.skip("inotify 不可用")
+    watcher.start()
+    try:
+        (tmp_path / 'other.json').write_text('{}')
+        assert not fired.wait(0.3)
+    finally:
+        watcher.stop()
+
+
+def test_start_watching_reloads(manager):
+    manager.save()
+    manager.start_watching(poll_interval=0.05)
+    accessor = manager.accessor('thresholds.game')
+    config = manager._get_default_config()
+    config['thresholds']['game'] = 66.0
+    _write_externally(manager.config_file, config)
+    assert _wait_for(lambda: accessor() == 66.0)
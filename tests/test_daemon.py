@@ -0,0 +1,101 @@
+# 守护进程控制套接字：订阅请求的校验与取消订阅
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+import pytest
+
+if not hasattr(socket, 'AF_UNIX'):
+    pytest.skip("需要 Unix 套接字", allow_module_level=True)
+
+from core.daemon import MemwatchDaemon, _ControlHandler, _ControlServer
+
+
+class FakeMonitor:
+    def __init__(self):
+        self.intervals = {}
+
+    def request_interval(self, name, seconds):
+        if seconds is None:
+            self.intervals.pop(name, None)
+        else:
+            self.intervals[name] = seconds
+
+
+class FakeDaemon:
+    """只提供控制连接用到的部分，订阅管理沿用 MemwatchDaemon 的实现"""
+    subscribe = MemwatchDaemon.subscribe
+    unsubscribe = MemwatchDaemon.unsubscribe
+    stopped = MemwatchDaemon.stopped
+
+    def __init__(self):
+        self.monitor = FakeMonitor()
+        self.last_stats = {'memory_percent': 50.0}
+        self._subscribers = []
+        self._subscribers_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+
+@pytest.fixture
+def server():
+    directory = tempfile.mkdtemp(prefix='mw-')    # Unix 套接字路径长度有限，不用 tmp_path
+    path = os.path.join(directory, 'd.sock')
+    server = _ControlServer(path, _ControlHandler)
+    server.daemon_ref = FakeDaemon()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, path
+    server.daemon_ref._stopped.set()
+    server.shutdown()
+    server.server_close()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+def _request(path, message):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(5)
+    sock.connect(path)
+    f = sock.makefile('rwb')
+    f.write((json.dumps(message) + '\n').encode())
+    f.flush()
+    return sock, f, json.loads(f.readline())
+
+
+def _wait_for(predicate, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+@pytest.mark.parametrize('interval', ['x', [], {}, 0, -1, 'nan', True])
+def test_invalid_interval_is_rejected_without_subscribing(server, interval):
+    server, path = server
+    sock, f, response = _request(path, {'id': 7, 'cmd': 'subscribe', 'interval': interval})
+    sock.close()
+    assert response['id'] == 7 and response['ok'] is False
+    assert '无效的采样间隔' in response['error']
+    assert server.daemon_ref._subscribers == []
+    assert server.daemon_ref.monitor.intervals == {}
+
+
+def test_subscribe_and_disconnect(server):
+    server, path = server
+    daemon = server.daemon_ref
+    sock, f, response = _request(path, {'id': 1, 'cmd': 'subscribe', 'interval': '0.5'})
+    assert response == {'id': 1, 'ok': True, 'result': {'memory_percent': 50.0}}
+    assert list(daemon.monitor.intervals.values()) == [0.5]
+    assert len(daemon._subscribers) == 1
+
+    daemon._subscribers[0].put(b'{"event":"stats","data":{}}\n')
+    assert json.loads(f.readline()) == {'event': 'stats', 'data': {}}
+
+    # 客户端断开后，下一次推送失败时取消订阅并撤销采样间隔要求
+    f.close()
+    sock.close()
+    daemon._subscribers[0].put(b'{"event":"stats","data":{}}\n' * 1000)
+    assert _wait_for(lambda: not daemon._subscribers)
+    assert daemon.monitor.intervals == {}
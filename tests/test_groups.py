@@ -0,0 +1,79 @@
+# 应用进程组索引：随机进程变化下，增量维护的结果与整体重建一致
+import pytest
+
+from benchmarks.simulator import SimulatedProcessTable
+from core.groups import ProcessGroupIndex
+from core.snapshot import ProcessRecord, SnapshotEngine
+
+
+class ShuffledTable(SimulatedProcessTable):
+    """每次采集打乱进程顺序（子进程可能先于父进程出现），并随机过继、exec 成边界进程"""
+
+    def collect(self):
+        memory, cpu, processes = super().collect()
+        rng = self.rng
+        with self._lock:
+            pids = list(self.processes)
+            for proc in self.processes.values():
+                if proc.ppid not in self.processes and proc.ppid != 1 and rng.random() < 0.5:
+                    proc.ppid = rng.choice(pids)    # 父进程退出后被 subreaper 接管
+                elif rng.random() < 0.002:
+                    proc.name = rng.choice(['bash', f'app{rng.randrange(2000)}.exe'])   # exec
+            processes = [p.record() for p in self.processes.values()]
+        rng.shuffle(processes)
+        return memory, cpu, processes
+
+
+def _canonical(index, snapshot):
+    groups = sorted((g.root, g.name, g.create_time, g.rss, g.process_count, g.names) for g in index.top())
+    membership = {p.pid: (index.group_of(p.pid) or (None,))[0] for p in snapshot}
+    members = {g.root: [p.pid for p in index.members(g.root)] for g in index.top()}
+    return groups, membership, members
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_incremental_matches_rebuild(seed):
+    table = ShuffledTable(process_count=1500, churn_per_tick=0.05, seed=seed)
+    engine = SnapshotEngine(max_staleness=0.0, collector=table)
+    engine.refresh()
+    for _ in range(25):
+        snapshot = engine.refresh()
+        reference = _index(snapshot.processes)
+        assert engine.groups.generation == snapshot.generation
+        assert _canonical(engine.groups, snapshot) == _canonical(reference, snapshot)
+        assert sum(g.process_count for g in engine.groups.top()) == len(snapshot)
+
+
+def _record(pid, ppid, name, create_time, rss=100):
+    return ProcessRecord(pid, ppid, name, rss, rss, 0.0, create_time, 'sleeping')
+
+
+def _index(records):
+    """整体重建的索引（作为对照）"""
+    index = ProcessGroupIndex()
+    index._rebuild(records)
+    return index
+
+
+def test_grouping_rules():
+    index = _index([
+        _record(1, 0, 'systemd', 0.0),
+        _record(10, 1, 'chrome', 1.0),
+        _record(11, 10, 'chrome', 2.0),
+        _record(12, 11, 'chrome', 3.0),
+        _record(20, 1, 'bash', 1.0),
+        _record(21, 20, 'vim', 2.0),            # shell 启动的命令自成一组
+        _record(30, 10, 'reused', 0.5),         # 比"父进程"更早：PID 被复用，不是子进程
+    ])
+    assert index.group_of(12).root == 10
+    assert index.group_of(12).process_count == 3
+    assert index.group_of(12).rss == 300
+    assert index.group_of(21).root == 21
+    assert index.group_of(30).root == 30
+    assert [p.pid for p in index.members(10)] == [10, 11, 12]
+
+
+def test_ppid_cycle_terminates():
+    # 异常数据中的父子环不会导致死循环
+    index = _index([_record(5, 6, 'a', 1.0), _record(6, 5, 'b', 1.0)])
+    assert sorted(g.root for g in index.top()) == [5, 6]
@@ -0,0 +1,29 @@
+# 入口模块的导入耗时预算与副作用（-X importtime，见 benchmarks/bench_import_time.py）
+import os
+
+import pytest
+
+from benchmarks.bench_import_time import IMPORT_BUDGETS_MS, run
+
+# 较慢的机器上可以用环境变量放宽预算，例如 MEMWATCH_IMPORT_BUDGET_SCALE=2
+SCALE = float(os.environ.get('MEMWATCH_IMPORT_BUDGET_SCALE', '1.0'))
+
+
+@pytest.fixture(scope='module')
+def results():
+    return {result.module: result for result in run(IMPORT_BUDGETS_MS, runs=3, scale=SCALE)}
+
+
+@pytest.mark.parametrize('module', list(IMPORT_BUDGETS_MS))
+def test_import_within_budget(results, module):
+    result = results[module]
+    assert result.error is None, result.error
+    assert result.within_budget, f"{module} 导入耗时 {result.ms:.1f} ms，超出预算 {result.budget_ms:.0f} ms"
+
+
+@pytest.mark.parametrize('module', list(IMPORT_BUDGETS_MS))
+def test_import_has_no_side_effects(results, module):
+    result = results[module]
+    assert result.error is None, result.error
+    assert result.files == [], f"导入 {module} 时创建了文件"
+    assert result.threads == [], f"导入 {module} 时启动了线程"
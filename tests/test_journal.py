@@ -0,0 +1,100 @@
+# 监控数据日志：压缩（降采样）结果与原始数据一致
+import time
+
+import pytest
+
+from core.journal import HEADER_SIZE, JOURNAL_COLUMNS, RECORD_FORMATS, KIND_RAW, MetricsJournal
+
+BUCKET = 60
+RECORDS_PER_FILE = 97       # 不是 60 的倍数，时间桶会跨越相邻的原始文件
+
+
+def _stats(ts: float, base: float) -> dict:
+    offset = ts - base
+    return {
+        'timestamp': ts,
+        'memory_percent': 50.0 + (offset % 7),
+        'cpu_percent': float(offset % 13),
+        'memory_used_gb': offset,           # 桶内平均值可以看出桶是否完整
+        'memory_available_gb': 1.0,
+        'process_count': 100.0 + offset % 3,
+    }
+
+
+def _expected(samples, bucket_seconds=BUCKET):
+    """直接从原始采样计算每个桶的 (记录数, 各列之和, 各列最大值)"""
+    buckets = {}
+    for stats in samples:
+        key = int(stats['timestamp'] // bucket_seconds) * bucket_seconds
+        count, sums, maxes = buckets.get(key, (0, [0.0] * len(JOURNAL_COLUMNS), [float('-inf')] * len(JOURNAL_COLUMNS)))
+        values = [stats[c] for c in JOURNAL_COLUMNS]
+        buckets[key] = (count + 1, [s + v for s, v in zip(sums, values)], [max(m, v) for m, v in zip(maxes, values)])
+    return buckets
+
+
+@pytest.fixture
+def journal(tmp_path):
+    size = HEADER_SIZE + RECORD_FORMATS[KIND_RAW].size * RECORDS_PER_FILE
+    journal = MetricsJournal(str(tmp_path), file_size_mb=size / 1024 / 1024, compact_after_hours=0)
+    journal.open()
+    yield journal
+    journal.stop()
+
+
+def _write(journal, start, seconds, base):
+    samples = [_stats(start + i, base) for i in range(seconds)]
+    for stats in samples:
+        journal.write(stats)
+    return samples
+
+
+def test_compact_merges_buckets_across_files(journal):
+    base = (int(time.time()) // BUCKET - 3 * 24 * 60) * BUCKET + 17    # 3 天前，不与桶对齐
+    samples = _write(journal, base, 1000, base)
+    journal.stop()      # 关闭当前文件，全部原始文件都可以压缩
+
+    compacted = journal.compact(older_than=3600, bucket_seconds=BUCKET)
+    assert compacted > 0
+    assert not list(journal.raw_dir.iterdir())
+
+    aggregates = journal.read_range(0, float('inf'), aggregated=True)
+    remaining = journal.read_range(0, float('inf'))
+    expected = _expected(samples)
+    width = len(JOURNAL_COLUMNS)
+
+    # 每条原始数据要么在聚合数据中，要么仍在原始文件中，不会丢失也不会重复
+    assert sum(expected[int(r[0])][0] for r in aggregates) + len(remaining) == len(samples)
+    for record in aggregates:
+        count, sums, maxes = expected[int(record[0])]
+        means, highs = record[1:1 + width], record[1 + width:]
+        for mean, total in zip(means, sums):
+            assert mean * count == pytest.approx(total, rel=1e-5, abs=1e-3)
+        for high, top in zip(highs, maxes):
+            assert high == pytest.approx(top, rel=1e-6)
+
+
+def test_compact_defers_bucket_that_continues_into_newer_data(journal):
+    base = (int(time.time()) // BUCKET - 3 * 24 * 60) * BUCKET + 17
+    old = _write(journal, base, 500, base)
+    # 当前（未关闭的）文件的数据紧接着旧数据，最后一个旧桶延续到当前文件
+    recent = _write(journal, base + 500, 50, base)
+
+    journal.compact(older_than=3600, bucket_seconds=BUCKET)
+    aggregates = journal.read_range(0, float('inf'), aggregated=True)
+    expected = _expected(old + recent)
+    width = len(JOURNAL_COLUMNS)
+    for record in aggregates:
+        count, sums, _ = expected[int(record[0])]
+        for mean, total in zip(record[1:1 + width], sums):
+            assert mean * count == pytest.approx(total, rel=1e-5, abs=1e-3)
+
+    # 之后全部压缩，结果仍与原始数据一致
+    journal.stop()
+    journal.compact(older_than=3600, bucket_seconds=BUCKET)
+    aggregates = journal.read_range(0, float('inf'), aggregated=True)
+    assert not journal.read_range(0, float('inf'))
+    assert sorted(int(r[0]) for r in aggregates) == sorted(expected)
+    for record in aggregates:
+        count, sums, _ = expected[int(record[0])]
+        for mean, total in zip(record[1:1 + width], sums):
+            assert mean * count == pytest.approx(total, rel=1e-5, abs=1e-3)
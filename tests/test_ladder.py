@@ -0,0 +1,154 @@
+# 分级回收：逐级测量与跳过，暂停进程的恢复（不接触真实进程）
+import threading
+import time
+
+import psutil
+import pytest
+
+from core.ladder import (PAUSE_SIGNAL, TIER_DEMOTE, TIER_PAUSE, TIER_RECLAIM, TIER_TERMINATE,
+                         ProcessThrottle, ReclamationLadder)
+from core.snapshot import SystemMemory
+
+MB = 1024 * 1024
+TOTAL = 1000 * MB
+
+
+class FakeMemory:
+    """可用内存由各级动作直接修改"""
+
+    def __init__(self, percent):
+        self.available = int(TOTAL * (1 - percent / 100))
+
+    def free(self, mb):
+        self.available += int(mb * MB)
+
+    def __call__(self):
+        used = TOTAL - self.available
+        return SystemMemory(TOTAL, self.available, used, self.available, used / TOTAL * 100)
+
+
+def test_ladder_stops_when_threshold_reached():
+    memory = FakeMemory(90)
+    calls = []
+
+    def tier(name, mb):
+        def action():
+            calls.append(name)
+            memory.free(mb)
+            return {'processes': 1}
+        return name, action
+
+    results = ReclamationLadder(memory, settle=0).run(
+        [tier(TIER_RECLAIM, 50), tier(TIER_DEMOTE, 60), tier(TIER_PAUSE, 100), tier(TIER_TERMINATE, 100)],
+        threshold=80.0)
+    assert calls == [TIER_RECLAIM, TIER_DEMOTE]
+    assert [r['skipped'] for r in results] == [False, False, True, True]
+    assert [r['freed_mb'] for r in results[:2]] == [50.0, 60.0]
+    assert results[1]['memory_percent'] == 79.0
+
+
+def test_ladder_below_threshold_runs_nothing():
+    results = ReclamationLadder(FakeMemory(50), settle=0).run(
+        [(TIER_RECLAIM, pytest.fail), (TIER_TERMINATE, pytest.fail)], threshold=80.0)
+    assert all(r['skipped'] for r in results)
+
+
+def test_ladder_cancel_and_errors():
+    memory = FakeMemory(90)
+    cancel = threading.Event()
+    seen = []
+
+    def failing():
+        cancel.set()
+        raise RuntimeError('boom')
+
+    results = ReclamationLadder(memory, settle=0).run(
+        [(TIER_RECLAIM, failing), (TIER_TERMINATE, pytest.fail)], threshold=80.0,
+        cancel=cancel, on_tier=seen.append)
+    assert results[0]['error'] == 'boom'
+    assert results[1]['skipped']
+    assert seen == [results[0]]
+
+
+class FakeProcess:
+    """psutil.Process 的替身，只记录暂停 / 恢复"""
+    table = {}
+
+    def __init__(self, pid):
+        if pid not in self.table:
+            raise psutil.NoSuchProcess(pid)
+        self.pid = pid
+        self.state = self.table[pid]
+
+    def create_time(self):
+        return self.state['create_time']
+
+    def suspend(self):
+        self.state['stopped'] = True
+
+    def resume(self):
+        self.state['stopped'] = False
+
+
+@pytest.fixture
+def processes():
+    FakeProcess.table = {pid: {'create_time': 100.0 + pid, 'stopped': False} for pid in (11, 12)}
+    return FakeProcess.table
+
+
+def _throttle(max_pause_seconds=300.0):
+    return ProcessThrottle(pause_method=PAUSE_SIGNAL, max_pause_seconds=max_pause_seconds,
+                           process_factory=FakeProcess)
+
+
+def _info(pid, processes):
+    return {'pid': pid, 'name': f'p{pid}', 'create_time': processes[pid]['create_time']}
+
+
+def test_pause_and_resume(processes):
+    throttle = _throttle()
+    outcomes = throttle.pause([_info(11, processes), _info(12, processes)])
+    assert [o['method'] for o in outcomes] == [PAUSE_SIGNAL, PAUSE_SIGNAL]
+    assert processes[11]['stopped'] and processes[12]['stopped']
+
+    assert throttle.resume([11]) == 1
+    assert not processes[11]['stopped'] and processes[12]['stopped']
+    assert throttle.release() == (1, 0)
+    assert not processes[12]['stopped']
+    assert throttle.paused == {}
+
+
+def test_resume_skips_reused_pid(processes):
+    throttle = _throttle()
+    throttle.pause([_info(11, processes)])
+    processes[11] = {'create_time': 999.0, 'stopped': True}    # 原进程退出，PID 被新进程复用
+    assert throttle.resume() == 0
+    assert processes[11]['stopped']
+    assert throttle.paused == {}
+
+
+def test_expiry_timer_resumes_without_scheduler(processes):
+    throttle = _throttle(max_pause_seconds=0.05)
+    throttle.pause([_info(11, processes)])
+    throttle.expire_later()
+    deadline = time.monotonic() + 2.0
+    while processes[11]['stopped'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not processes[11]['stopped']
+    assert throttle.paused == {}
+
+
+def test_managed_throttle_has_no_timer(processes):
+    throttle = _throttle(max_pause_seconds=0.0)
+    throttle.own()
+    throttle.pause([_info(11, processes)])
+    throttle.expire_later()
+    assert throttle.managed and throttle._timer is None
+    assert processes[11]['stopped']
+
+    # 调度器退出后由定时器恢复
+    throttle.disown()
+    deadline = time.monotonic() + 2.0
+    while processes[11]['stopped'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not processes[11]['stopped']
@@ -0,0 +1,105 @@
+# 白名单匹配器：Aho-Corasick 与朴素子串扫描的结果一致，判定缓存
+import random
+
+import pytest
+
+from config import config_manager as config_module
+from core import matcher
+from core.matcher import AhoCorasick, WhitelistMatcher
+
+
+def _naive(patterns, text):
+    return [p for p in patterns if p and p in text]
+
+
+def test_aho_corasick_matches_naive_scan():
+    rng = random.Random(42)
+    alphabet = 'abc.'     # 小字母表，模式之间大量共享前缀 / 后缀，覆盖失败指针
+    for _ in range(300):
+        patterns = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 5)))
+                    for _ in range(rng.randint(1, 12))]
+        automaton = AhoCorasick(patterns)
+        for _ in range(20):
+            text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 20)))
+            hit = automaton.search(text)
+            expected = _naive(patterns, text)
+            if expected:
+                assert hit in expected, (patterns, text, hit)
+            else:
+                assert hit is None, (patterns, text, hit)
+
+
+def test_aho_corasick_returns_earliest_match():
+    automaton = AhoCorasick(['chrome', 'hr', 'xyz', ''])
+    assert automaton.search('chrome.exe') == 'hr'    # 'hr' 在 'chrome' 结束之前出现
+    assert automaton.search('explorer.exe') is None
+    assert automaton.search('') is None
+
+
+@pytest.fixture
+def whitelist():
+    return WhitelistMatcher(['systemd', 'Xorg'], {'office': ['code', 'Chrome.exe'], 'game': ['steam']},
+                            cache_size=8)
+
+
+def test_rules_per_mode(whitelist):
+    assert whitelist.protected_by('systemd-journald', 'office') == 'systemd'
+    assert whitelist.protected_by('chrome.exe', 'office') == 'chrome.exe'
+    assert whitelist.protected_by('VSCode', 'office') == 'code'        # 忽略大小写
+    assert whitelist.protected_by('steamwebhelper', 'office') is None
+    assert whitelist.protected_by('steamwebhelper', 'game') == 'steam'
+    assert whitelist.protected_by('xorg', 'unknown-mode') == 'xorg'    # 未知模式仍保护系统关键进程
+    assert whitelist.tree_protected_by(['bash', 'steam', 'python'], 'game') == 'steam'
+    assert whitelist.tree_protected_by(['bash', 'python', ''], 'game') is None
+
+
+def test_verdict_cache(whitelist, monkeypatch):
+    calls = []
+    original = whitelist.protected_by
+    monkeypatch.setattr(whitelist, 'protected_by', lambda name, mode: calls.append(name) or original(name, mode))
+
+    assert whitelist.is_safe_to_clean('python', 'office')
+    assert not whitelist.is_safe_to_clean('code', 'office')
+    assert whitelist.is_safe_to_clean('python', 'office')
+    assert calls == ['python', 'code']                  # 第二次命中缓存
+    assert whitelist.is_safe_to_clean('code', 'game')   # 缓存按模式区分
+
+    for i in range(20):
+        whitelist.is_safe_to_clean(f'proc{i}', 'office')
+    assert len(whitelist._cache) <= whitelist.cache_size
+
+
+class FakeConfig:
+    def __init__(self):
+        self.whitelists = {'system_critical': ['systemd'], 'office': ['code'], 'game': ['steam']}
+        self.listeners = []
+
+    def get_whitelist(self, mode):
+        return list(self.whitelists[mode])
+
+    def add_change_listener(self, callback):
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def changed(self):
+        for callback in self.listeners:
+            callback(self)
+
+
+def test_global_matcher_recompiles_only_when_rules_change(monkeypatch):
+    config = FakeConfig()
+    monkeypatch.setattr(config_module, 'get_config_manager', lambda: config)
+    monkeypatch.setattr(matcher, '_matcher', None)
+    monkeypatch.setattr(matcher, '_matcher_rules', None)
+    monkeypatch.setattr(matcher, '_matcher_stale', True)
+
+    first = matcher.get_whitelist_matcher()
+    assert matcher.get_whitelist_matcher() is first
+    config.changed()                                    # 其他配置项变化，白名单未变
+    assert matcher.get_whitelist_matcher() is first
+
+    config.whitelists['office'].append('slack')
+    config.changed()
+    second = matcher.get_whitelist_matcher()
+    assert second is not first
+    assert not second.is_safe_to_clean('slack', 'office')
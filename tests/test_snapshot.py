@@ -0,0 +1,65 @@
+# 进程快照引擎：代与代之间的差异
+from benchmarks.simulator import SimulatedProcessTable
+from core.snapshot import ProcessRecord, SnapshotEngine, diff_snapshots
+
+
+def _record(pid, rss=100, cpu=0.0, create_time=1.0, ppid=1, name='app'):
+    return ProcessRecord(pid, ppid, name, rss, rss * 4, cpu, create_time, 'sleeping')
+
+
+def _index(*records):
+    return {r.pid: r for r in records}
+
+
+def test_diff_snapshots():
+    old = _index(_record(1), _record(2), _record(3), _record(4), _record(5), _record(6))
+    new = _index(
+        _record(1),                         # 未变化
+        _record(2, rss=200),                # RSS 变化
+        _record(3, cpu=5.0),                # CPU 变化
+        _record(4, ppid=2),                 # 父进程变化
+        _record(5, create_time=9.0),        # PID 被复用：旧进程退出，新进程出现
+        _record(7),                         # 新进程
+    )                                       # 6 已退出
+    delta = diff_snapshots(old, new)
+    assert sorted(r.pid for r in delta.added) == [5, 7]
+    assert sorted(r.pid for r in delta.changed) == [2, 3, 4]
+    assert sorted(r.pid for r in delta.removed) == [5, 6]
+    # changed / added 为新值，removed 为旧值
+    assert {r.pid: r.rss for r in delta.changed}[2] == 200
+    assert {r.pid: r.create_time for r in delta.removed}[5] == 1.0
+    assert {r.pid: r.create_time for r in delta.added}[5] == 9.0
+
+
+def test_name_change_is_reported():
+    delta = diff_snapshots(_index(_record(1, name='bash')), _index(_record(1, name='python')))
+    assert [r.name for r in delta.changed] == ['python']
+    assert delta.added == delta.removed == ()
+
+
+def _apply(index, delta):
+    result = dict(index)
+    for record in delta.removed:
+        del result[record.pid]
+    for record in delta.changed + delta.added:
+        result[record.pid] = record
+    return result
+
+
+def test_engine_generations_and_deltas():
+    table = SimulatedProcessTable(process_count=500, churn_per_tick=0.05, seed=3)
+    engine = SnapshotEngine(max_staleness=60.0, collector=table)
+
+    first = engine.get_snapshot()
+    assert (first.generation, first.delta) == (1, None)
+    assert engine.get_snapshot() is first           # 未过期时复用同一个快照
+
+    previous = first
+    for generation in range(2, 12):
+        snapshot = engine.refresh()
+        assert snapshot.generation == engine.generation == generation
+        # 把差异应用到上一代，得到的正是这一代
+        assert _apply(previous._index(), snapshot.delta) == {p.pid: p for p in snapshot}
+        assert snapshot.delta.added and snapshot.delta.removed and snapshot.delta.changed
+        previous = snapshot
+    assert engine.latest is previous
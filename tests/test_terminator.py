@@ -0,0 +1,102 @@
+# 进程终止流水线：共享期限、取消与各种结果（模拟进程表，不向真实进程发送信号）
+import threading
+import time
+
+import psutil
+import pytest
+
+from benchmarks.simulator import SimulatedProcessTable
+from core.terminator import (OUTCOME_CANCELLED, OUTCOME_DENIED, OUTCOME_EXITED, OUTCOME_GONE,
+                             OUTCOME_TIMEOUT, TerminationPipeline)
+
+
+def _table(count, unresponsive_fraction):
+    return SimulatedProcessTable(process_count=count, unresponsive_fraction=unresponsive_fraction,
+                                 churn_per_tick=0.0, seed=1)
+
+
+def _candidates(table):
+    return [{'pid': p.pid, 'name': p.name, 'memory_mb': p.rss / 1024 / 1024, 'create_time': p.create_time}
+            for p in table.processes.values()]
+
+
+def _pipeline(table, **kwargs):
+    return TerminationPipeline(process_factory=table.process, wait_procs=table.wait_procs, **kwargs)
+
+
+def test_responsive_processes_exit():
+    table = _table(20, unresponsive_fraction=0.0)
+    events = []
+    results = _pipeline(table, deadline=5.0).run(_candidates(table),
+                                                 on_event=lambda event, r: events.append((event, r['pid'])))
+    assert [r['outcome'] for r in results] == [OUTCOME_EXITED] * 20
+    assert table.processes == {} and table.terminated == 20
+    # 每个进程先 term_sent，再 exited
+    for pid in (r['pid'] for r in results):
+        assert [e for e, p in events if p == pid] == ['term_sent', OUTCOME_EXITED]
+
+
+def test_unresponsive_processes_time_out_at_shared_deadline():
+    table = _table(10, unresponsive_fraction=1.0)
+    start = time.monotonic()
+    results = _pipeline(table, deadline=0.3).run(_candidates(table))
+    elapsed = time.monotonic() - start
+    # 整批共享一个期限，而不是每个进程各等一次
+    assert 0.3 <= elapsed < 1.0
+    assert [r['outcome'] for r in results] == [OUTCOME_TIMEOUT] * 10
+    assert len(table.processes) == 10            # 不强制结束
+
+
+def test_gone_and_reused_pids():
+    table = _table(2, unresponsive_fraction=0.0)
+    reused, exited = _candidates(table)
+    reused = dict(reused, create_time=reused['create_time'] + 100)    # PID 已被其他进程复用
+    missing = {'pid': 99999, 'name': 'gone', 'create_time': 1.0}
+    results = _pipeline(table).run([reused, missing, exited])
+    assert [r['outcome'] for r in results] == [OUTCOME_GONE, OUTCOME_GONE, OUTCOME_EXITED]
+    assert reused['pid'] in table.processes and not table.processes[reused['pid']].terminating
+
+
+def test_access_denied():
+    def denied(pid):
+        raise psutil.AccessDenied(pid)
+
+    results = TerminationPipeline(process_factory=denied).run([{'pid': 1, 'name': 'init'}])
+    assert results[0]['outcome'] == OUTCOME_DENIED
+
+
+def test_cancel_while_waiting():
+    table = _table(5, unresponsive_fraction=1.0)
+    cancel = threading.Event()
+    threading.Timer(0.1, cancel.set).start()
+    start = time.monotonic()
+    results = _pipeline(table, deadline=10.0).run(_candidates(table), cancel=cancel)
+    assert time.monotonic() - start < 1.0
+    assert [r['outcome'] for r in results] == [OUTCOME_CANCELLED] * 5
+
+
+def test_cancel_before_sending_and_rate_limit():
+    table = _table(6, unresponsive_fraction=0.0)
+    candidates = _candidates(table)
+    cancel = threading.Event()
+
+    def on_event(event, result):
+        if event == 'term_sent' and result['pid'] == candidates[2]['pid']:
+            cancel.set()
+
+    start = time.monotonic()
+    results = _pipeline(table, max_terms_per_second=20).run(candidates, on_event=on_event, cancel=cancel)
+    outcomes = [r['outcome'] for r in results]
+    # 前 3 个已发送 TERM（取消后不再等待），其余不再发送
+    assert outcomes[3:] == [OUTCOME_CANCELLED] * 3
+    assert all(not table.processes[c['pid']].terminating for c in candidates[3:])
+    assert all(table.processes[c['pid']].terminating for c in candidates[:3])
+    # 限速：3 个 TERM 之间至少间隔 2 × 50 ms
+    assert time.monotonic() - start >= 0.1
+
+
+@pytest.mark.parametrize('deadline', [0.0, 0.05])
+def test_zero_or_short_deadline(deadline):
+    table = _table(3, unresponsive_fraction=1.0)
+    results = _pipeline(table, deadline=1.0).run(_candidates(table), deadline=deadline)
+    assert {r['outcome'] for r in results} == {OUTCOME_TIMEOUT}
@@ -0,0 +1,67 @@
+# 环形缓冲时间序列：窗口查询与统计（numpy 与纯 Python 结果一致）
+import math
+
+import pytest
+
+from core import timeseries
+from core.timeseries import TimeSeriesStore
+
+
+def _filled(capacity=10, count=25):
+    store = TimeSeriesStore(capacity, ['memory_percent', 'cpu_percent'], max_tracked_pids=1)
+    store.track_pid(42)
+    for i in range(count):
+        rss = {42: 100.0 + i} if i % 2 == 0 else {}
+        store.append(1000.0 + i, {'memory_percent': float(i), 'cpu_percent': 2.0 * i}, rss)
+    return store
+
+
+def test_wraparound_windows_are_contiguous():
+    store = _filled()
+    assert len(store) == 10
+    assert list(store.timestamps()) == [1000.0 + i for i in range(15, 25)]
+    assert list(store.column('memory_percent')) == [float(i) for i in range(15, 25)]
+    assert list(store.column('cpu_percent', last=3)) == [44.0, 46.0, 48.0]
+    # 最近 2 秒：包含 t-2 这一点
+    assert list(store.column('memory_percent', seconds=2)) == [22.0, 23.0, 24.0]
+
+
+def test_tracked_pid_slots():
+    store = _filled()
+    rss = list(store.process_rss(42, last=4))
+    assert rss[1] == 122.0 and rss[3] == 124.0
+    assert math.isnan(rss[0]) and math.isnan(rss[2])
+    assert store.process_rss(7) is None
+    assert not store.track_pid(7)           # 只有 1 个槽位
+    store.untrack_pid(42)
+    assert store.track_pid(7)
+
+
+@pytest.mark.parametrize('use_numpy', [True, False])
+def test_stats(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(timeseries, 'np', None)
+    elif timeseries.np is None:
+        pytest.skip("numpy 未安装")
+    store = _filled()
+    result = store.stats('memory_percent', percentiles=(50, 95))
+    assert result['count'] == 10
+    assert (result['min'], result['max']) == (15.0, 24.0)
+    assert result['mean'] == pytest.approx(19.5)
+    assert result['p50'] == pytest.approx(19.5)
+    assert result['p95'] == pytest.approx(23.55)
+    assert result['rate'] == pytest.approx(1.0)
+
+    # 跟踪进程的 NaN（进程不存在的采样）不参与统计
+    rss = store.stats('pid:42', percentiles=())
+    assert rss['count'] == 5
+    assert rss['rate'] == pytest.approx(1.0)
+    assert store.stats('pid:7') is None
+    assert store.rate_of_change('cpu_percent', seconds=4) == pytest.approx(2.0)
+
+
+def test_empty_store():
+    store = TimeSeriesStore(4, ['memory_percent'])
+    assert len(store) == 0
+    assert store.stats('memory_percent') is None
+    assert store.rate_of_change('memory_percent', 10) is None
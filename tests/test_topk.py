@@ -0,0 +1,42 @@
+# 增量 Top-K：随机进程变化下与完整排序的结果一致
+from benchmarks.simulator import SimulatedProcessTable
+from core.snapshot import SnapshotEngine
+from core.topk import KEY_CPU, KEY_MEMORY, TopKTracker
+
+
+def _full_sort(snapshot, key, k=None, minimum=None):
+    value = (lambda p: p.rss) if key == KEY_MEMORY else (lambda p: p.cpu_percent)
+    ordered = sorted(snapshot, key=lambda p: (value(p), p.pid), reverse=True)
+    if minimum is not None:
+        ordered = [p for p in ordered if value(p) > minimum]
+    return ordered[:k]
+
+
+def test_incremental_matches_full_sort():
+    table = SimulatedProcessTable(process_count=800, churn_per_tick=0.05, rss_jitter=0.3,
+                                  cpu_active_fraction=0.3, seed=11)
+    engine = SnapshotEngine(max_staleness=0.0, collector=table)
+    for _ in range(30):
+        snapshot = engine.refresh()
+        tracker = engine.top_k
+        assert tracker.generation == snapshot.generation
+        assert len(tracker) == len(snapshot)
+        assert tracker.top(20, KEY_MEMORY) == _full_sort(snapshot, KEY_MEMORY, 20)
+        assert tracker.top(20, KEY_CPU) == _full_sort(snapshot, KEY_CPU, 20)
+        assert tracker.top(None, KEY_CPU, minimum=1.0) == _full_sort(snapshot, KEY_CPU, minimum=1.0)
+        assert tracker.top() == _full_sort(snapshot, KEY_MEMORY)
+
+
+def test_predicate_and_generation_gap():
+    table = SimulatedProcessTable(process_count=300, churn_per_tick=0.1, seed=5)
+    engine = SnapshotEngine(max_staleness=0.0, collector=table)
+    tracker = TopKTracker()
+    tracker.apply(engine.refresh())
+    engine.refresh()                    # 这一代没有交给 tracker
+    snapshot = engine.refresh()
+    tracker.apply(snapshot)             # 代数不连续时整体重建
+    assert tracker.generation == snapshot.generation
+    assert tracker.top() == _full_sort(snapshot, KEY_MEMORY)
+
+    even = tracker.top(10, predicate=lambda p: p.pid % 2 == 0)
+    assert even == [p for p in _full_sort(snapshot, KEY_MEMORY) if p.pid % 2 == 0][:10]
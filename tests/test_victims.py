@@ -0,0 +1,118 @@
+# 清理对象选择：覆盖背包求解与计划
+import itertools
+import random
+import time
+
+import pytest
+
+from core.snapshot import SystemMemory
+from core.victims import (MB, SOLVER_BEST_EFFORT, SOLVER_DP, SOLVER_NONE, VictimSelector,
+                          bytes_needed, solve_dp, solve_greedy)
+
+GB = 1024 * MB
+
+
+def _memory(total_gb: float, available_gb: float) -> SystemMemory:
+    total, available = int(total_gb * GB), int(available_gb * GB)
+    return SystemMemory(total, available, total - available, available,
+                        round((total - available) / total * 100, 1))
+
+
+def _brute_force(benefits, costs, need, max_count):
+    """枚举全部组合的最小代价，无解时为 None"""
+    best = None
+    for k in range(max_count + 1):
+        for combo in itertools.combinations(range(len(benefits)), k):
+            if sum(benefits[i] for i in combo) >= need:
+                cost = sum(costs[i] for i in combo)
+                if best is None or cost < best:
+                    best = cost
+    return best
+
+
+def test_bytes_needed():
+    memory = _memory(16, 2)                 # 已用 14 GB
+    assert bytes_needed(memory, 75) == 2 * GB
+    assert bytes_needed(memory, 90) == 0
+    assert bytes_needed(SystemMemory(0, 0, 0, 0, 0.0), 50) == 0
+
+
+def test_solve_dp_matches_brute_force():
+    rng = random.Random(20240601)
+    for _ in range(200):
+        n = rng.randint(1, 8)
+        benefits = [rng.randint(0, 40) for _ in range(n)]
+        costs = [round(rng.uniform(0.5, 5.0), 3) for _ in range(n)]
+        need = rng.randint(1, 100)
+        max_count = rng.randint(1, n)
+        # 收益为整数、按需要量划分份数时取整不损失精度，结果应与枚举一致
+        picked = solve_dp(benefits, costs, need, max_count, resolution=need)
+        expected = _brute_force(benefits, costs, need, max_count)
+        if expected is None:
+            assert picked is None
+            continue
+        assert picked is not None
+        assert len(set(picked)) == len(picked) <= max_count
+        assert sum(benefits[i] for i in picked) >= need
+        assert sum(costs[i] for i in picked) == pytest.approx(expected)
+
+
+def test_solve_dp_rounding_still_covers_need():
+    rng = random.Random(7)
+    for _ in range(100):
+        benefits = [rng.uniform(0, 500) for _ in range(10)]
+        costs = [rng.uniform(0.5, 5.0) for _ in range(10)]
+        picked = solve_dp(benefits, costs, 800.0, 5, resolution=32)
+        if picked is not None:
+            assert sum(benefits[i] for i in picked) >= 800.0
+
+
+def test_solve_dp_deadline():
+    assert solve_dp([10, 20], [1, 1], 15, 2, deadline=time.monotonic() - 1) is None
+    assert solve_dp([10, 20], [1, 1], 0, 2) == []
+
+
+def test_solve_greedy():
+    # 单个大候选比两个小候选的组合便宜
+    assert solve_greedy([60, 60, 100], [1, 1, 1.5], 100, 3) == [2]
+    # 多选的候选会被去掉
+    picked = solve_greedy([50, 50, 10], [1, 1, 0.1], 100, 3)
+    assert sorted(picked) == [0, 1]
+    assert solve_greedy([10, 10], [1, 1], 100, 2) is None
+
+
+def _candidate(pid, name, memory_mb, cpu_percent=0.0, uptime=7200.0):
+    return {'pid': pid, 'name': name, 'memory_mb': memory_mb, 'estimate_mb': memory_mb,
+            'cpu_percent': cpu_percent, 'create_time': time.time() - uptime}
+
+
+def test_plan_prefers_idle_candidates():
+    selector = VictimSelector(hysteresis_percent=5.0, idle_halflife=300.0)
+    candidates = [_candidate(1, 'busy', 1000, cpu_percent=50.0),
+                  _candidate(2, 'idle-a', 1000),
+                  _candidate(3, 'idle-b', 1000)]
+    # 16 GB 已用 12.5 GB，阈值 72%：目标 67%，需要释放约 1.8 GB，任选两个即可，空闲的代价更低
+    plan = selector.plan(candidates, _memory(16, 3.5), threshold=72.0, max_victims=3)
+    assert plan.solver == SOLVER_DP
+    assert plan.satisfied
+    assert plan.covered_mb >= plan.needed_mb > 0
+    assert sorted(entry['name'] for entry in plan.selected) == ['idle-a', 'idle-b']
+    assert [entry['name'] for entry in plan.rejected] == ['busy']
+    assert plan.to_dict()['selected'][0]['reason'] == "选中"
+    assert len(plan.explain()) == 1 + len(plan.selected) + len(plan.rejected)
+
+
+def test_plan_below_target_selects_nothing():
+    plan = VictimSelector().plan([_candidate(1, 'a', 500)], _memory(16, 8), threshold=80.0, max_victims=3)
+    assert plan.solver == SOLVER_NONE
+    assert plan.selected == ()
+    assert plan.satisfied
+
+
+def test_plan_best_effort_when_candidates_are_insufficient():
+    candidates = [_candidate(i, f'p{i}', 100 * i) for i in range(1, 5)]
+    plan = VictimSelector().plan(candidates, _memory(16, 1), threshold=80.0, max_victims=2)
+    assert plan.solver == SOLVER_BEST_EFFORT
+    assert not plan.satisfied
+    assert [entry['name'] for entry in plan.selected] == ['p4', 'p3']
+    assert "尽力而为" in plan.explain()[1]
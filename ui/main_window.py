@@ -1,208 +1,19 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import psutil
-from core.cleaner_safe import clean_memory  # 使用安全的清理模块
-from core.monitor_realtime import SystemMonitor  # 导入我们的监控系统
 import threading
-import time
+from ui.progress_bar import ProgressBar, LatestValueMailbox
+
+# 分阶段启动（见 docs/启动流程优化.txt）：
+# 1. 只导入 tkinter，立即画出窗口框架
+# 2. 后台线程加载配置、监控器、清理模块（psutil / numpy 等较重的依赖都在这一步导入）
+# 3. 加载完成后在主线程启动实时监控并启用清理按钮
+
+UI_SAMPLE_INTERVAL = 1.0    # 界面要求的最长采样间隔（秒）
 
 def get_memory_percent():
+    import psutil
     return psutil.virtual_memory().percent
 
-def run_cleaning():
-    mode = mode_var.get()
-    if not mode:
-        messagebox.showwarning("提示", "请选择一个模式")
-        return
-
-    mem_percent = get_memory_percent()
-    result_text.insert(tk.END, f"\n当前内存占用：{mem_percent:.1f}%\n")
-    result_text.insert(tk.END, f"正在以【{mode}】模式清理...\n")
-    
-    clean_memory(mode=mode)
-
-    result_text.insert(tk.END, "✅ 清理完成。\n")
-    result_text.see(tk.END)
-
-
-
-root = tk.Tk()
-root.title("Memwatch - 智能内存管家")
-root.geometry("580x500")  # 稍微加宽
-root.resizable(False, False)
-root.configure(bg='#f8f9fa')  # 现代化背景色
-
-# 现代化样式
-style = ttk.Style()
-style.theme_use('clam')  # 使用更现代的主题
-
-# 自定义样式
-style.configure('Modern.TLabelframe', 
-                background='#ffffff',
-                borderwidth=1,
-                relief='solid',
-                bordercolor='#e9ecef')
-
-style.configure('Modern.TLabelframe.Label',
-                background='#ffffff',
-                foreground='#495057',
-                font=('Segoe UI', 9, 'bold'))
-                
-
-
-mode_var = tk.StringVar()
-mode_frame = ttk.LabelFrame(root, text="🎯 选择模式", padding=20, style='Modern.TLabelframe')
-mode_frame.pack(fill='x', padx=20, pady=15)
-
-office_radio = ttk.Radiobutton(
-    mode_frame, 
-    text="办公模式", 
-    variable=mode_var, 
-    value="office", 
-    # command=lambda: mode_var.set("office")
-)
-game_radio = ttk.Radiobutton(
-    mode_frame,
-    text="游戏模式",
-    variable=mode_var,
-    value="game",
-    # command=lambda: mode_var.set("game")
-)
-
-office_radio.grid(row=0, column=0, padx=10, pady=5)
-game_radio.grid(row=0, column=1, padx=10, pady=5)
-
-# 创建监控面板
-monitor_frame = ttk.LabelFrame(root, text="📊 实时系统监控", padding=20, style='Modern.TLabelframe')
-monitor_frame.pack(fill='x', padx=20, pady=10)
-
-# 内存显示
-mem_frame = ttk.Frame(monitor_frame)
-mem_frame.pack(fill='x', pady=2)
-
-mem_label = ttk.Label(mem_frame, text="内存使用:")
-mem_label.pack(side='left')
-
-# mem_progress = ttk.Progressbar(mem_frame, length=200, mode='determinate')
-# mem_progress.pack(side='left', padx=10)
-# 自定义内存进度条
-# mem_canvas = tk.Canvas(mem_frame, width=200, height=20, bg='lightgray', relief='sunken', bd=1)
-# mem_canvas.pack(side='left', padx=10)
-# 现代化内存进度条
-mem_canvas = tk.Canvas(mem_frame, width=220, height=24, bg='white', highlightthickness=0)
-mem_canvas.pack(side='left', padx=10)
-
-mem_value_label = ttk.Label(mem_frame, text="0.0%")
-mem_value_label.pack(side='left')
-
-# CPU显示  
-cpu_frame = ttk.Frame(monitor_frame)
-cpu_frame.pack(fill='x', pady=2)
-
-cpu_label = ttk.Label(cpu_frame, text="CPU使用:")
-cpu_label.pack(side='left')
-
-# cpu_progress = ttk.Progressbar(cpu_frame, length=200, mode='determinate')
-# cpu_progress.pack(side='left', padx=10)
-# 自定义CPU进度条  
-# cpu_canvas = tk.Canvas(cpu_frame, width=200, height=20, bg='lightgray', relief='sunken', bd=1)
-# cpu_canvas.pack(side='left', padx=10)
-cpu_canvas = tk.Canvas(cpu_frame, width=220, height=24, bg='white', highlightthickness=0)
-cpu_canvas.pack(side='left', padx=10)
-
-cpu_value_label = ttk.Label(cpu_frame, text="0.0%")
-cpu_value_label.pack(side='left')
-
-# 进程数显示
-process_label = ttk.Label(monitor_frame, text="进程数: 0")
-process_label.pack(pady=2)
-mem_label.pack(pady=5)
-
-
-# 全局变量存储监控器
-system_monitor = None
-
-def update_monitor_display(stats):
-    """
-    更新监控显示的回调函数
-    这个函数会被监控线程调用
-    """
-    def update_ui():
-        """在主线程中更新UI"""
-        try:
-            # 更新内存显示
-            mem_value_label.config(text=f"{stats['memory_percent']}%")
-            
-            # 绘制内存进度条
-            draw_progress_bar(mem_canvas, stats['memory_percent'], get_memory_color(stats['memory_percent']))
-            
-            # 更新CPU显示
-            cpu_value_label.config(text=f"{stats['cpu_percent']}%")
-            
-            # 绘制CPU进度条
-            draw_progress_bar(cpu_canvas, stats['cpu_percent'], get_cpu_color(stats['cpu_percent']))
-            
-            # 更新进程数
-            process_label.config(text=f"进程数: {stats['process_count']}")
-            
-        except Exception as e:
-            print(f"UI更新出错: {e}")
-    
-    # 线程安全的UI更新
-    root.after(0, update_ui)
-
-def draw_progress_bar(canvas, percentage, color):
-    """绘制现代化圆角渐变进度条"""
-    canvas.delete("all")
-    
-    # 背景圆角矩形
-    draw_rounded_rect(canvas, 4, 4, 216, 20, 10, '#f5f5f5', '#e8e8e8')
-    
-    # 进度条
-    if percentage > 0:
-        bar_width = max(20, int((percentage / 100) * 208))  # 最小宽度20px显示圆角
-        
-        # 主进度条
-        draw_rounded_rect(canvas, 6, 6, 6 + bar_width, 18, 8, color, '')
-        
-        # 高光效果
-        highlight_color = get_highlight_color(color)
-        draw_rounded_rect(canvas, 6, 6, 6 + bar_width, 11, 8, highlight_color, '')
-        
-        # 光泽效果
-        if bar_width > 40:
-            gloss_width = min(30, bar_width // 3)
-            canvas.create_oval(15, 7, 15 + gloss_width, 10, 
-                             fill='white', stipple='gray25', outline='')
-
-def draw_rounded_rect(canvas, x1, y1, x2, y2, radius, fill_color, outline_color):
-    """绘制圆角矩形"""
-    # 四个圆角
-    canvas.create_oval(x1, y1, x1 + radius*2, y1 + radius*2, 
-                      fill=fill_color, outline=outline_color, width=0)
-    canvas.create_oval(x2 - radius*2, y1, x2, y1 + radius*2, 
-                      fill=fill_color, outline=outline_color, width=0)
-    canvas.create_oval(x1, y2 - radius*2, x1 + radius*2, y2, 
-                      fill=fill_color, outline=outline_color, width=0)
-    canvas.create_oval(x2 - radius*2, y2 - radius*2, x2, y2, 
-                      fill=fill_color, outline=outline_color, width=0)
-    
-    # 中间矩形
-    canvas.create_rectangle(x1 + radius, y1, x2 - radius, y2, 
-                          fill=fill_color, outline='', width=0)
-    canvas.create_rectangle(x1, y1 + radius, x2, y2 - radius, 
-                          fill=fill_color, outline='', width=0)
-
-def get_highlight_color(color):
-    """获取高光颜色"""
-    highlight_map = {
-        '#ff4444': '#ff7777',  # 红色高光
-        '#ff8800': '#ffbb44',  # 橙色高光
-        '#44aa44': '#77cc77',  # 绿色高光
-        '#4488ff': '#77bbff'   # 蓝色高光
-    }
-    return highlight_map.get(color, '#ffffff')
-
 def get_memory_color(percentage):
     """现代化内存颜色方案"""
     if percentage > 85:
@@ -225,41 +36,365 @@ def get_cpu_color(percentage):
     else:
         return '#32d74b'  # iOS绿色
 
-def start_real_time_monitoring():
-    """启动实时监控"""
-    global system_monitor
-    
-    if system_monitor is None:
-        system_monitor = SystemMonitor()
-        system_monitor.add_update_callback(update_monitor_display)
-        system_monitor.start_monitoring()
-        print("✅ 实时监控已启动")
-
-def stop_real_time_monitoring():
-    """停止实时监控"""
-    global system_monitor
-    
-    if system_monitor:
-        system_monitor.stop_monitoring()
-        print("🛑 实时监控已停止")
+def set_label_text(label, text):
+    """文本没有变化时不触碰控件"""
+    if label.cget('text') != text:
+        label.config(text=text)
+
+def format_cleanup_event(event, data):
+    """把清理进度事件转换为一行文字，不需要显示的事件返回 None"""
+    from core.cleaner_safe import EVENT_CANDIDATE, EVENT_FREED, EVENT_PLAN, EVENT_TIER
+    from core.ladder import TIER_NAMES
+    from core.terminator import OUTCOME_EXITED, OUTCOME_TIMEOUT, OUTCOME_CANCELLED, OUTCOME_DENIED
+
+    if event == EVENT_PLAN:
+        if not data['selected']:
+            return None
+        return (f"🧮 需要释放 {data['needed_mb']:.0f} MB，选中 {len(data['selected'])} 个，"
+                f"预计释放 {data['covered_mb']:.0f} MB")
+    if event == EVENT_CANDIDATE:
+        if data.get('process_count', 1) > 1:
+            return f"🔍 候选应用: {data['name']} ({data['process_count']} 个进程, {data['pss_mb']:.0f} MB)"
+        return f"🔍 候选进程: {data['name']} ({data['memory_mb']:.0f} MB)"
+    if event == 'term_sent':
+        return f"📤 已请求关闭: {data['name']} (PID: {data['pid']})"
+    if event == OUTCOME_EXITED:
+        return f"✅ 已退出: {data['name']}"
+    if event == OUTCOME_TIMEOUT:
+        return f"⏰ 未响应，跳过: {data['name']}"
+    if event == OUTCOME_CANCELLED:
+        return f"🛑 已取消: {data['name']}"
+    if event == OUTCOME_DENIED:
+        return f"🔒 无权限: {data['name']}"
+    if event == EVENT_FREED:
+        return f"💾 累计释放约 {data['total_mb']:.1f} MB"
+    if event == EVENT_TIER:
+        return f"🪜 {TIER_NAMES[data['tier']]}: 释放 {data['freed_mb']:.0f} MB，耗时 {data['elapsed_ms']:.0f} ms"
+    return None
+
+
+class MainWindow:
+    def __init__(self, root):
+        self.root = root
+        self.system_monitor = None      # 实时监控器（后台加载完成后创建）
+        self.exporter = None            # 指标导出器（配置开启时创建）
+        self.core = None                # asyncio 监控核心（monitor.loop 为 asyncio 时创建）
+        self.cleanup_job = None         # 当前正在执行的后台清理任务
+        self.closing = False
+
+        root.title("Memwatch - 智能内存管家")
+        root.geometry("580x500")  # 稍微加宽
+        root.resizable(False, False)
+        root.configure(bg='#f8f9fa')  # 现代化背景色
+
+        self._setup_style()
+        self._build_mode_panel()
+        self._build_monitor_panel()
+        self._build_actions()
+
+        # 监控线程只把最新数据放进信箱，主循环繁忙时旧数据直接被覆盖
+        self.monitor_mailbox = LatestValueMailbox(root, self.render_monitor_stats)
+
+        root.protocol("WM_DELETE_WINDOW", self.on_closing)
+
+    def _setup_style(self):
+        # 现代化样式
+        style = ttk.Style()
+        style.theme_use('clam')  # 使用更现代的主题
+
+        # 自定义样式
+        style.configure('Modern.TLabelframe',
+                        background='#ffffff',
+                        borderwidth=1,
+                        relief='solid',
+                        bordercolor='#e9ecef')
+
+        style.configure('Modern.TLabelframe.Label',
+                        background='#ffffff',
+                        foreground='#495057',
+                        font=('Segoe UI', 9, 'bold'))
+
+    def _build_mode_panel(self):
+        self.mode_var = tk.StringVar()
+        mode_frame = ttk.LabelFrame(self.root, text="🎯 选择模式", padding=20, style='Modern.TLabelframe')
+        mode_frame.pack(fill='x', padx=20, pady=15)
+
+        office_radio = ttk.Radiobutton(
+            mode_frame,
+            text="办公模式",
+            variable=self.mode_var,
+            value="office",
+        )
+        game_radio = ttk.Radiobutton(
+            mode_frame,
+            text="游戏模式",
+            variable=self.mode_var,
+            value="game",
+        )
+
+        office_radio.grid(row=0, column=0, padx=10, pady=5)
+        game_radio.grid(row=0, column=1, padx=10, pady=5)
+
+    def _build_monitor_panel(self):
+        # 创建监控面板
+        monitor_frame = ttk.LabelFrame(self.root, text="📊 实时系统监控", padding=20, style='Modern.TLabelframe')
+        monitor_frame.pack(fill='x', padx=20, pady=10)
+
+        # 内存显示
+        mem_frame = ttk.Frame(monitor_frame)
+        mem_frame.pack(fill='x', pady=2)
+
+        mem_label = ttk.Label(mem_frame, text="内存使用:")
+        mem_label.pack(side='left')
+
+        # 现代化内存进度条
+        self.mem_bar = ProgressBar(mem_frame, width=220, height=24)
+        self.mem_bar.pack(side='left', padx=10)
+
+        self.mem_value_label = ttk.Label(mem_frame, text="0.0%")
+        self.mem_value_label.pack(side='left')
+
+        # CPU显示
+        cpu_frame = ttk.Frame(monitor_frame)
+        cpu_frame.pack(fill='x', pady=2)
+
+        cpu_label = ttk.Label(cpu_frame, text="CPU使用:")
+        cpu_label.pack(side='left')
+
+        self.cpu_bar = ProgressBar(cpu_frame, width=220, height=24)
+        self.cpu_bar.pack(side='left', padx=10)
+
+        self.cpu_value_label = ttk.Label(cpu_frame, text="0.0%")
+        self.cpu_value_label.pack(side='left')
+
+        # 进程数显示（加载期间显示加载状态）
+        self.process_label = ttk.Label(monitor_frame, text="⏳ 正在加载配置和监控模块...")
+        self.process_label.pack(pady=2)
+        mem_label.pack(pady=5)
+
+    def _build_actions(self):
+        button_frame = ttk.Frame(self.root)
+        button_frame.pack(pady=10)
+
+        # 后台加载完成前不能清理
+        self.clean_btn = ttk.Button(button_frame, text="开始清理", command=self.run_cleaning, state='disabled')
+        self.clean_btn.pack(side='left', padx=5)
+
+        self.cancel_btn = ttk.Button(button_frame, text="取消", command=self.cancel_cleaning, state='disabled')
+        self.cancel_btn.pack(side='left', padx=5)
+
+        self.stats_btn = ttk.Button(button_frame, text="性能统计", command=self.show_instrumentation, state='disabled')
+        self.stats_btn.pack(side='left', padx=5)
+
+        self.result_text = tk.Text(self.root, height=10, wrap='word')
+        self.result_text.pack(fill='both', padx=10, pady=5)
+
+    # ---------- 分阶段加载 ----------
 
+    def start_loading(self):
+        """窗口画出后在后台加载其余模块"""
+        threading.Thread(target=self._load_backend, daemon=True).start()
 
-clean_btn = ttk.Button(root, text="开始清理", command = run_cleaning)
-clean_btn.pack(pady=10)
+    def _load_backend(self):
+        """后台线程：加载配置、创建监控器、读取历史数据、预先导入清理模块"""
+        try:
+            from config.config_manager import get_config_manager
+            from core import instrumentation
+            from core.monitor_realtime import SystemMonitor  # 导入我们的监控系统
+            from core.journal import MetricsJournal
+            from core.exporter import create_exporter
+            from core.daemon import RemoteMonitor, daemon_available
+            from core.async_core import create_core
+            from core.sampling import create_sampler
+            import core.cleanup_job  # noqa: F401  预先导入，点击清理时不再等待
+
+            config_manager = get_config_manager()
+            # 配置文件被外部修改时自动重新加载
+            config_manager.start_watching()
+            instrumentation.configure(config_manager)
+
+            # 守护进程在运行时直接订阅它的采样，不再启动自己的监控线程
+            socket_path = config_manager.get('daemon.socket_path', 'data/memwatch.sock')
+            if daemon_available(socket_path):
+                print(f"🛰️ 使用守护进程的实时采样: {socket_path}")
+                monitor = RemoteMonitor(socket_path, interval=UI_SAMPLE_INTERVAL)
+                self.root.after(0, lambda: self._on_backend_ready(monitor))
+                return
+
+            journal = None
+            if config_manager.get('journal.enabled', True):
+                journal = MetricsJournal(
+                    directory=config_manager.get('journal.directory', 'data/journal'),
+                    file_size_mb=config_manager.get('journal.file_size_mb', 4),
+                    compact_after_hours=config_manager.get('journal.compact_after_hours', 24)
+                )
+            # 采样回调经事件循环分发到线程池，界面仍通过信箱在主线程更新
+            self.core = create_core(config_manager)
+            monitor = SystemMonitor(journal=journal, core=self.core, sampler=create_sampler(config_manager))
+            # 界面显示期间至少每秒刷新一次，自适应采样只会在此基础上加快
+            monitor.request_interval('ui', UI_SAMPLE_INTERVAL)
+            monitor.load_history()
+            exporter = create_exporter(config_manager, monitor)
+        except Exception as e:
+            print(f"❌ 后台加载失败: {e}")
+            # e 在 except 块结束后被删除，需要在创建回调时绑定
+            self.root.after(0, lambda e=e: self._on_load_failed(e))
+            return
+
+        self.root.after(0, lambda: self._on_backend_ready(monitor, exporter))
+
+    def _on_backend_ready(self, monitor, exporter=None):
+        """主线程：启动实时监控，启用清理按钮"""
+        if self.closing:
+            return
+        self.system_monitor = monitor
+        monitor.add_update_callback(self.update_monitor_display)
+        monitor.start_monitoring()
+        if exporter is not None:
+            try:
+                self.exporter = exporter.start()
+            except OSError as e:
+                print(f"⚠️ 指标导出启动失败: {e}")
+        set_label_text(self.process_label, "进程数: 0")
+        self.clean_btn.config(state='normal')
+        self.stats_btn.config(state='normal')
+        print("✅ 实时监控已启动")
 
-result_text = tk.Text(root, height=10, wrap='word')
-result_text.pack(fill='both', padx=10, pady=5)
+    def _on_load_failed(self, error):
+        if self.closing:
+            return
+        set_label_text(self.process_label, "❌ 加载失败")
+        self.result_text.insert(tk.END, f"❌ 加载失败: {error}\n")
 
-# 启动实时监控
-start_real_time_monitoring()
+    # ---------- 实时监控 ----------
 
-# 程序退出时清理
-def on_closing():
-    """程序退出时的清理工作"""
-    stop_real_time_monitoring()
-    root.destroy()
+    def render_monitor_stats(self, stats):
+        """在主线程中更新UI（只处理信箱中最新的一份数据）"""
+        try:
+            # 更新内存显示
+            set_label_text(self.mem_value_label, f"{stats['memory_percent']}%")
+            self.mem_bar.set(stats['memory_percent'], get_memory_color(stats['memory_percent']))
+
+            # 更新CPU显示（首次采样还没有基线）
+            if stats.get('cpu_ready', True):
+                set_label_text(self.cpu_value_label, f"{stats['cpu_percent']}%")
+                self.cpu_bar.set(stats['cpu_percent'], get_cpu_color(stats['cpu_percent']))
+            else:
+                set_label_text(self.cpu_value_label, "采集中")
+
+            # 更新进程数（附带当前采样间隔）
+            text = f"进程数: {stats['process_count']}"
+            if 'sample_interval' in stats:
+                text += f"  ·  采样间隔 {stats['sample_interval']:g}s"
+            set_label_text(self.process_label, text)
 
-root.protocol("WM_DELETE_WINDOW", on_closing)
+        except Exception as e:
+            print(f"UI更新出错: {e}")
 
-# 启动GUI主循环
-root.mainloop()
\ No newline at end of file
+    def update_monitor_display(self, stats):
+        """
+        更新监控显示的回调函数
+        这个函数会被监控线程调用
+        """
+        self.monitor_mailbox.post(stats)
+
+    def stop_real_time_monitoring(self):
+        """停止实时监控"""
+        if self.system_monitor:
+            self.system_monitor.stop_monitoring()
+            print("🛑 实时监控已停止")
+
+    def show_instrumentation(self):
+        """在结果区显示各阶段耗时和自身开销"""
+        from core import instrumentation
+
+        self.result_text.insert(tk.END, "\n📈 性能统计\n" + "\n".join(instrumentation.format_report()) + "\n")
+        self.result_text.see(tk.END)
+
+    # ---------- 清理 ----------
+
+    def run_cleaning(self):
+        from core.cleanup_job import CleanupJob  # 后台执行安全清理
+
+        mode = self.mode_var.get()
+        if not mode:
+            messagebox.showwarning("提示", "请选择一个模式")
+            return
+        if self.cleanup_job is not None and self.cleanup_job.running:
+            return
+
+        mem_percent = get_memory_percent()
+        self.result_text.insert(tk.END, f"\n当前内存占用：{mem_percent:.1f}%\n")
+        self.result_text.insert(tk.END, f"正在以【{mode}】模式清理...\n")
+        self.result_text.see(tk.END)
+
+        # 清理在后台线程执行，主循环只定时取回进度事件
+        self.cleanup_job = CleanupJob(mode).start()
+        self.clean_btn.config(state='disabled')
+        self.cancel_btn.config(state='normal')
+        self.root.after(50, self.poll_cleanup_job)
+
+    def cancel_cleaning(self):
+        if self.cleanup_job is not None and self.cleanup_job.running:
+            self.cleanup_job.cancel()
+            self.cancel_btn.config(state='disabled')
+            self.result_text.insert(tk.END, "正在取消...\n")
+            self.result_text.see(tk.END)
+
+    def poll_cleanup_job(self):
+        """在主线程中取回后台清理的进度事件"""
+        from core.cleanup_job import EVENT_DONE, EVENT_FAILED
+
+        job = self.cleanup_job
+        if job is None or self.closing:
+            return
+
+        finished = False
+        for event, data in job.poll():
+            if event == EVENT_DONE:
+                finished = True
+                if data.get('cancelled'):
+                    self.result_text.insert(tk.END, "🛑 清理已取消。\n")
+                else:
+                    self.result_text.insert(tk.END, "✅ 清理完成。\n")
+            elif event == EVENT_FAILED:
+                finished = True
+                self.result_text.insert(tk.END, f"❌ 清理失败: {data['error']}\n")
+            else:
+                line = format_cleanup_event(event, data)
+                if line:
+                    self.result_text.insert(tk.END, line + "\n")
+        self.result_text.see(tk.END)
+
+        if finished or not job.running and job.events.empty():
+            self.clean_btn.config(state='normal')
+            self.cancel_btn.config(state='disabled')
+        else:
+            self.root.after(50, self.poll_cleanup_job)
+
+    # 程序退出时清理
+    def on_closing(self):
+        """程序退出时的清理工作"""
+        self.closing = True
+        if self.cleanup_job is not None and self.cleanup_job.running:
+            self.cleanup_job.cancel()
+            self.cleanup_job.join(1.0)
+        self.stop_real_time_monitoring()
+        if self.exporter is not None:
+            self.exporter.stop()
+        if self.core is not None:
+            self.core.stop()
+        self.root.destroy()
+
+
+def main():
+    root = tk.Tk()
+    window = MainWindow(root)
+    # 第一帧画出后再开始后台加载
+    root.after_idle(window.start_loading)
+    # 启动GUI主循环
+    root.mainloop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+# 保留模式的圆角进度条
+import threading
+import tkinter as tk
+
+
+def get_highlight_color(color):
+    """获取高光颜色"""
+    highlight_map = {
+        '#ff4444': '#ff7777',  # 红色高光
+        '#ff8800': '#ffbb44',  # 橙色高光
+        '#44aa44': '#77cc77',  # 绿色高光
+        '#4488ff': '#77bbff'   # 蓝色高光
+    }
+    return highlight_map.get(color, '#ffffff')
+
+
+class RoundedRect:
+    """
+    由 4 个圆角椭圆 + 2 个矩形组成的圆角矩形
+    图元只创建一次，之后通过 coords / itemconfig 修改
+    """
+
+    def __init__(self, canvas, radius, fill_color, outline_color=''):
+        self.canvas = canvas
+        self.radius = radius
+        self.corners = [canvas.create_oval(0, 0, 0, 0, fill=fill_color, outline=outline_color, width=0)
+                        for _ in range(4)]
+        self.bodies = [canvas.create_rectangle(0, 0, 0, 0, fill=fill_color, outline='', width=0)
+                       for _ in range(2)]
+
+    @property
+    def items(self):
+        return self.corners + self.bodies
+
+    def move_to(self, x1, y1, x2, y2):
+        canvas = self.canvas
+        d = self.radius * 2
+        r = self.radius
+        canvas.coords(self.corners[0], x1, y1, x1 + d, y1 + d)
+        canvas.coords(self.corners[1], x2 - d, y1, x2, y1 + d)
+        canvas.coords(self.corners[2], x1, y2 - d, x1 + d, y2)
+        canvas.coords(self.corners[3], x2 - d, y2 - d, x2, y2)
+        canvas.coords(self.bodies[0], x1 + r, y1, x2 - r, y2)
+        canvas.coords(self.bodies[1], x1, y1 + r, x2, y2 - r)
+
+    def set_fill(self, fill_color):
+        for item in self.items:
+            self.canvas.itemconfig(item, fill=fill_color)
+
+    def set_visible(self, visible):
+        state = 'normal' if visible else 'hidden'
+        for item in self.items:
+            self.canvas.itemconfig(item, state=state)
+
+
+class ProgressBar:
+    """
+    现代化圆角渐变进度条（保留模式）
+    - 所有图元在创建时画好，之后只修改坐标和颜色
+    - 进度变化不足 1 像素且颜色不变时不触碰画布
+    外观与原先每次 delete("all") 后重画的版本一致
+    """
+
+    def __init__(self, parent, width=220, height=24):
+        self.canvas = tk.Canvas(parent, width=width, height=height, bg='white', highlightthickness=0)
+        self.track_width = width - 12      # 进度条可用宽度（两侧各留 6px）
+
+        canvas = self.canvas
+        # 背景圆角矩形
+        self.background = RoundedRect(canvas, 10, '#f5f5f5', '#e8e8e8')
+        self.background.move_to(4, 4, width - 4, 20)
+        # 主进度条、高光、光泽
+        self.bar = RoundedRect(canvas, 8, '')
+        self.highlight = RoundedRect(canvas, 8, '')
+        self.gloss = canvas.create_oval(0, 0, 0, 0, fill='white', stipple='gray25', outline='')
+
+        self._bar_width = None
+        self._color = None
+        self._visible = None
+        self._gloss = None
+        self.set(0, '')
+
+    def pack(self, **kwargs):
+        self.canvas.pack(**kwargs)
+
+    def set(self, percentage, color):
+        """
+        更新进度，返回是否实际修改了画布
+        """
+        bar_width = 0
+        if percentage > 0:
+            bar_width = max(20, int((percentage / 100) * self.track_width))  # 最小宽度20px显示圆角
+
+        if bar_width == self._bar_width and color == self._color:
+            return False
+
+        visible = bar_width > 0
+        if bar_width != self._bar_width:
+            if visible:
+                self.bar.move_to(6, 6, 6 + bar_width, 18)
+                self.highlight.move_to(6, 6, 6 + bar_width, 11)
+            gloss = bar_width > 40
+            if gloss:
+                gloss_width = min(30, bar_width // 3)
+                self.canvas.coords(self.gloss, 15, 7, 15 + gloss_width, 10)
+            if visible != self._visible:
+                self.bar.set_visible(visible)
+                self.highlight.set_visible(visible)
+                self._visible = visible
+            if gloss != self._gloss:
+                self.canvas.itemconfig(self.gloss, state='normal' if gloss else 'hidden')
+                self._gloss = gloss
+
+        if color != self._color and color:
+            self.bar.set_fill(color)
+            self.highlight.set_fill(get_highlight_color(color))
+
+        self._bar_width = bar_width
+        self._color = color
+        return True
+
+
+class LatestValueMailbox:
+    """
+    最新值信箱：后台线程随时 post，UI 线程只处理最新的一份
+    同一时刻最多只有一个待执行的 after 回调，主循环卡住时不会积压
+    """
+
+    def __init__(self, root, handler):
+        self.root = root
+        self.handler = handler
+        self._lock = threading.Lock()
+        self._value = None
+        self._pending = False
+        self.dropped = 0     # 被更新的值覆盖、没有显示出来的数量
+
+    def post(self, value):
+        with self._lock:
+            if self._pending:
+                self.dropped += 1
+            self._value = value
+            if self._pending:
+                return
+            self._pending = True
+        try:
+            self.root.after(0, self._drain)
+        except (RuntimeError, tk.TclError):
+            # 窗口已关闭
+            with self._lock:
+                self._pending = False
+
+    def _drain(self):
+        with self._lock:
+            value = self._value
+            self._value = None
+            self._pending = False
+        self.handler(value)